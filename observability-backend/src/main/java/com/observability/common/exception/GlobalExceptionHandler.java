@@ -5,6 +5,7 @@ import com.observability.common.response.ErrorDetail;
 import lombok.extern.slf4j.Slf4j;
 import org.springframework.http.HttpStatus;
 import org.springframework.http.ResponseEntity;
+import org.springframework.http.converter.HttpMessageNotReadableException;
 import org.springframework.validation.FieldError;
 import org.springframework.web.bind.MethodArgumentNotValidException;
 import org.springframework.web.bind.annotation.ExceptionHandler;
@@ -114,6 +115,26 @@ public class GlobalExceptionHandler {
                 .body(ApiResponse.error(error));
     }
 
+    @ExceptionHandler(HttpMessageNotReadableException.class)
+    public ResponseEntity<ApiResponse<Void>> handleMessageNotReadable(
+            HttpMessageNotReadableException ex, WebRequest request) {
+        if (!(ex.getMostSpecificCause() instanceof PayloadTooLargeException tooLarge)) {
+            return handleGenericException(ex, request);
+        }
+        log.warn("Request body too large: {}", tooLarge.getMessage());
+
+        ErrorDetail error = ErrorDetail.builder()
+                .code("PAYLOAD_TOO_LARGE")
+                .message(tooLarge.getMessage())
+                .timestamp(Instant.now())
+                .path(request.getDescription(false))
+                .build();
+
+        return ResponseEntity
+                .status(HttpStatus.PAYLOAD_TOO_LARGE)
+                .body(ApiResponse.error(error));
+    }
+
     @ExceptionHandler(Exception.class)
     public ResponseEntity<ApiResponse<Void>> handleGenericException(
             Exception ex, WebRequest request) {
@@ -0,0 +1,14 @@
+package com.observability.common.exception;
+
+import java.io.IOException;
+
+/**
+ * Exception thrown while reading a request body that grows past its size limit.
+ * An IOException so it can be raised from inside the body stream; mapped to 413 by GlobalExceptionHandler.
+ */
+public class PayloadTooLargeException extends IOException {
+
+    public PayloadTooLargeException(String message) {
+        super(message);
+    }
+}
@@ -0,0 +1,25 @@
+package com.observability.config;
+
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.boot.web.servlet.FilterRegistrationBean;
+import org.springframework.context.annotation.Bean;
+import org.springframework.context.annotation.Configuration;
+
+/**
+ * Registers the gzip request filter for the ingestion endpoints only.
+ */
+@Configuration
+public class GzipFilterConfig {
+
+    @Value("${observability.ingest.max-inflated-bytes:67108864}")
+    private long maxInflatedBytes;
+
+    @Bean
+    public FilterRegistrationBean<GzipRequestFilter> gzipRequestFilter() {
+        FilterRegistrationBean<GzipRequestFilter> registration =
+                new FilterRegistrationBean<>(new GzipRequestFilter(maxInflatedBytes));
+        registration.addUrlPatterns("/api/ingest/*");
+        registration.setOrder(0);
+        return registration;
+    }
+}
@@ -0,0 +1,163 @@
+package com.observability.config;
+
+import com.observability.common.exception.PayloadTooLargeException;
+import jakarta.servlet.*;
+import jakarta.servlet.http.HttpServletRequest;
+import jakarta.servlet.http.HttpServletRequestWrapper;
+import org.springframework.http.HttpHeaders;
+
+import java.io.BufferedReader;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.nio.charset.Charset;
+import java.nio.charset.StandardCharsets;
+import java.util.Collections;
+import java.util.Enumeration;
+import java.util.zip.GZIPInputStream;
+
+/**
+ * Filter that decompresses gzip request bodies (Content-Encoding: gzip).
+ * Ingestion clients compress large batches to cut wire bytes; the controllers read plain JSON.
+ * Registered for /api/ingest/* only (see GzipFilterConfig). The inflated body is capped at
+ * maxInflatedBytes so a small gzip bomb cannot be expanded into memory; past the cap reads fail
+ * with PayloadTooLargeException, answered with 413.
+ */
+public class GzipRequestFilter implements Filter {
+
+    private static final String GZIP = "gzip";
+
+    private final long maxInflatedBytes;
+
+    public GzipRequestFilter(long maxInflatedBytes) {
+        this.maxInflatedBytes = maxInflatedBytes;
+    }
+
+    @Override
+    public void doFilter(ServletRequest request, ServletResponse response, FilterChain chain)
+            throws IOException, ServletException {
+        HttpServletRequest httpRequest = (HttpServletRequest) request;
+        String encoding = httpRequest.getHeader(HttpHeaders.CONTENT_ENCODING);
+        if (encoding != null && encoding.trim().equalsIgnoreCase(GZIP)) {
+            chain.doFilter(new GzipRequest(httpRequest, maxInflatedBytes), response);
+            return;
+        }
+        chain.doFilter(request, response);
+    }
+
+    /**
+     * Request whose body is the decompressed stream; Content-Encoding and Content-Length are hidden.
+     */
+    private static class GzipRequest extends HttpServletRequestWrapper {
+
+        private final ServletInputStream body;
+
+        GzipRequest(HttpServletRequest request, long maxInflatedBytes) throws IOException {
+            super(request);
+            this.body = new GzipInputStream(new GZIPInputStream(request.getInputStream()), maxInflatedBytes);
+        }
+
+        @Override
+        public ServletInputStream getInputStream() {
+            return body;
+        }
+
+        @Override
+        public BufferedReader getReader() {
+            String encoding = getCharacterEncoding();
+            Charset charset = encoding != null ? Charset.forName(encoding) : StandardCharsets.UTF_8;
+            return new BufferedReader(new InputStreamReader(body, charset));
+        }
+
+        @Override
+        public int getContentLength() {
+            return -1;
+        }
+
+        @Override
+        public long getContentLengthLong() {
+            return -1;
+        }
+
+        @Override
+        public String getHeader(String name) {
+            return isHidden(name) ? null : super.getHeader(name);
+        }
+
+        @Override
+        public Enumeration<String> getHeaders(String name) {
+            return isHidden(name) ? Collections.emptyEnumeration() : super.getHeaders(name);
+        }
+
+        @Override
+        public Enumeration<String> getHeaderNames() {
+            return Collections.enumeration(Collections.list(super.getHeaderNames()).stream()
+                    .filter(name -> !isHidden(name))
+                    .toList());
+        }
+
+        private static boolean isHidden(String name) {
+            return HttpHeaders.CONTENT_ENCODING.equalsIgnoreCase(name)
+                    || HttpHeaders.CONTENT_LENGTH.equalsIgnoreCase(name);
+        }
+    }
+
+    private static class GzipInputStream extends ServletInputStream {
+
+        private final GZIPInputStream in;
+        private final long limit;
+        private long inflated;
+        private boolean finished;
+
+        GzipInputStream(GZIPInputStream in, long limit) {
+            this.in = in;
+            this.limit = limit;
+        }
+
+        @Override
+        public int read() throws IOException {
+            int b = in.read();
+            finished = b < 0;
+            if (!finished) {
+                count(1);
+            }
+            return b;
+        }
+
+        @Override
+        public int read(byte[] buffer, int offset, int length) throws IOException {
+            int n = in.read(buffer, offset, length);
+            finished = n < 0;
+            if (!finished) {
+                count(n);
+            }
+            return n;
+        }
+
+        private void count(int n) throws PayloadTooLargeException {
+            inflated += n;
+            if (inflated > limit) {
+                throw new PayloadTooLargeException("Decompressed request body exceeds " + limit + " bytes");
+            }
+        }
+
+        @Override
+        public boolean isFinished() {
+            return finished;
+        }
+
+        @Override
+        public boolean isReady() {
+            return true;
+        }
+
+        @Override
+        public void setReadListener(ReadListener listener) {
+            throw new UnsupportedOperationException("Async reads of gzip request bodies are not supported");
+        }
+
+        @Override
+        public void close() throws IOException {
+            in.close();
+        }
+    }
+}
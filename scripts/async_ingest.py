@@ -0,0 +1,140 @@
+"""
+Asyncio ingestion client for the backend /api/ingest/* endpoints.
+
+Keeps a bounded pool of keep-alive connections (aiohttp TCPConnector) and a
+configurable number of requests in flight, so batches are pipelined instead of
+sent one blocking requests.post() at a time over a fresh TCP connection.
+
+The event loop runs on a background thread; the generators stay synchronous and
+call submit(), which blocks only while max_in_flight requests are outstanding.
+Requests that fail before the backend processed them are retried with the
+caller's RetryPolicy backoff (see retry.py); batches that still fail are handed
+back via take_failures() so the caller can decide on its own thread whether a
+direct-insert fallback is safe.
+"""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import wait
+from typing import Any, List, Optional, Tuple
+
+import aiohttp
+
+from retry import RetryPolicy, classify_api_error
+
+
+class IngestStats:
+    """Request/row counters and per-request latencies for one client."""
+
+    def __init__(self):
+        self.requests = 0
+        self.rows = 0
+        self.rows_by_path = defaultdict(int)
+        self.errors = 0
+        self.retries = 0
+        self.latencies_ms: List[float] = []
+        self.started = time.perf_counter()
+
+    def record(self, rows: int, latency_ms: float, path: str = ""):
+        self.requests += 1
+        self.rows += rows
+        self.rows_by_path[path] += rows
+        self.latencies_ms.append(latency_ms)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        return (f"{self.requests:,} requests, {self.rows:,} rows, {self.errors} errors in {elapsed:.1f}s "
+                f"({self.requests / elapsed:,.1f} req/s, {self.rows / elapsed:,.0f} rows/s)")
+
+
+class AsyncIngestClient:
+    """Pipelined, connection-pooled poster for ingestion batches."""
+
+    def __init__(self, api_url: str, auth_token: str, max_connections: int = 16,
+                 max_in_flight: int = 32, timeout: float = 30, retry: RetryPolicy = None):
+        self.api_url = api_url.rstrip("/")
+        self.auth_token = auth_token
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retry = retry or RetryPolicy(attempts=1)
+        self.stats = IngestStats()
+
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pending = set()
+        self._failures: List[Tuple[Any, Exception]] = []
+        self._lock = threading.Lock()
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="ingest-loop", daemon=True)
+        self._thread.start()
+        self._session = asyncio.run_coroutine_threadsafe(self._open_session(), self._loop).result()
+
+    async def _open_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers={"Authorization": f"Bearer {self.auth_token}"},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    def submit(self, path: str, payload: Any, rows: int, context: Optional[Any] = None,
+               headers: Optional[dict] = None):
+        """Queue a POST of payload (JSON, or a bytes body) to path; blocks while max_in_flight requests are pending."""
+        self._slots.acquire()
+        future = asyncio.run_coroutine_threadsafe(self._post(path, payload, rows, context, headers), self._loop)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    async def _post(self, path: str, payload: Any, rows: int, context: Optional[Any], headers: Optional[dict]):
+        started = time.perf_counter()
+        delays = self.retry.delays()
+        try:
+            while True:
+                try:
+                    body = {"data": payload} if isinstance(payload, bytes) else {"json": payload}
+                    async with self._session.post(f"{self.api_url}{path}", headers=headers, **body) as response:
+                        await response.read()
+                        response.raise_for_status()
+                    self.stats.record(rows, (time.perf_counter() - started) * 1000, path)
+                    return
+                except Exception as e:
+                    delay = next(delays, None) if classify_api_error(e) == "retry" else None
+                    if delay is None:
+                        with self._lock:
+                            self.stats.errors += 1
+                            self._failures.append((context, e))
+                        return
+                    self.stats.retries += 1
+                    await asyncio.sleep(delay)
+        finally:
+            self._slots.release()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def take_failures(self) -> List[Tuple[Any, Exception]]:
+        """Return and clear the (context, error) pairs of failed requests."""
+        with self._lock:
+            failures, self._failures = self._failures, []
+        return failures
+
+    def flush(self):
+        """Wait for every submitted request to finish."""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+
+    def close(self):
+        self.flush()
+        asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,128 @@
+"""
+TTL-aware time windows for the ClickHouse data generator (--start/--end, --hours).
+
+spans and the metric views keep 7 days (TTL ... + INTERVAL 7 DAY), logs 14.
+Rows older than that are generated, inserted, merged -- and then dropped by
+the next TTL merge. Before a run, each table's TTL is read from
+system.tables and its window [start, end) is checked against the TTL horizon
+(wall clock now - TTL, plus a safety margin so hours do not expire while a
+long run is still going):
+
+  clamp   start the table's window at the horizon (default)
+  warn    generate the whole window anyway, saying how much will be dropped
+  error   refuse to run
+
+Materialized views are reported against their source table: log_counts_1m
+keeps 7 days of a 14-day logs window.
+
+Backfill windows are cut into one chunk per UTC day (partitions are per day),
+expressed as (hour_offset, hours) before `end` like every other unit of work,
+so the sequential path, --workers and --checkpoint all run day by day.
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from mv_report import split_view_query
+
+Chunk = Tuple[int, int]  # (hour_offset, hours) before the run's end
+
+# ClickHouse normalises INTERVAL 7 DAY to toIntervalDay(7) in create_table_query
+_TTL = re.compile(r"\bTTL\s+\w+\s*\+\s*(?:toInterval(\w+)\((\d+)\)|INTERVAL\s+(\d+)\s+(\w+))", re.IGNORECASE)
+UNIT_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400,
+                "month": 30 * 86400, "quarter": 91 * 86400, "year": 365 * 86400}
+
+
+class TTLError(Exception):
+    pass
+
+
+def parse_ttl(create_query: str) -> Optional[timedelta]:
+    """The table-level row TTL of a CREATE TABLE/MATERIALIZED VIEW statement, None without one."""
+    match = _TTL.search(create_query)
+    if not match:
+        return None
+    unit, amount = (match.group(1), match.group(2)) if match.group(1) else (match.group(4), match.group(3))
+    seconds = UNIT_SECONDS.get(unit.lower().rstrip("s"))
+    return timedelta(seconds=int(amount) * seconds) if seconds else None
+
+
+def read_ttls(client) -> Dict[str, Tuple[Optional[timedelta], Optional[str]]]:
+    """table -> (TTL, source table for materialized views) for the current database."""
+    ttls = {}
+    for name, engine, query in client.query(
+            "SELECT name, engine, create_table_query FROM system.tables "
+            "WHERE database = currentDatabase() AND NOT startsWith(name, '.inner')").result_rows:
+        source = None
+        if engine == "MaterializedView":
+            query, source = split_view_query(query)  # TTL belongs to the view's storage, before AS SELECT
+        ttls[name] = (parse_ttl(query), source)
+    return ttls
+
+
+def parse_when(value: str) -> datetime:
+    """Parse a UTC date (2024-05-01) or date-time (2024-05-01T12:00) for --start/--end."""
+    try:
+        return datetime.fromisoformat(value.rstrip("Z"))
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD or YYYY-MM-DDTHH:MM")
+
+
+def day_chunks(start: datetime, end: datetime) -> List[Chunk]:
+    """Whole hours of [start, end) as one (hour_offset, hours) chunk per UTC day, oldest first ([] if empty)."""
+    hours = int((end - start).total_seconds() // 3600)
+    chunks = []
+    offset = 0
+    while offset < hours:
+        day_end = end - timedelta(hours=offset)
+        midnight = day_end.replace(hour=0, minute=0, second=0, microsecond=0)
+        length = int((day_end - midnight).total_seconds() // 3600) or 24
+        length = min(length, hours - offset)
+        chunks.append((offset, length))
+        offset += length
+    return chunks[::-1]
+
+
+def plan_windows(tables: List[str], start: datetime, end: datetime,
+                 ttls: Dict[str, Tuple[Optional[timedelta], Optional[str]]], now: datetime,
+                 margin: timedelta = timedelta(hours=6),
+                 policy: str = "clamp") -> Tuple[Dict[str, datetime], List[str]]:
+    """
+    Each table's window start after applying its TTL under `policy`, plus the messages to print.
+
+    A table whose whole window lies beyond its TTL gets start == end (nothing to generate).
+    Raises TTLError under policy "error" if any window reaches past a TTL.
+    """
+    starts, messages = {}, []
+    if end > now:
+        messages.append(f"⚠ --end {end:%Y-%m-%d %H:%M} is in the future; those rows are not visible in "
+                        f"'last N hours' queries yet")
+    for table in tables:
+        ttl = ttls.get(table, (None, None))[0]
+        starts[table] = start
+        if ttl is None:
+            continue
+        horizon = now - ttl + margin
+        if start >= horizon:
+            continue
+        lost_hours = (min(horizon, end) - start).total_seconds() / 3600
+        message = (f"{table}: TTL {ttl.days}d (+{margin.total_seconds() / 3600:g}h margin) expires rows before "
+                   f"{horizon:%Y-%m-%d %H:%M}, {lost_hours:,.0f}h of the requested window")
+        if policy == "error":
+            raise TTLError(message + "; use a later --start or --ttl-policy clamp/warn")
+        if policy == "clamp":
+            starts[table] = min(max(start, horizon.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)),
+                                end)
+            messages.append(f"✂️  {message}: generating from {starts[table]:%Y-%m-%d %H:%M}")
+        else:
+            messages.append(f"⚠ {message}: generating it anyway")
+
+    # Materialized views fed by these tables keep less history than their source
+    for view, (ttl, source) in sorted(ttls.items()):
+        if source in starts and ttl is not None and end - starts[source] > ttl:
+            source_ttl = ttls[source][0]
+            if source_ttl is None or ttl < source_ttl:
+                messages.append(f"ℹ️  {view} (from {source}) keeps {ttl.days}d: older {source} rows are not "
+                                f"in the view")
+    return starts, messages
@@ -0,0 +1,176 @@
+"""
+High-cardinality stress profiles for the ClickHouse data generator (--cardinality).
+
+By default every span and log is written with attributes={} and only a
+handful of operation_name/host/pod values. Production is nothing like that:
+20-50 attribute keys per span, URL paths with ids in them, thousands of pods.
+A profile rewrites those columns of every generated batch:
+
+  attributes        keys_per_row (min, max) keys from a pool of key_pool keys
+                    (OpenTelemetry-style names, then custom.attr_N). Each key
+                    has its own value cardinality, spread log-uniformly from 2
+                    (enum-like) up to value_cardinality (ids)
+  operation_name    each endpoint expands into operations / endpoints paths
+                    (/orders/{id} -> /orders/1234); span http_url is left alone
+  host, pod         hosts distinct hosts; pods spread over the services
+
+LowCardinality(String) keeps a dictionary per part and falls back to plain
+strings past low_cardinality_max_dictionary_size (8,192 by default), so the
+"high" and "extreme" profiles push operation_name, host and pod beyond that.
+
+Vocabularies depend only on the profile parameters and seed, so worker
+processes rebuild them identically; per-row choices come from the batch
+generator's RNG. storage_report() reads the resulting column sizes back from
+system.columns.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from columnar_engine import DictColumn, MapColumn, random_hex_ids, vocabulary
+
+PROFILES: Dict[str, Dict] = {
+    "wide": dict(keys_per_row=(20, 30), key_pool=50, value_cardinality=1_000,
+                 operations=500, hosts=50, pods=300),
+    "high": dict(keys_per_row=(20, 50), key_pool=200, value_cardinality=100_000,
+                 operations=20_000, hosts=500, pods=5_000),
+    "extreme": dict(keys_per_row=(30, 50), key_pool=2_000, value_cardinality=1_000_000,
+                    operations=200_000, hosts=5_000, pods=50_000),
+}
+
+# Attribute keys in order of use: the first keys of the pool are on almost every row
+ATTRIBUTE_KEYS = [
+    "http.method", "http.route", "http.target", "http.user_agent", "http.client_ip", "http.request_content_length",
+    "net.peer.name", "net.peer.port", "service.version", "deployment.environment", "cloud.region",
+    "cloud.availability_zone", "k8s.namespace.name", "k8s.pod.uid", "k8s.node.name", "container.id",
+    "process.pid", "thread.name", "user.id", "session.id", "tenant.id", "customer.tier", "feature.flag",
+    "db.system", "db.name", "db.statement", "db.operation", "messaging.system", "messaging.destination",
+    "messaging.message_id", "rpc.system", "rpc.service", "rpc.method", "exception.type", "code.function",
+    "code.namespace", "code.lineno", "order.id", "cart.id", "payment.provider", "request.id", "retry.count",
+]
+
+StorageRow = Tuple[str, str, str, int, int]  # (table, column, type, compressed bytes, uncompressed bytes)
+
+
+class CardinalityProfile:
+    """Rewrites attributes, operation_name, host and pod of column batches at a chosen cardinality."""
+
+    def __init__(self, keys_per_row: Tuple[int, int] = (20, 30), key_pool: int = 50,
+                 value_cardinality: int = 1_000, operations: int = 0, hosts: int = 0, pods: int = 0,
+                 seed: int = 0):
+        rng = np.random.default_rng(seed)
+        if not 0 <= min(keys_per_row) <= key_pool:
+            raise ValueError(f"keys_per_row {tuple(keys_per_row)} must start within 0-{key_pool} (key_pool)")
+        self.keys_per_row = (min(keys_per_row), min(max(keys_per_row), key_pool))
+        self.operations = operations
+        self.hosts = hosts
+        self.pods = pods
+        self.seed = seed
+
+        self.key_vocab = vocabulary(ATTRIBUTE_KEYS[:key_pool]
+                                    + [f"custom.attr_{i}" for i in range(key_pool - len(ATTRIBUTE_KEYS))])
+        # Per-key value cardinality, log-uniform between 2 and value_cardinality, in random key order
+        self.key_cardinality = rng.permutation(
+            np.geomspace(2, max(2, value_cardinality), key_pool).astype(np.int64))
+        self.key_shift = rng.integers(0, max(1, value_cardinality), key_pool)
+        self.value_vocab = vocabulary(random_hex_ids(rng, max(2, value_cardinality), 12).astype("U12").tolist())
+        self.host_vocab = vocabulary([f"ip-10-{i >> 8 & 255}-{i & 255}.ec2.internal" for i in range(hosts)])
+        self._pod_suffix = random_hex_ids(rng, max(1, pods), 10).astype("U10").tolist()
+        # (kind, id(source vocab)) -> (source vocab, expanded vocab, codes per source value); holding the
+        # source keeps its id from being reused
+        self._vocab_cache: Dict[Tuple[str, int], Tuple[np.ndarray, np.ndarray, int]] = {}
+
+    @classmethod
+    def named(cls, name: str, seed: int = 0, **overrides) -> "CardinalityProfile":
+        """One of PROFILES, with any non-None keyword overriding the profile's value."""
+        params = dict(PROFILES[name])
+        params.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(seed=seed, **params)
+
+    @property
+    def mean_keys(self) -> float:
+        return sum(self.keys_per_row) / 2
+
+    def describe(self) -> str:
+        lo, hi = self.keys_per_row
+        sizes = ", ".join(f"{count:,} {name}" if count else f"default {name}"
+                          for name, count in [("operations", self.operations), ("hosts", self.hosts),
+                                              ("pods", self.pods)])
+        return (f"{lo}-{hi} attribute keys/row from {len(self.key_vocab):,} keys, up to "
+                f"{int(self.key_cardinality.max()):,} values/key; {sizes}")
+
+    # ==================== COLUMNS ====================
+    def attributes(self, rng: np.random.Generator, n: int) -> MapColumn:
+        """A Map(String, String) column: each row gets a window of consecutive keys from the pool."""
+        lo, hi = self.keys_per_row
+        counts = rng.integers(lo, hi + 1, n)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        m = int(offsets[-1])
+        # Windows start near the front of the pool, so low-numbered keys are the common ones
+        pool = len(self.key_vocab)
+        start = np.minimum(rng.geometric(4.0 / pool, n) - 1, pool - counts) if pool > hi else np.zeros(n, np.int64)
+        key = np.repeat(start - offsets[:-1], counts) + np.arange(m)
+        value = (rng.integers(0, self.key_cardinality[key]) + self.key_shift[key]) % len(self.value_vocab)
+        return MapColumn(offsets, DictColumn(key, self.key_vocab), DictColumn(value, self.value_vocab))
+
+    def _operation_vocab(self, endpoints: np.ndarray) -> Tuple[np.ndarray, int]:
+        """Endpoints expanded to `fan_out` concrete paths each; code = endpoint code * fan_out + i."""
+        cache_key = ("operation", id(endpoints))
+        if cache_key not in self._vocab_cache:
+            fan_out = max(1, -(-self.operations // len(endpoints)))
+            paths = [ep.replace("{id}", str(i)) if "{id}" in ep else f"{ep}/{i}"
+                     for ep in endpoints.tolist() for i in range(fan_out)]
+            self._vocab_cache[cache_key] = (endpoints, vocabulary(paths), fan_out)
+        return self._vocab_cache[cache_key][1:]
+
+    def _pod_vocab(self, services: np.ndarray) -> Tuple[np.ndarray, int]:
+        """Pods grouped by service; code = service code * per_service + i."""
+        cache_key = ("pod", id(services))
+        if cache_key not in self._vocab_cache:
+            per_service = max(1, self.pods // len(services))
+            pods = [f"{name}-{self._pod_suffix[(s * per_service + i) % len(self._pod_suffix)]}-{i}"
+                    for s, name in enumerate(services.tolist()) for i in range(per_service)]
+            self._vocab_cache[cache_key] = (services, vocabulary(pods), per_service)
+        return self._vocab_cache[cache_key][1:]
+
+    def apply(self, batch: Dict[str, object], rng: np.random.Generator) -> Dict[str, object]:
+        """Rewrite the profiled columns of a span or log batch in place; returns the batch."""
+        n = len(batch["team_id"])
+        batch["attributes"] = self.attributes(rng, n)
+        if self.operations and "operation_name" in batch:
+            operation = batch["operation_name"]
+            vocab, fan_out = self._operation_vocab(operation.vocab)
+            batch["operation_name"] = DictColumn(operation.codes * fan_out + rng.integers(0, fan_out, n), vocab)
+        if self.hosts:
+            batch["host"] = DictColumn(rng.integers(0, self.hosts, n), self.host_vocab)
+        if self.pods:
+            service = batch["service_name"]
+            vocab, per_service = self._pod_vocab(service.vocab)
+            batch["pod"] = DictColumn(service.codes * per_service + rng.integers(0, per_service, n), vocab)
+        return batch
+
+
+class ProfiledBatchGenerator:
+    """Wraps a span/log batch generator and applies a CardinalityProfile to every batch."""
+
+    def __init__(self, generator, profile: CardinalityProfile):
+        self.generator = generator
+        self.profile = profile
+
+    def __getattr__(self, name):
+        return getattr(self.generator, name)  # spans_per_trace, rng, ...
+
+    def generate(self, *args, **kwargs) -> Dict[str, object]:
+        return self.profile.apply(self.generator.generate(*args, **kwargs), self.generator.rng)
+
+
+def storage_report(client, tables: List[str] = ("spans", "logs"),
+                   columns: List[str] = ("attributes", "operation_name", "host", "pod")) -> List[StorageRow]:
+    """On-disk size of the profiled columns (whole tables, not just this run) from system.columns."""
+    result = client.query(
+        "SELECT table, name, type, data_compressed_bytes, data_uncompressed_bytes FROM system.columns "
+        "WHERE database = currentDatabase() AND table IN %(tables)s AND name IN %(columns)s "
+        "ORDER BY table, name", parameters={"tables": list(tables), "columns": list(columns)})
+    return [tuple(row) for row in result.result_rows]
@@ -0,0 +1,98 @@
+"""
+Checkpoint file for resumable generation runs (--checkpoint / --resume).
+
+The file is JSON lines. The first line describes the run: the plan (hours,
+unit size, teams, engine, topology) plus the fixed "now", the seed entropy every
+unit is generated from and the per-table (hour_offset, hours) windows left after
+the TTL check. Each following line records one completed work unit
+(table, team_id, hour_offset, hours) and is flushed and fsynced as soon as the
+unit's inserts are done.
+
+On --resume the plan must match; completed units are skipped and the rest are
+regenerated from the same now/seed and windows. The windows are not re-planned:
+the TTL horizon moves with the wall clock, and a clamped window would change
+the work units and with them the seed each unit is spawned. A unit that was cut off half way is
+simply run again: its batches get the same insert_deduplication_tokens, so
+the blocks that already landed are dropped by ClickHouse instead of doubled.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+Unit = Tuple[str, str, int, int]  # (table, team_id, hour_offset, hours)
+Windows = Dict[str, List[Tuple[int, int]]]  # table -> [(hour_offset, hours)]
+
+
+class CheckpointError(Exception):
+    pass
+
+
+class Checkpoint:
+    """Append-only record of completed work units for one run plan."""
+
+    VERSION = 1
+
+    def __init__(self, path: str, plan: Dict, now: datetime, seed: int, windows: Optional[Windows] = None):
+        self.path = path
+        self.plan = plan
+        self.now = now
+        self.seed = seed
+        self.windows = windows
+        self.completed = set()
+        self._file = None
+
+    @classmethod
+    def start(cls, path: str, plan: Dict, now: datetime, seed: int, windows: Windows) -> "Checkpoint":
+        if os.path.exists(path):
+            raise CheckpointError(f"Checkpoint {path} already exists: pass --resume to continue it, "
+                                  f"or delete it to start over")
+        checkpoint = cls(path, plan, now, seed, windows)
+        checkpoint._file = open(path, "a")
+        checkpoint._append({"version": cls.VERSION, "plan": plan, "now": now.isoformat(), "seed": seed,
+                            "windows": windows})
+        return checkpoint
+
+    @classmethod
+    def resume(cls, path: str, plan: Dict) -> "Checkpoint":
+        if not os.path.exists(path):
+            raise CheckpointError(f"No checkpoint at {path} to resume")
+        with open(path, "rb") as f:
+            content = f.read()
+        if not content.endswith(b"\n"):
+            # Torn last line from a killed run: cut it off so the next record starts on a line of its own
+            content = content[:content.rfind(b"\n") + 1]
+            with open(path, "r+b") as f:
+                f.truncate(len(content))
+        lines = content.decode().splitlines()
+        header = json.loads(lines[0])
+        if header.get("plan") != plan:
+            raise CheckpointError(f"Checkpoint {path} was written for a different run: "
+                                  f"{header.get('plan')} (now: {plan})")
+        windows = header.get("windows")  # Absent in checkpoints written before windows were recorded
+        if windows is not None:
+            windows = {table: [tuple(chunk) for chunk in chunks] for table, chunks in windows.items()}
+        checkpoint = cls(path, plan, datetime.fromisoformat(header["now"]), header["seed"], windows)
+        for line in lines[1:]:
+            checkpoint.completed.add(tuple(json.loads(line)["unit"]))
+        checkpoint._file = open(path, "a")
+        return checkpoint
+
+    def done(self, unit: Unit) -> bool:
+        return tuple(unit) in self.completed
+
+    def record(self, unit: Unit, rows: Optional[int] = None):
+        """Durably mark a unit as completed."""
+        self.completed.add(tuple(unit))
+        self._append({"unit": list(unit), "rows": rows, "at": datetime.utcnow().isoformat()})
+
+    def _append(self, entry: Dict):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
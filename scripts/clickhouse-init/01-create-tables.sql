@@ -48,7 +48,8 @@ CREATE TABLE IF NOT EXISTS observex.spans (
 PARTITION BY (toYYYYMMDD(start_time), team_id)
 ORDER BY (team_id, trace_id, start_time, span_id)
 TTL start_time + INTERVAL 7 DAY
-SETTINGS index_granularity = 8192;
+SETTINGS index_granularity = 8192,
+         non_replicated_deduplication_window = 1000;  -- Honour insert_deduplication_token on retried inserts
 
 -- =============================================================================
 -- LOGS TABLE - Log entries with full-text search
@@ -77,7 +78,8 @@ CREATE TABLE IF NOT EXISTS observex.logs (
 PARTITION BY (toYYYYMMDD(timestamp), team_id)
 ORDER BY (team_id, timestamp, service_name)
 TTL timestamp + INTERVAL 14 DAY
-SETTINGS index_granularity = 8192;
+SETTINGS index_granularity = 8192,
+         non_replicated_deduplication_window = 1000;
 
 -- =============================================================================
 -- INCIDENTS TABLE - Alert incidents
@@ -107,5 +109,6 @@ CREATE TABLE IF NOT EXISTS observex.incidents (
 PARTITION BY (toYYYYMM(created_at), team_id)
 ORDER BY (team_id, created_at, incident_id)
 TTL created_at + INTERVAL 90 DAY
-SETTINGS index_granularity = 8192;
+SETTINGS index_granularity = 8192,
+         non_replicated_deduplication_window = 1000;
 
@@ -8,17 +8,64 @@ Metrics are derived from spans via materialized views.
 Uses REST API ingestion endpoints instead of direct ClickHouse insertion.
 
 Usage:
-    python clickhouse_data_generator.py --clear  # Clear and regenerate
-    python clickhouse_data_generator.py          # Generate new data
+    python clickhouse_data_generator.py --clear                 # Clear and regenerate
+    python clickhouse_data_generator.py                         # Generate new data
+    python clickhouse_data_generator.py --engine numpy          # Vectorized batch generation (Arrow inserts)
+    python clickhouse_data_generator.py --workers 32            # Shard (team, hour) units across processes
+    python clickhouse_data_generator.py --rate spans=50000,logs=200000 --duration 300  # Live paced load
+    python clickhouse_data_generator.py --checkpoint run.ckpt --resume  # Continue a killed run
+    python clickhouse_data_generator.py --partition-batching      # One insert block per (day, team) partition
+    python clickhouse_data_generator.py --engine numpy --topology 1500  # Synthetic 1,500-service call graph
+    python clickhouse_data_generator.py --metrics-file /var/lib/node_exporter/datagen.prom  # Export throughput
+    python clickhouse_data_generator.py --profile profiles/     # cProfile + tracemalloc per stage
+    python clickhouse_data_generator.py --max-memory 1G         # Shrink batches to stay under 1 GB RSS
+    python clickhouse_data_generator.py --engine numpy --message-corpus  # Zipfian messages (search_benchmark.py)
+    python clickhouse_data_generator.py --engine numpy --cardinality high  # 20-50 attributes, 20k operations
+    python clickhouse_data_generator.py --start 2024-05-01 --end 2024-05-15  # TTL-aware day-by-day backfill
+    python clickhouse_data_generator.py --detach-views --mv-report base.json  # Baseline without materialized views
+    python clickhouse_data_generator.py --mv-baseline base.json # Extra insert latency the views cost
+    python clickhouse_data_generator.py --engine numpy --sink file --output-dir out/  # JSONEachRow files, no server
+    python clickhouse_data_generator.py --engine numpy --table-sink spans=native,logs=null  # Sink per table
+    python clickhouse_data_generator.py --auth-token $TOKEN --engine numpy --api-gzip  # Compressed API bodies
+    python clickhouse_data_generator.py --engine numpy --sink otlp --otlp-format json  # OTLP files vs custom JSON
+    python clickhouse_data_generator.py --sink otlp --otlp-endpoint http://localhost:4318  # OTLP/HTTP collector
+    python clickhouse_data_generator.py --logs-per-span 2,payment-service=6  # Logs that join to their spans
 """
 
 import argparse
+import hashlib
+import os
 import random
+import time
 import uuid
-import requests
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List
-import clickhouse_connect
+from typing import Dict, List
+import numpy as np
+
+from api_encoder import body_headers, encode_bodies
+from backfill import TTLError, day_chunks, parse_when, plan_windows, read_ttls
+from checkpoint import Checkpoint, CheckpointError
+from loadgen import LoadStream, run_streams
+from memory import ATTRIBUTE_ENTRY_BYTES, CORPUS_ROW_BYTES, ENCODED_ROW_BYTES, ROW_BYTES, MemoryGuard, current_rss, format_size, parse_size
+from metrics import Metrics, MetricsReporter, format_bytes
+from mv_report import attach_views, materialized_views
+from mv_report import detach_views as detach_view_tables
+from otlp import FORMATS as OTLP_FORMATS
+from otlp import encode_otlp
+from partitioning import PartitionBuffer
+from pipeline import Pipeline
+from retry import RetryPolicy, classify_api_error, is_retryable_clickhouse_error
+from sinks import (
+    CLICKHOUSE_SINKS, SINKS, ApiSink, ClickHouseHTTPSink, ClickHouseNativeSink, FileSink, NullSink, OtlpSink,
+    json_each_row, parse_table_sinks
+)
+from trace_logs import ERROR_SPAN_ERROR_RATE, LogsPerSpan, TraceLogBatchGenerator, logger_name, parse_logs_per_span
+from columnar_engine import (
+    LogBatchGenerator, SpanBatchGenerator, arrow_available, columns_to_lists, columns_to_native_lists,
+    columns_to_rows, slice_batch, to_arrow_table
+)
 
 # Service definitions
 SERVICES = {
@@ -47,20 +94,191 @@ INFO_MESSAGES = [
     "Payment processed", "Cache hit", "Query executed",
 ]
 
+LOG_COLUMNS = [
+    "team_id", "timestamp", "level", "service_name", "logger",
+    "message", "trace_id", "span_id", "host", "pod",
+    "container", "thread", "exception", "attributes"
+]
+
+SPAN_COLUMNS = [
+    "team_id", "trace_id", "span_id", "parent_span_id", "is_root",
+    "operation_name", "service_name", "span_kind",
+    "start_time", "end_time", "duration_ms", "status", "status_message",
+    "http_method", "http_url", "http_status_code",
+    "host", "pod", "container", "attributes"
+]
+
+INCIDENT_COLUMNS = [
+    "team_id", "incident_id", "alert_policy_id", "title", "description",
+    "severity", "priority", "status", "source", "service_name",
+    "created_at", "updated_at", "resolved_at", "acknowledged_at",
+    "acknowledged_by", "attributes"
+]
+
+TABLE_COLUMNS = {"logs": LOG_COLUMNS, "spans": SPAN_COLUMNS}
+
+# Checkpoint entry for the incidents stage (generated once per run, not per unit)
+INCIDENTS_UNIT = ("incidents", "*", 0, 0)
+
+# Time column of each table's PARTITION BY (toYYYYMMDD(<column>), team_id)
+PARTITION_TIME_COLUMNS = {"logs": "timestamp", "spans": "start_time"}
+
+# --profile: methods profiled as stages, and hot paths reported from inside them
+PROFILE_STAGES = ["generate_spans", "generate_logs", "generate_incidents"]
+PROFILE_FOCUS = ["_generate_trace_spans", "_insert_spans", "_insert_logs", "_insert_trace_logs", "_encode_batch",
+                 "_insert_direct", "_post_api_batches", "encode_bodies", "encode_otlp", "generate", "uuid4", "insert",
+                 "insert_arrow"]
+
+# Rows per insert block for the columnar engine (ClickHouse prefers few large blocks)
+COLUMNAR_BATCH_SIZE = 100_000
+
+
+def epoch_seconds(naive_utc: datetime) -> float:
+    """Seconds since the epoch for a naive UTC datetime (as returned by datetime.utcnow())."""
+    return (naive_utc - datetime(1970, 1, 1)).total_seconds()
+
 
 class ClickHouseDataGenerator:
     """Generates observability data for ClickHouse (simplified 3-table schema)."""
 
     def __init__(self, host: str, port: int, database: str, user: str, password: str,
-                 api_url: str = "http://localhost:13000", auth_token: str = None):
-        self.client = clickhouse_connect.get_client(
-            host=host, port=port, database=database,
-            username=user, password=password
-        )
+                 api_url: str = "http://localhost:13000", auth_token: str = None,
+                 engine: str = "python", seed: int = None, use_arrow: bool = True,
+                 api_concurrency: int = 0, api_connections: int = None,
+                 pipeline: bool = False, queue_depth: int = 4, compression: str = None,
+                 batch_size: int = 5000, api_batch_size: int = 1000, topology: Dict = None,
+                 partition_batching: bool = False, partition_block_rows: int = 500_000, retries: int = 5,
+                 max_memory: int = None, message_corpus: Dict = None, cardinality: Dict = None,
+                 log_comment: str = None, sinks: Dict[str, str] = None, output_dir: str = "datagen-out",
+                 native_port: int = 9000, api_gzip: bool = False, otlp_format: str = "proto",
+                 otlp_endpoint: str = None, trace_logs: Dict = None):
+        # Constructor arguments, replayed by worker processes in parallel runs
+        self.worker_config = dict(host=host, port=port, database=database, user=user, password=password,
+                                      api_url=api_url, auth_token=auth_token, engine=engine, use_arrow=use_arrow,
+                                      api_concurrency=api_concurrency, api_connections=api_connections,
+                                      pipeline=pipeline, queue_depth=queue_depth, compression=compression,
+                                      batch_size=batch_size, api_batch_size=api_batch_size, topology=topology,
+                                      partition_batching=partition_batching,
+                                      partition_block_rows=partition_block_rows, retries=retries,
+                                      max_memory=max_memory, message_corpus=message_corpus,
+                                      cardinality=cardinality, log_comment=log_comment, sinks=sinks,
+                                      output_dir=output_dir, native_port=native_port, api_gzip=api_gzip,
+                                      otlp_format=otlp_format, otlp_endpoint=otlp_endpoint,
+                                      trace_logs=trace_logs)
+        self.seed = seed
         self.team_ids = []
         self.api_url = api_url
         self.auth_token = auth_token
-        self.use_api = auth_token is not None  # Use API if token provided, else direct insertion
+        # Write sink per table (sinks.py): by default the backend API if a token is given, else direct inserts
+        self.sink_names = {"spans": "api" if auth_token else "http", "logs": "api" if auth_token else "http",
+                           "incidents": "http"}  # The backend has no incidents ingestion endpoint
+        self.sink_names.update(sinks or {})
+        # numpy engine over HTTP: insert_arrow vs column lists (pyarrow is only imported when HTTP is a sink)
+        self.use_arrow = use_arrow and "http" in self.sink_names.values() and arrow_available()
+        # The HTTP client also runs the clear/TTL/parts/view queries; it connects on first use
+        self.clickhouse = ClickHouseHTTPSink(host, port, database, user, password, compression, self.use_arrow)
+        self.api = ApiSink(api_url, auth_token)  # Keep-alive requests session for the blocking API path
+        shared = {"http": self.clickhouse, "api": self.api}
+        self.sinks = {}
+        for table, name in self.sink_names.items():
+            if name not in shared:
+                shared[name] = (NullSink() if name == "null" else FileSink(output_dir) if name == "file" else
+                                OtlpSink(otlp_format, output_dir, otlp_endpoint, api_gzip) if name == "otlp" else
+                                ClickHouseNativeSink(host, native_port, database, user, password, compression))
+            self.sinks[table] = shared[name]
+        self.use_api = "api" in self.sink_names.values()
+        # Whether run() has ClickHouse tables to truncate, check TTLs of and report parts/views for
+        self.writes_clickhouse = any(name in CLICKHOUSE_SINKS for name in self.sink_names.values())
+        self.ingest_client = None
+        self.api_fallback = True  # Retry failed API batches with a direct insert (off in --rate mode)
+        # Backoff for transient sink errors; direct inserts carry dedup tokens so resending is safe
+        self.retry = RetryPolicy(attempts=retries)
+        self.token_scope = None
+        self.token_seq = 0
+        self.uncertain_batches = 0  # API batches whose outcome is unknown (never re-sent)
+        self.dropped_rows = {"spans": 0, "logs": 0}  # Their rows, left out of the "Inserted" counts
+        self.log_comment = log_comment  # Tags direct inserts in system.query_log (materialized view report)
+        # Rows/bytes per table and time per write path stage (see metrics.py)
+        self.metrics = Metrics()
+        self._handoff = time.perf_counter()  # When the generator last handed a batch on
+        if self.use_api and api_concurrency > 0:
+            from async_ingest import AsyncIngestClient  # aiohttp is only needed for this mode
+            self.ingest_client = AsyncIngestClient(api_url, auth_token,
+                                                   max_connections=api_connections or api_concurrency,
+                                                   max_in_flight=api_concurrency, retry=self.retry)
+        self.engine = engine  # "python" (row loop) or "numpy" (columnar batches)
+        self.rng = np.random.default_rng(seed)
+        self.now = None  # Fixed "now" for all stages (set by run/workers); None means wall clock
+        self.quiet = False  # Suppress per-stage output (used inside worker processes)
+        self.use_pipeline = pipeline  # Overlap generation, encoding and inserts via bounded queues
+        self.queue_depth = queue_depth
+        self.pipeline = None
+        self.batch_size = batch_size  # Rows per insert for the python engine
+        self.columnar_batch_size = COLUMNAR_BATCH_SIZE  # Rows per batch for the numpy engine
+        self.api_batch_size = api_batch_size  # Entries per /api/ingest request
+        self.api_gzip = api_gzip  # Content-Encoding: gzip request bodies (see api_encoder.py)
+        self.otlp_format = otlp_format  # otlp sink: protobuf or OTLP/JSON export requests (see otlp.py)
+        # One insert block per (day, team) partition instead of one per generated batch
+        self.partition_buffers = None
+        if partition_batching:
+            self.partition_buffers = {table: PartitionBuffer(TABLE_COLUMNS[table], PARTITION_TIME_COLUMNS[table],
+                                                             block_rows=partition_block_rows)
+                                      for table in TABLE_COLUMNS}
+        # Synthetic call graph (ServiceTopology.generate kwargs + calls_per_span) instead of the built-in SERVICES
+        self.topology = None
+        self.services = SERVICES
+        self.calls_per_span = 1.5
+        if topology:
+            from topology import ServiceTopology
+            topology = dict(topology)
+            self.calls_per_span = topology.pop("calls_per_span", self.calls_per_span)
+            self.topology = ServiceTopology.generate(**topology)
+            self.services = self.topology.services
+        # Zipfian message corpus (MessageCorpus kwargs) instead of the fixed INFO/ERROR messages
+        self.corpus = None
+        if message_corpus:
+            from message_corpus import MessageCorpus
+            self.corpus = MessageCorpus(**message_corpus)
+        # High-cardinality stress profile (CardinalityProfile.named kwargs) for attributes/operation/host/pod
+        self.cardinality = None
+        if cardinality:
+            from cardinality import CardinalityProfile
+            self.cardinality = CardinalityProfile.named(**cardinality)
+        # Logs emitted as children of every span batch (LogsPerSpan kwargs); standalone logs lose their trace ids
+        self.trace_logs = None
+        self.trace_log_count = 0  # Child logs of the current spans stage
+        if trace_logs:
+            self.trace_logs = LogsPerSpan(**trace_logs)
+        # --max-memory: batch sizes scaled down to fit the estimate, then again if RSS keeps growing
+        self.memory_guard = None
+        if max_memory:
+            max_buffered = next(iter(self.partition_buffers.values())).max_buffered_rows if partition_batching else 0
+            self._full_batch_sizes = (batch_size, COLUMNAR_BATCH_SIZE, api_batch_size, partition_block_rows,
+                                      max_buffered)
+            self.memory_guard = MemoryGuard(max_memory)
+            self._memory_warned = False
+            self._scale_batches(self.memory_guard.fit(self.memory_estimate))
+
+    @property
+    def client(self):
+        """clickhouse_connect client (HTTP), connected on first use."""
+        return self.clickhouse.client
+
+    @property
+    def http(self):
+        """requests session of the blocking API path, opened on first use."""
+        return self.api.session
+
+    def close_sinks(self):
+        for sink in {id(sink): sink for sink in self.sinks.values()}.values():
+            sink.close()
+
+    def _now(self) -> datetime:
+        return self.now or datetime.utcnow()
+
+    def _report(self, message: str):
+        if not self.quiet:
+            print(message)
 
     def clear_data(self):
         """Clear all data from ClickHouse tables."""
@@ -76,21 +294,39 @@ class ClickHouseDataGenerator:
         self.team_ids = team_ids
         print(f"  ✓ Using {len(team_ids)} team IDs")
 
-    def generate_logs(self, hours_back: int = 24, logs_per_hour: int = 500):
-        """Generate log entries."""
-        print(f"\n📝 Generating logs ({hours_back}h, {logs_per_hour} logs/hour)...")
-
-        now = datetime.utcnow()
-        batch_size = 5000
+    def generate_logs(self, hours_back: int = 24, logs_per_hour: int = 500, hour_offset: int = 0) -> int:
+        """Generate log entries for hours [hour_offset, hour_offset + hours_back) before now."""
+        self._report(f"\n📝 Generating logs ({hours_back}h, {logs_per_hour} logs/hour, {self.engine} engine)...")
+        started = time.perf_counter()
+        self._begin_stage("logs", hour_offset, hours_back)
+        dropped = dict(self.dropped_rows)
+
+        with self._pipelined():
+            if self.engine == "numpy":
+                total_inserted = self._generate_logs_columnar(hours_back, logs_per_hour, hour_offset)
+            else:
+                total_inserted = self._generate_logs_rows(hours_back, logs_per_hour, hour_offset)
+            self._flush_partitions("logs")
+        self.flush_api()
+        total_inserted -= self.dropped_rows["logs"] - dropped["logs"]
+
+        elapsed = time.perf_counter() - started
+        rate = total_inserted / elapsed if elapsed > 0 else 0
+        self._report(f"  ✓ Inserted {total_inserted:,} logs ({rate:,.0f} rows/s)" + self._dropped_note(dropped))
+        return total_inserted
+
+    def _generate_logs_rows(self, hours_back: int, logs_per_hour: int, hour_offset: int = 0) -> int:
+        """Generate log entries row by row."""
+        now = self._now()
         total_inserted = 0
 
         for team_id in self.team_ids:
             rows = []
-            for hour in range(hours_back):
+            for hour in range(hour_offset, hour_offset + hours_back):
                 for _ in range(logs_per_hour):
                     timestamp = now - timedelta(hours=hour, minutes=random.randint(0, 59),
                                                 seconds=random.randint(0, 59))
-                    service_name = random.choice(list(SERVICES.keys()))
+                    service_name = random.choice(list(self.services.keys()))
                     level = random.choices(LOG_LEVELS, weights=LOG_LEVEL_WEIGHTS)[0]
 
                     if level == "ERROR":
@@ -100,7 +336,8 @@ class ClickHouseDataGenerator:
                         message = random.choice(INFO_MESSAGES)
                         exception = ""
 
-                    trace_id = uuid.uuid4().hex[:32] if random.random() > 0.3 else ""
+                    # With --logs-per-span the span batches emit the traced logs (see trace_logs.py)
+                    trace_id = uuid.uuid4().hex[:32] if not self.trace_logs and random.random() > 0.3 else ""
                     span_id = uuid.uuid4().hex[:16] if trace_id else ""
 
                     rows.append([
@@ -111,7 +348,7 @@ class ClickHouseDataGenerator:
                         service_name, f"thread-{random.randint(1, 20)}", exception, {}
                     ])
 
-                    if len(rows) >= batch_size:
+                    if len(rows) >= self.batch_size:
                         self._insert_logs(rows)
                         total_inserted += len(rows)
                         rows = []
@@ -120,71 +357,326 @@ class ClickHouseDataGenerator:
                 self._insert_logs(rows)
                 total_inserted += len(rows)
 
-        print(f"  ✓ Inserted {total_inserted:,} logs")
+        return total_inserted
 
-    def _insert_logs(self, rows):
-        if self.use_api:
-            self._insert_logs_via_api(rows)
-        else:
-            self.client.insert("logs", rows, column_names=[
-                "team_id", "timestamp", "level", "service_name", "logger",
-                "message", "trace_id", "span_id", "host", "pod",
-                "container", "thread", "exception", "attributes"
-            ])
-
-    def _insert_logs_via_api(self, rows):
-        """Insert logs via REST API ingestion endpoint."""
-        logs_payload = []
-        for row in rows:
-            log_entry = {
-                "serviceName": row[3],
-                "level": row[2],
-                "message": row[5],
-                "logger": row[4],
-                "traceId": row[6] if row[6] else None,
-                "spanId": row[7] if row[7] else None,
-                "host": row[8],
-                "pod": row[9],
-                "container": row[10],
-                "thread": row[11],
-                "exception": row[12],
-                "attributes": row[13],
-                "timestamp": int(row[1].timestamp() * 1000)  # Convert to milliseconds
-            }
-            logs_payload.append(log_entry)
+    def _generate_logs_columnar(self, hours_back: int, logs_per_hour: int, hour_offset: int = 0) -> int:
+        """Generate log entries as NumPy column batches (same distributions as _generate_logs_rows)."""
+
+        generator = self._log_batch_generator(self.rng)
+        end_epoch = int(epoch_seconds(self._now()))
+        rows_per_team = hours_back * logs_per_hour
+        total_inserted = 0
 
-        # Send in batches of 1000
-        batch_size = 1000
-        for i in range(0, len(logs_payload), batch_size):
-            batch = logs_payload[i:i + batch_size]
+        for team_id in self.team_ids:
+            offset = 0
+            while offset < rows_per_team:  # Batch size is re-read: --max-memory may shrink it
+                stop = min(offset + self.columnar_batch_size, rows_per_team)
+                hour_index = hour_offset + np.arange(offset, stop) // logs_per_hour
+                batch = generator.generate(team_id, end_epoch, hour_index)
+                self._insert_logs(batch)
+                total_inserted += stop - offset
+                offset = stop
+
+        return total_inserted
+
+    def _insert_logs(self, batch):
+        self._emit("logs", batch)
+
+    # ==================== ENCODE / WRITE STAGES ====================
+    def _emit(self, table: str, batch):
+        """Send a generated batch (row list or column dict) on, via the partition buffer if enabled."""
+        self.metrics.add_seconds("generate", time.perf_counter() - self._handoff)
+        if self.partition_buffers:
+            with self.metrics.timer("partition"):
+                blocks = self.partition_buffers[table].add(batch)
+            for block in blocks:
+                self._dispatch(table, block)
+        else:
+            self._dispatch(table, batch)
+        if self.memory_guard:
+            self._check_memory()
+        self._handoff = time.perf_counter()
+
+    # ==================== MEMORY CEILING ====================
+    def memory_estimate(self, scale: float = 1.0) -> int:
+        """Estimated peak RSS with batch sizes scaled by `scale` (cost model in memory.py)."""
+        python_rows, columnar_rows, _, block_rows, max_buffered = self._full_batch_sizes
+        batch_rows = block_rows if self.partition_buffers else (
+            columnar_rows if self.engine == "numpy" else python_rows)
+        if self.trace_logs and not self.partition_buffers:  # Child logs: up to peak() times a span batch
+            batch_rows *= max(1.0, self.trace_logs.peak())
+        encoded_bytes = max(ENCODED_ROW_BYTES[self._encoding(table)] for table in TABLE_COLUMNS)
+        row_bytes = ROW_BYTES[self.engine] + (CORPUS_ROW_BYTES if self.corpus else 0)
+        if self.cardinality:
+            row_bytes += self.cardinality.mean_keys * ATTRIBUTE_ENTRY_BYTES
+        in_flight = 2 * self.queue_depth + 3 if self.use_pipeline else 2
+        estimate = current_rss() + in_flight * batch_rows * scale * (row_bytes + encoded_bytes)
+        if self.partition_buffers:
+            estimate += max_buffered * scale * row_bytes
+        return int(estimate)
+
+    def _scale_batches(self, scale: float):
+        """Apply a --max-memory scale to every batch size (never below 100 rows)."""
+        python_rows, columnar_rows, api_rows, block_rows, max_buffered = self._full_batch_sizes
+        self.batch_size = max(100, int(python_rows * scale))
+        self.columnar_batch_size = max(100, int(columnar_rows * scale))
+        self.api_batch_size = max(100, int(api_rows * scale))
+        for buffer in (self.partition_buffers or {}).values():
+            buffer.block_rows = max(100, int(block_rows * scale))
+            buffer.max_buffered_rows = max(buffer.block_rows, int(max_buffered * scale))
+
+    def _check_memory(self):
+        rss = self.memory_guard.check()
+        if rss is not None:
+            self._scale_batches(self.memory_guard.scale)
+            print(f"  ⚠ RSS {format_size(rss)} near --max-memory {format_size(self.memory_guard.limit)}: "
+                  f"batches shrunk to {self.memory_guard.scale:.0%} ({self.batch_size:,} rows python, "
+                  f"{self.columnar_batch_size:,} rows numpy)")
+        elif self.memory_guard.exhausted and not self._memory_warned:
+            self._memory_warned = True
+            print(f"  ⚠ RSS still growing near --max-memory {format_size(self.memory_guard.limit)} "
+                  f"at the smallest batch size")
+
+    def _flush_partitions(self, table: str):
+        """Send every partially filled partition block of a table (end of a generation stage)."""
+        if self.partition_buffers:
+            for block in self.partition_buffers[table].drain():
+                self._dispatch(table, block)
+
+    def _begin_stage(self, table: str, hour_offset: int, hours_back: int):
+        """Start the dedup token sequence of one generation stage (same run, unit and order -> same tokens)."""
+        self.token_scope = (f"{self.seed}:{self._now().isoformat()}:{table}:{','.join(self.team_ids)}:"
+                            f"{hour_offset}:{hours_back}")
+        self.token_seq = 0
+        self._handoff = time.perf_counter()
+
+    def _next_token(self) -> str:
+        """Deterministic insert_deduplication_token for the next batch of the current stage."""
+        if self.token_scope is None:
+            return uuid.uuid4().hex  # Ad-hoc writes (live load): still stable across retries
+        self.token_seq += 1
+        return hashlib.sha1(f"{self.token_scope}:{self.token_seq}".encode()).hexdigest()
+
+    def _dispatch(self, table: str, batch):
+        """Send a batch through the pipeline, or encode and write it inline."""
+        token = self._next_token()  # Assigned in generation order, before batches go to other threads
+        if self.pipeline:
+            with self.metrics.timer("backpressure"):
+                self.pipeline.put((table, batch, token))
+        else:
+            self._write_batch(table, self._encode_batch(table, batch), token)
+
+    def _encoding(self, table: str) -> str:
+        """Payload kind the encode stage builds for a table's sink (python engine batches stay rows)."""
+        encoding = self.sinks[table].encoding
+        if self.engine == "python" and encoding in ("arrow", "columns"):
+            return "rows"
+        return encoding
+
+    def _encode_batch(self, table: str, batch) -> tuple:
+        """Encode stage: turn a generated batch into the payload its sink sends."""
+        columnar = isinstance(batch, dict)
+        encoding = self.sinks[table].encoding
+        if encoding == "otlp":
+            return self._encode_otlp(table, batch)
+        with self.metrics.timer("encode"):
+            if encoding == "none":  # null sink: only the row count is kept
+                return "none", len(next(iter(batch.values()))) if columnar else len(batch)
+            if encoding == "api":  # Request bodies straight from the batch; rows only if a chunk falls back
+                return "api", batch, encode_bodies(table, batch, TABLE_COLUMNS[table], self.api_batch_size,
+                                                   self.api_gzip), self.api_batch_size
+            if encoding == "json":
+                rows = columns_to_rows(batch, TABLE_COLUMNS[table]) if columnar else batch
+                return "json", json_each_row(rows, TABLE_COLUMNS[table]), len(rows)
+            if not columnar:
+                return "rows", batch
+            if encoding == "arrow":
+                return "arrow", to_arrow_table(batch, TABLE_COLUMNS[table])
+            if encoding == "native":
+                return "native", columns_to_native_lists(batch, TABLE_COLUMNS[table])
+            return "columns", columns_to_lists(batch, TABLE_COLUMNS[table])
+
+    def _encode_otlp(self, table: str, batch) -> tuple:
+        """OTLP export requests of a batch; the custom JSON bodies of the same rows are timed next to them."""
+        rows = len(next(iter(batch.values()))) if isinstance(batch, dict) else len(batch)
+        start = time.perf_counter()
+        with self.metrics.timer("encode"):
+            requests = encode_otlp(table, batch, TABLE_COLUMNS[table], self.otlp_format, self.api_batch_size)
+        encoded = time.perf_counter()
+        # Comparison only (report_otlp): outside the encode stage, never sent
+        bodies = encode_bodies(table, batch, TABLE_COLUMNS[table], self.api_batch_size)
+        done = time.perf_counter()
+        self.metrics.count(f"otlp_{table}_rows", rows)
+        self.metrics.count(f"otlp_{table}_bytes", sum(len(body) for body, _ in requests))
+        self.metrics.count(f"otlp_{table}_encode_us", round((encoded - start) * 1e6))
+        self.metrics.count(f"custom_json_{table}_bytes", sum(map(len, bodies)))
+        self.metrics.count(f"custom_json_{table}_encode_us", round((done - encoded) * 1e6))
+        return "otlp", requests, rows
+
+    def _write_batch(self, table: str, encoded: tuple, token: str = None):
+        """Write stage: send an encoded batch to its table's sink."""
+        token = token or uuid.uuid4().hex
+        if encoded[0] == "api":
+            self._post_api_batches(table, encoded[1], encoded[2], encoded[3], token)
+        else:
+            self._insert_direct(table, encoded, token)
+
+    def _insert_direct(self, table: str, encoded: tuple, token: str, column_names: List[str] = None, sink=None):
+        """Write an encoded batch to the table's sink, retrying transient errors under one dedup token."""
+        kind, data = encoded[0], encoded[1]
+        sink = sink or self.sinks[table]
+        column_names = column_names or (INCIDENT_COLUMNS if table == "incidents" else TABLE_COLUMNS[table])
+        if kind == "rows" and sink.encoding == "json":  # Incidents and API fallbacks are built as rows
+            kind, data = "json", json_each_row(data, column_names)
+            encoded = (kind, data, len(encoded[1]))
+        settings = {"insert_deduplication_token": token}
+        if self.log_comment:
+            settings["log_comment"] = self.log_comment
+
+        if sink.name == "otlp":  # Collector responses are HTTP statuses, like the backend API's
+            retryable, label = (lambda e: classify_api_error(e) == "retry"), f"{table} OTLP export"
+        else:
+            retryable, label = is_retryable_clickhouse_error, f"{table} insert"
+        with self.metrics.timer("write"):
+            nbytes = self.retry.run(lambda: sink.insert(table, encoded, column_names, settings), retryable, label=label)
+        if kind in ("none", "json", "otlp"):
+            rows = encoded[-1]
+        else:
+            rows = data.num_rows if kind == "arrow" else len(data[0]) if kind in ("columns", "native") else len(data)
+        self.metrics.add_rows(table, rows, nbytes)
+
+    @contextmanager
+    def _pipelined(self):
+        """Run generate -> encode -> write as overlapping stages for the duration of the block."""
+        if not self.use_pipeline or self.pipeline:
+            yield
+            return
+        self.pipeline = Pipeline(encode=lambda item: (item[0], self._encode_batch(item[0], item[1]), item[2]),
+                                 write=lambda item: self._write_batch(*item),
+                                 queue_size=self.queue_depth)
+        try:
+            yield
+        except BaseException:
+            pipeline, self.pipeline = self.pipeline, None
+            pipeline.abort()  # Generation failed: drop the queued batches and keep its exception
+            raise
+        pipeline, self.pipeline = self.pipeline, None
+        pipeline.close()
+
+    def _post_api_batches(self, table: str, batch, bodies: List[bytes], chunk_rows: int, token: str):
+        """POST encoded bodies (chunk_rows rows each) to /api/ingest/<table>, retrying and falling back on failure."""
+        total = len(next(iter(batch.values()))) if isinstance(batch, dict) else len(batch)
+        for i, body in enumerate(bodies):
+            start, stop = i * chunk_rows, min((i + 1) * chunk_rows, total)
+            chunk_token = f"{token}-{i}"
+            headers = {**body_headers(self.api_gzip), "Idempotency-Key": chunk_token}
+            if self.ingest_client:
+                with self.metrics.timer("write"):  # Blocks only while max_in_flight requests are pending
+                    self.ingest_client.submit(f"/api/ingest/{table}", body, rows=stop - start, headers=headers,
+                                              context=(table, batch, start, stop, chunk_token))
+                continue
             try:
-                response = requests.post(
-                    f"{self.api_url}/api/ingest/logs",
-                    json=batch,
-                    headers={"Authorization": f"Bearer {self.auth_token}"},
-                    timeout=30
-                )
-                response.raise_for_status()
+                with self.metrics.timer("write"):
+                    nbytes = self.retry.run(lambda: self._post_api(table, body, headers),
+                                            lambda e: classify_api_error(e) == "retry", label=f"/api/ingest/{table}")
+                self.metrics.add_rows(table, stop - start, nbytes)
             except Exception as e:
-                print(f"  ⚠ API ingestion failed, falling back to direct insertion: {e}")
-                # Fallback to direct insertion
-                self.client.insert("logs", rows[i:i + batch_size], column_names=[
-                    "team_id", "timestamp", "level", "service_name", "logger",
-                    "message", "trace_id", "span_id", "host", "pod",
-                    "container", "thread", "exception", "attributes"
-                ])
-
-    def generate_spans(self, hours_back: int = 24, traces_per_hour: int = 100):
-        """Generate spans (unified traces + spans table)."""
-        print(f"\n🔗 Generating spans ({hours_back}h, {traces_per_hour} traces/hour)...")
-
-        now = datetime.utcnow()
+                self._api_batch_failed(table, batch, start, stop, chunk_token, e)
+        self._fallback_failed_api_batches()
+
+    def _post_api(self, table: str, body: bytes, headers: Dict[str, str]) -> int:
+        """POST one encoded chunk; returns the request body size in bytes (on the wire)."""
+        return self.api.post(table, body, headers)
+
+    def metrics_snapshot(self) -> Dict:
+        """Metrics counters plus retries, async API rows and the current queue depths."""
+        snapshot = self.metrics.snapshot()
+        retries = self.retry.retries
+        pipeline = self.pipeline
+        if pipeline:
+            snapshot["gauges"].update(pipeline.depths())
+        if self.ingest_client:
+            stats = self.ingest_client.stats
+            retries += stats.retries
+            for path, rows in list(stats.rows_by_path.items()):
+                table = path.rsplit("/", 1)[-1]
+                snapshot["rows"][table] = snapshot["rows"].get(table, 0) + rows
+            snapshot["gauges"]["api_in_flight"] = self.ingest_client.in_flight()
+        snapshot["counters"]["retries"] = snapshot["counters"].get("retries", 0) + retries
+        return snapshot
+
+    def _api_batch_failed(self, table: str, batch, start: int, stop: int, token: str, error: Exception):
+        """Fall back to a direct insert of rows [start, stop), unless the backend may already have written them."""
+        if not self.api_fallback:
+            raise error
+        kind = classify_api_error(error)
+        error = str(error) or type(error).__name__  # asyncio timeouts have no message
+        if kind == "ambiguous":
+            self.uncertain_batches += 1
+            self.dropped_rows[table] += stop - start
+            print(f"  ⚠ API ingestion outcome unknown, not re-inserting {stop - start:,} {table} rows: {error}")
+            return
+        print(f"  ⚠ API ingestion failed, falling back to direct insertion: {error}")
+        if isinstance(batch, dict):
+            rows = columns_to_rows(slice_batch(batch, start, stop), TABLE_COLUMNS[table])
+        else:
+            rows = batch[start:stop]
+        self._insert_direct(table, ("rows", rows), token, sink=self.clickhouse)
+
+    def _fallback_failed_api_batches(self):
+        """Handle batches the async client reported as failed (after its retries)."""
+        if not self.ingest_client:
+            return
+        for (table, batch, start, stop, token), error in self.ingest_client.take_failures():
+            self._api_batch_failed(table, batch, start, stop, token, error)
+
+    def flush_api(self):
+        """Wait for in-flight async API requests and handle their failures."""
+        if self.ingest_client:
+            self.ingest_client.flush()
+            self._fallback_failed_api_batches()
+
+    def _dropped_note(self, before: Dict[str, int]) -> str:
+        """Summary suffix for rows of uncertain API batches dropped since `before` (a dropped_rows copy)."""
+        dropped = sum(self.dropped_rows.values()) - sum(before.values())
+        return f", {dropped:,} rows with an unknown API outcome not counted" if dropped else ""
+
+    def generate_spans(self, hours_back: int = 24, traces_per_hour: int = 100, hour_offset: int = 0) -> int:
+        """Generate spans (unified traces + spans table) for hours [hour_offset, hour_offset + hours_back)."""
+        self._report(f"\n🔗 Generating spans ({hours_back}h, {traces_per_hour} traces/hour, {self.engine} engine)...")
+        started = time.perf_counter()
+        self._begin_stage("spans", hour_offset, hours_back)
+        self.trace_log_count = 0
+        dropped = dict(self.dropped_rows)
+
+        with self._pipelined():
+            if self.engine == "numpy":
+                total_traces, total_spans = self._generate_spans_columnar(hours_back, traces_per_hour, hour_offset)
+            else:
+                total_traces, total_spans = self._generate_spans_rows(hours_back, traces_per_hour, hour_offset)
+            self._flush_partitions("spans")
+            if self.trace_logs:
+                self._flush_partitions("logs")
+        self.flush_api()  # Async API failures: fall back now, or drop (and stop counting) uncertain batches
+        total_spans -= self.dropped_rows["spans"] - dropped["spans"]
+        self.trace_log_count -= self.dropped_rows["logs"] - dropped["logs"]
+
+        elapsed = time.perf_counter() - started
+        rate = total_spans / elapsed if elapsed > 0 else 0
+        trace_logs = f", {self.trace_log_count:,} trace logs" if self.trace_logs else ""
+        self._report(f"  ✓ Inserted {total_traces:,} traces, {total_spans:,} spans{trace_logs} ({rate:,.0f} spans/s)"
+                     + self._dropped_note(dropped))
+        return total_spans
+
+    def _generate_spans_rows(self, hours_back: int, traces_per_hour: int, hour_offset: int = 0) -> tuple:
+        """Generate spans trace by trace; returns (traces, spans)."""
+        now = self._now()
         span_batch = []
         total_traces = 0
         total_spans = 0
 
         for team_id in self.team_ids:
-            for hour in range(hours_back):
+            for hour in range(hour_offset, hour_offset + hours_back):
                 for _ in range(traces_per_hour):
                     trace_id = uuid.uuid4().hex[:32]
                     start_time = now - timedelta(hours=hour, minutes=random.randint(0, 59))
@@ -209,15 +701,75 @@ class ClickHouseDataGenerator:
                     total_traces += 1
                     total_spans += len(spans)
 
-                    if len(span_batch) >= 5000:
+                    if len(span_batch) >= self.batch_size:
                         self._insert_spans(span_batch)
+                        if self.trace_logs:
+                            self._insert_trace_logs(self._trace_log_rows(span_batch))
                         span_batch = []
 
             if span_batch:
                 self._insert_spans(span_batch)
+                if self.trace_logs:
+                    self._insert_trace_logs(self._trace_log_rows(span_batch))
                 span_batch = []
 
-        print(f"  ✓ Inserted {total_traces:,} traces, {total_spans:,} spans")
+        return total_traces, total_spans
+
+    def _generate_spans_columnar(self, hours_back: int, traces_per_hour: int, hour_offset: int = 0) -> tuple:
+        """Generate spans as NumPy column batches (same trace shape as _generate_trace_spans)."""
+        generator = self._span_batch_generator(self.rng)
+        trace_logs = self._trace_log_batch_generator(self.rng) if self.trace_logs else None
+        end_ms = int(epoch_seconds(self._now()) * 1000)
+        traces_per_team = hours_back * traces_per_hour
+        total_traces = 0
+        total_spans = 0
+
+        for team_id in self.team_ids:
+            offset = 0
+            while offset < traces_per_team:  # Batch size is re-read: --max-memory may shrink it
+                traces_per_batch = max(1, self.columnar_batch_size // generator.spans_per_trace)
+                stop = min(offset + traces_per_batch, traces_per_team)
+                hour_index = hour_offset + np.arange(offset, stop) // traces_per_hour
+                batch = generator.generate(team_id, end_ms, hour_index)
+                self._insert_spans(batch)
+                if trace_logs:
+                    self._insert_trace_logs(trace_logs.generate(batch))
+                total_traces += stop - offset
+                total_spans += len(batch["span_id"])
+                offset = stop
+
+        return total_traces, total_spans
+
+    def _span_batch_generator(self, rng: np.random.Generator):
+        """Columnar span generator over the built-in SERVICES or the synthetic topology."""
+        if self.topology:
+            from topology import TopologySpanBatchGenerator
+            generator = TopologySpanBatchGenerator(self.topology, HTTP_METHODS, HTTP_STATUS_CODES,
+                                                   HTTP_STATUS_WEIGHTS, rng, calls_per_span=self.calls_per_span)
+        else:
+            generator = SpanBatchGenerator(SERVICES, "api-gateway", HTTP_METHODS,
+                                           HTTP_STATUS_CODES, HTTP_STATUS_WEIGHTS, rng)
+        return self._profiled(generator)
+
+    def _log_batch_generator(self, rng: np.random.Generator, profiled: bool = True) -> LogBatchGenerator:
+        """Columnar log generator; with a topology, log volume per service follows its popularity."""
+        generator = LogBatchGenerator(
+            self.services, LOG_LEVELS, LOG_LEVEL_WEIGHTS, INFO_MESSAGES, ERROR_MESSAGES, rng,
+            service_weights=self.topology.popularity if self.topology else None, corpus=self.corpus,
+            trace_probability=0 if self.trace_logs else LogBatchGenerator.TRACE_PROBABILITY)
+        return self._profiled(generator) if profiled else generator
+
+    def _trace_log_batch_generator(self, rng: np.random.Generator):
+        """Child logs of span column batches (--logs-per-span)."""
+        return TraceLogBatchGenerator(self._log_batch_generator(rng, profiled=False), self.trace_logs,
+                                      cardinality=self.cardinality)
+
+    def _profiled(self, generator):
+        """Apply the --cardinality profile to every batch of a columnar generator."""
+        if not self.cardinality:
+            return generator
+        from cardinality import ProfiledBatchGenerator
+        return ProfiledBatchGenerator(generator, self.cardinality)
 
     def _generate_trace_spans(self, team_id, trace_id, start_time):
         """Generate realistic span hierarchy for a trace."""
@@ -272,74 +824,49 @@ class ClickHouseDataGenerator:
 
         return spans
 
-    def _insert_spans(self, rows):
-        if self.use_api:
-            self._insert_spans_via_api(rows)
-        else:
-            self.client.insert("spans", rows, column_names=[
-                "team_id", "trace_id", "span_id", "parent_span_id", "is_root",
-                "operation_name", "service_name", "span_kind",
-                "start_time", "end_time", "duration_ms", "status", "status_message",
-                "http_method", "http_url", "http_status_code",
-                "host", "pod", "container", "attributes"
-            ])
-
-    def _insert_spans_via_api(self, rows):
-        """Insert spans via REST API ingestion endpoint."""
-        spans_payload = []
-        for row in rows:
-            span_entry = {
-                "traceId": row[1],
-                "spanId": row[2],
-                "parentSpanId": row[3] if row[3] else None,
-                "isRoot": bool(row[4]),
-                "operationName": row[5],
-                "serviceName": row[6],
-                "spanKind": row[7],
-                "startTime": row[8].isoformat() + "Z",
-                "endTime": row[9].isoformat() + "Z",
-                "durationMs": row[10],
-                "status": row[11],
-                "statusMessage": row[12] if row[12] else None,
-                "httpMethod": row[13] if row[13] else None,
-                "httpUrl": row[14] if row[14] else None,
-                "httpStatusCode": row[15] if row[15] else None,
-                "host": row[16],
-                "pod": row[17],
-                "container": row[18],
-                "attributes": row[19]
-            }
-            spans_payload.append(span_entry)
+    def _insert_spans(self, batch):
+        self._emit("spans", batch)
 
-        # Send in batches of 1000
-        batch_size = 1000
-        for i in range(0, len(spans_payload), batch_size):
-            batch = spans_payload[i:i + batch_size]
-            try:
-                response = requests.post(
-                    f"{self.api_url}/api/ingest/spans",
-                    json=batch,
-                    headers={"Authorization": f"Bearer {self.auth_token}"},
-                    timeout=30
-                )
-                response.raise_for_status()
-            except Exception as e:
-                print(f"  ⚠ API ingestion failed, falling back to direct insertion: {e}")
-                # Fallback to direct insertion
-                self.client.insert("spans", rows[i:i + batch_size], column_names=[
-                    "team_id", "trace_id", "span_id", "parent_span_id", "is_root",
-                    "operation_name", "service_name", "span_kind",
-                    "start_time", "end_time", "duration_ms", "status", "status_message",
-                    "http_method", "http_url", "http_status_code",
-                    "host", "pod", "container", "attributes"
+    def _trace_log_rows(self, span_rows: List[list]) -> List[list]:
+        """Child log rows of span rows (row engine twin of TraceLogBatchGenerator.generate)."""
+        counts = self.rng.poisson([self.trace_logs.mean(span[6]) for span in span_rows])
+        rows = []
+        for span, count in zip(span_rows, counts.tolist()):
+            team_id, trace_id, span_id, service_name = span[0], span[1], span[2], span[6]
+            start_time, duration_ms, status, host, pod = span[8], span[10], span[11], span[16], span[17]
+            for _ in range(count):
+                if status == "ERROR" and random.random() < ERROR_SPAN_ERROR_RATE:
+                    level = "ERROR"
+                else:
+                    level = random.choices(LOG_LEVELS, weights=LOG_LEVEL_WEIGHTS)[0]
+                if level == "ERROR":
+                    message = random.choice(ERROR_MESSAGES)
+                    exception = (f"java.lang.RuntimeException: {message}\n"
+                                 f"\tat com.example.Service.method(Service.java:42)")
+                else:
+                    message = random.choice(INFO_MESSAGES)
+                    exception = ""
+                timestamp = start_time + timedelta(milliseconds=random.randint(0, duration_ms))
+                rows.append([
+                    team_id, timestamp, level, service_name, logger_name(service_name), message, trace_id, span_id,
+                    host, pod, service_name, f"thread-{random.randint(1, 20)}", exception, {}
                 ])
+        return rows
 
-    def generate_incidents(self, days_back: int = 30, incidents_per_day: int = 5):
-        """Generate alert incidents."""
+    def _insert_trace_logs(self, batch):
+        """Send the child logs of a span batch (--logs-per-span) with the spans stage."""
+        rows = len(batch["team_id"]) if isinstance(batch, dict) else len(batch)
+        if rows:
+            self.trace_log_count += rows
+            self._emit("logs", batch)
+
+    def generate_incidents(self, days_back: int = 30, incidents_per_day: int = 5) -> int:
+        """Generate alert incidents, inserted in batch_size blocks as they are built."""
         print(f"\n🚨 Generating incidents ({days_back} days, {incidents_per_day}/day)...")
 
-        now = datetime.utcnow()
+        now = self._now()
         rows = []
+        total_inserted = 0
 
         severities = ["CRITICAL", "HIGH", "MEDIUM", "LOW"]
         statuses = ["OPEN", "ACKNOWLEDGED", "RESOLVED"]
@@ -350,7 +877,7 @@ class ClickHouseDataGenerator:
                     created_at = now - timedelta(days=day, hours=random.randint(0, 23))
                     status = random.choice(statuses)
                     severity = random.choice(severities)
-                    service_name = random.choice(list(SERVICES.keys()))
+                    service_name = random.choice(list(self.services.keys()))
 
                     resolved_at = None
                     acknowledged_at = None
@@ -372,34 +899,468 @@ class ClickHouseDataGenerator:
                         acknowledged_at, acknowledged_by, {}
                     ])
 
-        if rows:
-            self.client.insert("incidents", rows, column_names=[
-                "team_id", "incident_id", "alert_policy_id", "title", "description",
-                "severity", "priority", "status", "source", "service_name",
-                "created_at", "updated_at", "resolved_at", "acknowledged_at",
-                "acknowledged_by", "attributes"
-            ])
-
-        print(f"  ✓ Inserted {len(rows):,} incidents")
+                    if len(rows) >= self.batch_size:
+                        total_inserted += self._insert_incidents(rows)
+                        rows = []
 
-    def run(self, clear: bool = False, hours_back: int = 24):
-        """Run the data generation for 3 tables: spans, logs, incidents."""
+        if rows:
+            total_inserted += self._insert_incidents(rows)
+
+        print(f"  ✓ Inserted {total_inserted:,} incidents")
+        return total_inserted
+
+    def _insert_incidents(self, rows: List[list]) -> int:
+        self._insert_direct("incidents", ("rows", rows), uuid.uuid4().hex, column_names=INCIDENT_COLUMNS)
+        if self.memory_guard:
+            self._check_memory()
+        return len(rows)
+
+    def run(self, clear: bool = False, hours_back: int = 24, workers: int = 1, unit_hours: int = 1,
+            checkpoint_path: str = None, resume: bool = False, metrics_interval: float = 10.0,
+            metrics_path: str = None, incidents_per_day: int = 5, start: datetime = None, end: datetime = None,
+            ttl_policy: str = "clamp", ttl_margin_hours: float = 6, detach_views: bool = False,
+            mv_report_path: str = None, mv_baseline_path: str = None):
+        """
+        Run the data generation for 3 tables: spans, logs, incidents.
+
+        Spans/logs cover the hours_back hours before now, or with start/end the backfill
+        window [start, end) day by day. Either way each table's window is checked against
+        its TTL under ttl_policy (see backfill.py).
+        With checkpoint_path, spans/logs run as (table, team, hour chunk) units that are
+        recorded as they complete; resume=True skips the units a previous run finished.
+        Afterwards the parts/rows/bytes and time the materialized views added to the
+        inserts are reported (see mv_report.py); detach_views runs the load without them.
+        Throughput and stage timings are printed every metrics_interval seconds (0: only
+        at the end) and written to metrics_path (.prom textfile, else JSON lines).
+        """
         print("\n" + "="*60)
         print("🚀 ClickHouse Data Generator (Simplified Schema)")
         print("   Tables: spans, logs, incidents")
+        print("   Sinks: " + ", ".join(f"{table}→{name}" for table, name in self.sink_names.items()))
         print("="*60)
 
-        if clear:
+        if clear and self.writes_clickhouse:
             self.clear_data()
 
-        self.generate_spans(hours_back=hours_back)
-        self.generate_logs(hours_back=hours_back)
-        self.generate_incidents()
+        if self.topology:
+            print(f"\n🕸️  Topology: {self.topology.describe()}")
+        if self.cardinality:
+            print(f"\n🏷️  Cardinality: {self.cardinality.describe()}")
+        if self.trace_logs:
+            print(f"\n🧵 Trace-correlated logs: {self.trace_logs.describe()}; standalone logs carry no trace ids")
+        if self.memory_guard:
+            print(f"\n🧮 --max-memory {format_size(self.memory_guard.limit)}: estimated peak "
+                  f"{format_size(self.memory_estimate(self.memory_guard.scale))} with batches at "
+                  f"{self.memory_guard.scale:.0%} ({self.batch_size:,} rows python, "
+                  f"{self.columnar_batch_size:,} rows numpy)")
+
+        parts_before = self.part_snapshot() if self.writes_clickhouse else None
+        self.now = end or datetime.utcnow()
+        if start:
+            hours_back = int((end - start).total_seconds() // 3600)
+        # A resumed checkpoint fixes "now" before the windows are planned; a new one is only
+        # written once the plan passed the TTL check
+        checkpoint = None
+        if checkpoint_path and resume:
+            checkpoint = self._open_checkpoint(checkpoint_path, resume, hours_back, unit_hours, start)
+        if checkpoint and checkpoint.windows is not None:
+            # Re-planning against today's TTL horizon could clamp the windows and reshuffle the unit seeds
+            windows = checkpoint.windows
+            print("  ℹ️  Time windows from the checkpoint: "
+                  + ", ".join(f"{table} {sum(h for _, h in chunks):,}h" for table, chunks in windows.items()))
+        else:
+            windows = self.plan_windows(start or self.now - timedelta(hours=hours_back), ttl_policy,
+                                        timedelta(hours=ttl_margin_hours), by_day=start is not None)
+        if checkpoint_path and not resume:
+            checkpoint = self._open_checkpoint(checkpoint_path, resume, hours_back, unit_hours, start, windows)
+        # API inserts are made by the backend and cannot be tagged
+        if {"http", "native"} & set(self.sink_names.values()):
+            self.log_comment = self.worker_config["log_comment"] = f"datagen-{uuid.uuid4()}"
+        views = self.materialized_views() if self.writes_clickhouse else []
+        detached = []
+        if detach_views and views:
+            print(f"\n🔌 Detaching {len(views)} materialized views for this run: "
+                  f"{', '.join(view[0] for view in views)} (they miss every insert until re-attached)")
+            detached = detach_view_tables(self.client, views)
+        reporter = MetricsReporter(self.metrics_snapshot, interval=metrics_interval, path=metrics_path)
+        reporter.start()
+        try:
+            if workers > 1 or checkpoint:
+                self.run_parallel(windows, workers, unit_hours, checkpoint)
+            else:
+                day = None
+                for hour_offset, hours, table in self.chunk_order(windows):
+                    chunk_day = (self.now - timedelta(hours=hour_offset + hours)).date()
+                    if start and chunk_day != day:
+                        day = chunk_day
+                        print(f"\n📅 {day.isoformat()}")
+                    generate = self.generate_spans if table == "spans" else self.generate_logs
+                    generate(hours_back=hours, hour_offset=hour_offset)
+            if checkpoint and checkpoint.done(INCIDENTS_UNIT):
+                print("\n🚨 Incidents already generated (checkpoint), skipping")
+            else:
+                self.generate_incidents(incidents_per_day=incidents_per_day)
+                if checkpoint:
+                    checkpoint.record(INCIDENTS_UNIT)
+            if checkpoint:
+                checkpoint.close()
+
+            if self.ingest_client:
+                self.flush_api()
+                print(f"\n🌐 API ingestion: {self.ingest_client.stats.summary()}")
+        finally:
+            if detached:
+                attach_views(self.client, detached)
+                print(f"\n🔌 Re-attached {len(detached)} materialized views")
+            reporter.stop()  # Final snapshot/textfile also when the run failed
+        if self.ingest_client:
+            self.ingest_client.close()
+        if self.uncertain_batches:
+            print(f"\n⚠ {self.uncertain_batches} API batches have an unknown outcome (timeouts, dropped connections) "
+                  "and were neither re-sent nor counted")
+
+        self.report_parts(parts_before)
+        self.report_otlp()
+        if self.cardinality and self.writes_clickhouse:
+            self.report_storage()
+        if parts_before and views:
+            self.report_views(views, parts_before[0], not detached, mv_report_path, mv_baseline_path)
+        self.close_sinks()
 
         print("\n" + "="*60)
         print("✅ Data generation complete!")
         print("="*60)
 
+    def plan_windows(self, start: datetime, policy: str, margin: timedelta, by_day: bool) -> Dict[str, List[tuple]]:
+        """
+        Per-table (hour_offset, hours) chunks of [start, now) after the TTL check.
+
+        by_day cuts each window into UTC days (backfill); otherwise a table gets one chunk.
+        """
+        ttls = {}  # Files and the null sink keep everything
+        if self.writes_clickhouse:
+            try:
+                ttls = read_ttls(self.client)
+            except Exception as e:
+                print(f"  ⚠ Could not read table TTLs from system.tables ({e}); not checking the time window")
+        starts, messages = plan_windows(["spans", "logs"], start, self.now, ttls, datetime.utcnow(),
+                                        margin=margin, policy=policy)
+        for message in messages:
+            print(f"  {message}")
+        windows = {}
+        for table, table_start in starts.items():
+            if by_day:
+                windows[table] = day_chunks(table_start, self.now)
+            else:
+                hours = int((self.now - table_start).total_seconds() // 3600)
+                windows[table] = [(0, hours)] if hours > 0 else []
+        if by_day:
+            print(f"\n📅 Backfill {start:%Y-%m-%d %H:%M} → {self.now:%Y-%m-%d %H:%M}: "
+                  + ", ".join(f"{table} {sum(h for _, h in chunks):,}h in {len(chunks)} days"
+                              for table, chunks in windows.items()))
+        return windows
+
+    @staticmethod
+    def chunk_order(windows: Dict[str, List[tuple]]) -> List[tuple]:
+        """(hour_offset, hours, table) for every chunk, oldest day first and spans before logs within it."""
+        chunks = [(offset, hours, table) for table, table_chunks in windows.items() for offset, hours in table_chunks]
+        # Chunks of the same day end at the same offset, whatever the table's window start
+        return sorted(chunks, key=lambda chunk: (-chunk[0], chunk[2] != "spans"))
+
+    def _open_checkpoint(self, path: str, resume: bool, hours_back: int, unit_hours: int,
+                         start: datetime = None, windows: Dict[str, List[tuple]] = None) -> Checkpoint:
+        """Start a checkpoint for this run (recording its planned windows), or resume one and adopt its now/seed."""
+        plan = {"hours": hours_back, "unit_hours": unit_hours, "teams": self.team_ids, "engine": self.engine,
+                "backfill_start": start.isoformat() if start else None,
+                "topology": self.worker_config["topology"],
+                "message_corpus": self.worker_config["message_corpus"],
+                "cardinality": self.worker_config["cardinality"], "trace_logs": self.worker_config["trace_logs"]}
+        if not resume:
+            # Pin the seed so a later --resume regenerates identical units (and dedup tokens)
+            self.seed = np.random.SeedSequence(self.seed).entropy
+            return Checkpoint.start(path, plan, self.now, self.seed, windows)
+        checkpoint = Checkpoint.resume(path, plan)
+        self.now, self.seed = checkpoint.now, checkpoint.seed
+        print(f"\n↩️  Resuming {path}: {len(checkpoint.completed)} units already done "
+              f"(run started at {self.now.isoformat()}Z)")
+        return checkpoint
+
+    def part_snapshot(self):
+        """Server time and active part counts of spans/logs, taken before a run."""
+        try:
+            since = self.client.query("SELECT now()").result_rows[0][0]
+            active = dict(self.client.query(
+                "SELECT table, count() FROM system.parts WHERE database = currentDatabase() "
+                "AND active AND table IN ('spans', 'logs') GROUP BY table").result_rows)
+        except Exception as e:
+            print(f"  ⚠ Could not read system.parts, part report disabled: {e}")
+            return None
+        return since, active
+
+    def report_parts(self, snapshot):
+        """Print the parts inserts created since the snapshot (system.part_log, else active part delta)."""
+        if snapshot is None:
+            return
+        since, active_before = snapshot
+        print("\n🧱 Parts created by this run:")
+        try:
+            self.client.command("SYSTEM FLUSH LOGS")
+            created = self.client.query(
+                "SELECT table, count(), sum(rows) FROM system.part_log "
+                "WHERE database = currentDatabase() AND event_type = 'NewPart' "
+                "AND table IN ('spans', 'logs') AND event_time >= %(since)s GROUP BY table",
+                parameters={"since": since}).result_rows
+            for table, parts, rows in sorted(created):
+                print(f"  {table:<6} {parts:>8,} parts, {rows / parts:>12,.0f} rows/part")
+            return
+        except Exception as e:
+            print(f"  ⚠ system.part_log unavailable ({e}); showing change in active parts (after merges)")
+        try:
+            active = dict(self.client.query(
+                "SELECT table, count() FROM system.parts WHERE database = currentDatabase() "
+                "AND active AND table IN ('spans', 'logs') GROUP BY table").result_rows)
+        except Exception as e:
+            print(f"  ⚠ Could not read system.parts: {e}")
+            return
+        for table in sorted(active):
+            print(f"  {table:<6} {active[table] - active_before.get(table, 0):>+8,} active parts "
+                  f"({active[table]:,} total)")
+
+    def materialized_views(self) -> List[tuple]:
+        try:
+            return materialized_views(self.client)
+        except Exception as e:
+            print(f"  ⚠ Could not list materialized views: {e}")
+            return []
+
+    def report_views(self, views: List[tuple], since, attached: bool, report_path: str = None,
+                     baseline_path: str = None):
+        """Print (and save) what the materialized views added to this run's inserts (mv_report.py)."""
+        from mv_report import collect, load_report, print_report, save_report
+        try:
+            report = collect(self.client, self.worker_config["database"], views, since, self.log_comment,
+                             views_attached=attached)
+        except Exception as e:
+            print(f"  ⚠ Could not build the materialized view report: {e}")
+            return
+        print_report(report, load_report(baseline_path) if baseline_path else None)
+        if report_path:
+            save_report(report, report_path)
+
+    def report_storage(self):
+        """Print on-disk size of the columns a cardinality profile inflates (whole tables)."""
+        from cardinality import storage_report
+        try:
+            columns = storage_report(self.client)
+        except Exception as e:
+            print(f"  ⚠ Could not read system.columns: {e}")
+            return
+        print("\n💾 Profiled column storage (whole tables):")
+        for table, name, column_type, compressed, uncompressed in columns:
+            ratio = uncompressed / compressed if compressed else 0
+            print(f"  {table:<6} {name:<16} {format_bytes(compressed):>12} compressed "
+                  f"{format_bytes(uncompressed):>12} raw ({ratio:.1f}x)  {column_type}")
+
+    def report_otlp(self):
+        """Print OTLP payload size and encode time per row next to the custom JSON of the same batches."""
+        counters = self.metrics.snapshot()["counters"]
+        tables = [table for table in ("spans", "logs") if counters.get(f"otlp_{table}_rows")]
+        if not tables:
+            return
+        print(f"\n📦 OTLP/{self.otlp_format} vs custom JSON (uncompressed bodies, encode time per row):")
+        for table in tables:
+            rows = counters[f"otlp_{table}_rows"]
+            otlp_bytes, json_bytes = counters[f"otlp_{table}_bytes"], counters[f"custom_json_{table}_bytes"]
+            otlp_us, json_us = counters[f"otlp_{table}_encode_us"], counters[f"custom_json_{table}_encode_us"]
+            print(f"  {table:<6} otlp {otlp_bytes / rows:>7,.0f} B/row {otlp_us / rows:>6.2f} µs/row   "
+                  f"custom {json_bytes / rows:>7,.0f} B/row {json_us / rows:>6.2f} µs/row   "
+                  f"({otlp_bytes / max(json_bytes, 1):.2f}x size, {otlp_us / max(json_us, 1):.2f}x time)")
+
+    # ==================== CONTINUOUS LOAD ====================
+    def run_load(self, rates: Dict[str, float], duration: float, batch_rows: int = 1000,
+                 senders: int = 4, report_interval: float = 5.0, metrics_path: str = None) -> Dict[str, Dict]:
+        """
+        Emit live, now-timestamped spans/logs at a steady target rate (rows/s per table).
+
+        Batches come from the numpy engine and are paced with a token bucket; each of
+        the `senders` threads per table owns its own generator (and so its own
+        ClickHouse client / HTTP session) and writes through the configured sink.
+        Senders share this generator's metrics, exported to metrics_path if given.
+        """
+        sink = ", ".join(f"{table}→{self.sink_names[table]}" for table in rates)
+        print(f"\n📈 Continuous load for {duration:.0f}s via {sink}: "
+              + ", ".join(f"{table}={rate:,.0f}/s" for table, rate in rates.items()))
+
+        streams = []
+        for table, rate in rates.items():
+            if table not in TABLE_COLUMNS:
+                raise ValueError(f"Unknown table for --rate: {table} (expected spans or logs)")
+            writers = [self._load_sender(table) for _ in range(senders)]
+            streams.append(LoadStream(table, rate, self._live_batches(table, batch_rows), writers,
+                                      queue_size=2 * senders))
+        reporter = MetricsReporter(self.metrics_snapshot, interval=report_interval if metrics_path else 0,
+                                   path=metrics_path)
+        reporter.start()
+        try:
+            results = run_streams(streams, duration, report_interval)
+        finally:
+            reporter.stop()
+        self.report_otlp()
+        return results
+
+    def _live_batches(self, table: str, batch_rows: int):
+        """Return a producer of (batch, rows) stamped at the current time, rotating over teams."""
+        rng = np.random.default_rng(self.rng.integers(2**63))  # Producers run on separate threads
+        if table == "spans":
+            generator = self._span_batch_generator(rng)
+            traces = max(1, batch_rows // generator.spans_per_trace)
+        else:
+            generator = self._log_batch_generator(rng)
+        sequence = [0]
+
+        def produce():
+            team_id = self.team_ids[sequence[0] % len(self.team_ids)]
+            sequence[0] += 1
+            if table == "spans":
+                batch = generator.generate(team_id, int(time.time() * 1000), np.zeros(traces, dtype=np.int64),
+                                           spread_minutes=1)
+            else:
+                batch = generator.generate(team_id, int(time.time()), np.zeros(batch_rows, dtype=np.int64),
+                                           spread_seconds=1)
+            return batch, len(batch["team_id"])
+
+        return produce
+
+    def _load_sender(self, table: str):
+        """A send(batch) callable backed by its own generator instance (thread-private client)."""
+        sender = ClickHouseDataGenerator(**self.worker_config)
+        sender.quiet = True
+        sender.api_fallback = False  # Count failures as errors instead of masking them
+        sender.metrics, sender.retry = self.metrics, self.retry  # Aggregate across sender threads
+        return lambda batch: sender._write_batch(table, sender._encode_batch(table, batch))
+
+    # ==================== PARALLEL GENERATION ====================
+    def work_units(self, windows: Dict[str, List[tuple]], unit_hours: int) -> List[tuple]:
+        """Split each table's (hour_offset, hours) chunks per team into (table, team_id, hour_offset, hours) units."""
+        units = []
+        for table in ["spans", "logs"]:
+            for team_id in self.team_ids:
+                for chunk_offset, chunk_hours in windows[table]:
+                    chunk_end = chunk_offset + chunk_hours
+                    for hour_offset in range(chunk_offset, chunk_end, unit_hours):
+                        units.append((table, team_id, hour_offset, min(unit_hours, chunk_end - hour_offset)))
+        return units
+
+    def run_parallel(self, windows: Dict[str, List[tuple]], workers: int, unit_hours: int = 1,
+                     checkpoint: Checkpoint = None):
+        """
+        Generate spans and logs in a process pool, one work unit per (table, team, hour chunk).
+
+        Every worker process opens its own ClickHouse client. Every unit gets its own
+        RNG stream spawned from the run seed, so the data does not depend on which
+        worker happens to pick a unit up. With a single worker, units run on a thread
+        in this process. Units already in the checkpoint are skipped; finished ones are
+        recorded as they complete.
+        """
+        units = self.work_units(windows, unit_hours)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(units))  # Spawned for all units: stable on resume
+        pending = [(unit, seed) for unit, seed in zip(units, seeds) if not (checkpoint and checkpoint.done(unit))]
+        skipped = len(units) - len(pending)
+        print(f"\n⚙️  Generating spans + logs with {workers} workers "
+              f"({len(pending)} units of {unit_hours}h, {len(self.team_ids)} teams"
+              + (f", {skipped} done in checkpoint" if skipped else "") + ")...")
+        units = [unit for unit, _ in pending]
+
+        rows = {"spans": 0, "logs": 0}
+        per_worker: Dict[int, Dict[str, float]] = {}
+        started = time.perf_counter()
+        last_progress = started
+
+        executor = ProcessPoolExecutor if workers > 1 else ThreadPoolExecutor
+        with executor(max_workers=workers, initializer=_init_worker, initargs=(self.worker_config,)) as pool:
+            futures = {pool.submit(_run_work_unit, unit + (seed, self.now)): unit for unit, seed in pending}
+            for done, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                if checkpoint:
+                    checkpoint.record(futures[future], rows=result["rows"])
+                rows[result["table"]] += result["rows"]
+                rows["logs"] += result["trace_logs"]
+                self.uncertain_batches += result["uncertain"]
+                self.metrics.merge(result["metrics"], result["metrics_baseline"])
+                stats = per_worker.setdefault(result["pid"], {"units": 0, "spans": 0, "logs": 0, "busy": 0.0})
+                stats["units"] += 1
+                stats[result["table"]] += result["rows"]
+                stats["logs"] += result["trace_logs"]
+                stats["busy"] += result["elapsed"]
+
+                now = time.perf_counter()
+                if now - last_progress >= 2 or done == len(units):
+                    last_progress = now
+                    rate = (rows["spans"] + rows["logs"]) / (now - started)
+                    print(f"  [{done}/{len(units)} units] {rows['spans']:,} spans, "
+                          f"{rows['logs']:,} logs ({rate:,.0f} rows/s)")
+
+        wall = time.perf_counter() - started
+        busy = sum(stats["busy"] for stats in per_worker.values())
+        print(f"\n  {'worker':>8} {'units':>6} {'spans':>12} {'logs':>12} {'busy s':>8} {'rows/s':>10}")
+        for pid, stats in sorted(per_worker.items()):
+            worker_rate = (stats["spans"] + stats["logs"]) / stats["busy"] if stats["busy"] else 0
+            print(f"  {pid:>8} {stats['units']:>6} {stats['spans']:>12,} {stats['logs']:>12,} "
+                  f"{stats['busy']:>8.1f} {worker_rate:>10,.0f}")
+        print(f"  ✓ Inserted {rows['spans']:,} spans, {rows['logs']:,} logs in {wall:.1f}s "
+              f"({(rows['spans'] + rows['logs']) / wall:,.0f} rows/s, "
+              f"{busy / (wall * workers):.0%} worker utilisation)")
+
+
+# Per-process generator for pool workers (each worker owns its own ClickHouse client)
+_worker_generator = None
+
+
+def _init_worker(worker_config: Dict):
+    global _worker_generator
+    _worker_generator = ClickHouseDataGenerator(**worker_config)
+    _worker_generator.quiet = True
+
+
+def _run_work_unit(unit: tuple) -> Dict:
+    table, team_id, hour_offset, hours, seed, now = unit
+    generator = _worker_generator
+    generator.team_ids = [team_id]
+    generator.now = now
+    generator.rng = np.random.default_rng(seed)
+    generator.uncertain_batches = 0
+    random.seed(int(seed.generate_state(1)[0]))  # python engine; forked workers share parent state
+
+    baseline = generator.metrics_snapshot()
+    started = time.perf_counter()
+    generator.trace_log_count = 0
+    if table == "spans":
+        rows = generator.generate_spans(hours_back=hours, hour_offset=hour_offset)
+    else:
+        rows = generator.generate_logs(hours_back=hours, hour_offset=hour_offset)
+    return {"pid": os.getpid(), "table": table, "rows": rows, "trace_logs": generator.trace_log_count,
+            "elapsed": time.perf_counter() - started,
+            "uncertain": generator.uncertain_batches, "metrics": generator.metrics_snapshot(),
+            "metrics_baseline": baseline}
+
+
+def parse_rates(value: str) -> Dict[str, float]:
+    """Parse "spans=50000,logs=200000" into {"spans": 50000.0, "logs": 200000.0}."""
+    rates = {}
+    for part in value.split(","):
+        table, _, rate = part.partition("=")
+        table = table.strip()
+        try:
+            rate = float(rate)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid rate '{part}', expected table=rows_per_second")
+        if table not in TABLE_COLUMNS:
+            raise argparse.ArgumentTypeError(f"Unknown table '{table}' in --rate (expected {', '.join(TABLE_COLUMNS)})")
+        if not rate > 0:  # Also rejects nan; a zero rate would leave the token bucket unpaced
+            raise argparse.ArgumentTypeError(f"Invalid rate '{part}': rows per second must be positive")
+        rates[table] = rate
+    return rates
+
 
 def main():
     parser = argparse.ArgumentParser(description="Generate ClickHouse data for ObserveX")
@@ -410,16 +1371,209 @@ def main():
     parser.add_argument("--password", default="observex123", help="Password")
     parser.add_argument("--clear", action="store_true", help="Clear existing data")
     parser.add_argument("--hours", type=int, default=24, help="Hours of data to generate")
+    parser.add_argument("--start", type=parse_when, metavar="DATE",
+                        help="Backfill from this UTC date/time (YYYY-MM-DD[THH:MM]) day by day, instead of --hours")
+    parser.add_argument("--end", type=parse_when, metavar="DATE",
+                        help="Backfill end (exclusive, default: the current hour)")
+    parser.add_argument("--ttl-policy", choices=["clamp", "warn", "error"], default="clamp",
+                        help="Time window reaching past a table TTL: start at the TTL horizon (default), "
+                             "only warn, or refuse to run")
+    parser.add_argument("--ttl-margin", type=float, default=6, metavar="HOURS",
+                        help="Keep this far inside the TTL horizon so rows do not expire during the run")
     parser.add_argument("--team-ids", nargs="+", help="Team UUIDs to use")
     parser.add_argument("--api-url", default="http://localhost:13000", help="Backend API URL")
     parser.add_argument("--auth-token", help="JWT authentication token (if provided, uses API ingestion)")
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python",
+                        help="Row generation engine: per-row Python loop or vectorized NumPy batches")
+    parser.add_argument("--seed", type=int, help="Random seed for the numpy engine (reproducible data)")
+    parser.add_argument("--no-arrow", action="store_true",
+                        help="numpy engine: use column-oriented insert instead of insert_arrow")
+    parser.add_argument("--api-concurrency", type=int, default=0,
+                        help="API ingestion: max in-flight requests via the asyncio client (0 = blocking requests)")
+    parser.add_argument("--api-connections", type=int,
+                        help="API ingestion: keep-alive connection pool size (default: --api-concurrency)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap generation, encoding and inserts in threads joined by bounded queues")
+    parser.add_argument("--queue-depth", type=int, default=4,
+                        help="Batches buffered between pipeline stages (bounds memory; default: 4)")
+    parser.add_argument("--rate", type=parse_rates,
+                        help="Continuous load mode: target rows/s per table, e.g. spans=50000,logs=200000")
+    parser.add_argument("--duration", type=float, default=60, help="Continuous load duration in seconds")
+    parser.add_argument("--load-batch", type=int, default=1000, help="Rows per request in continuous load mode")
+    parser.add_argument("--senders", type=int, default=4, help="Concurrent sender threads per table in load mode")
+    parser.add_argument("--report-interval", type=float, default=5, help="Seconds between load mode reports")
+    parser.add_argument("--compression", choices=["none", "lz4", "zstd"], default="none",
+                        help="Compression for direct ClickHouse inserts (see ingest_benchmark.py)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per insert for the python engine")
+    parser.add_argument("--sink", choices=SINKS,
+                        help="Where batches go (see sinks.py): null, file (JSONEachRow), http / native "
+                             "(ClickHouse), api or otlp (default: api with --auth-token, else http)")
+    parser.add_argument("--table-sink", type=parse_table_sinks, default={}, metavar="TABLE=SINK,...",
+                        help="Per-table sink overriding --sink, e.g. spans=native,logs=file,incidents=null")
+    parser.add_argument("--output-dir", default="datagen-out", help="Directory of the file sink's <table>.jsonl")
+    parser.add_argument("--native-port", type=int, default=9000, help="ClickHouse native protocol port")
+    parser.add_argument("--api-batch-size", type=int, default=1000, help="Entries per /api/ingest request")
+    parser.add_argument("--api-gzip", action="store_true",
+                        help="gzip /api/ingest request bodies (Content-Encoding: gzip; about 6x fewer wire bytes)")
+    parser.add_argument("--otlp-format", choices=OTLP_FORMATS, default="proto",
+                        help="otlp sink: protobuf or OTLP/JSON export requests (default: proto)")
+    parser.add_argument("--otlp-endpoint", metavar="URL",
+                        help="otlp sink: POST to URL/v1/traces and URL/v1/logs (gzipped with --api-gzip) "
+                             "instead of writing <signal>.otlp.* files to --output-dir")
+    parser.add_argument("--partition-batching", action="store_true",
+                        help="Buffer rows per (day, team) partition and insert one large block per partition")
+    parser.add_argument("--partition-block-rows", type=int, default=500_000,
+                        help="Rows per partition block with --partition-batching (default: 500000)")
+    parser.add_argument("--incidents-per-day", type=int, default=5, help="Incidents per team per day (30 days)")
+    parser.add_argument("--max-memory", type=parse_size, metavar="SIZE",
+                        help="Per-process memory ceiling, e.g. 1G: batch sizes shrink to stay under it "
+                             "(see memory.py)")
+    parser.add_argument("--retries", type=int, default=5,
+                        help="Attempts per insert/API request on transient errors, with exponential backoff")
+    parser.add_argument("--topology", type=int, metavar="SERVICES",
+                        help="numpy engine: synthetic call graph with this many services instead of the built-in six")
+    parser.add_argument("--depth", type=int, default=5, help="Topology: call graph layers")
+    parser.add_argument("--fan-out", type=int, default=4, help="Topology: max downstream services per service")
+    parser.add_argument("--endpoints", type=int, default=8, help="Topology: mean endpoints per service")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Topology: power-law exponent of service popularity")
+    parser.add_argument("--calls-per-span", type=float, default=1.5,
+                        help="Topology: mean downstream calls per span (trace size)")
+    parser.add_argument("--message-corpus", action="store_true",
+                        help="numpy engine: Zipfian log messages with stack traces and rare needle tokens")
+    parser.add_argument("--corpus-vocab", type=int, default=50_000, help="Message corpus: vocabulary size")
+    parser.add_argument("--corpus-zipf", type=float, default=1.07, help="Message corpus: Zipf exponent of word use")
+    parser.add_argument("--needles", type=int, default=100, help="Message corpus: distinct rare needle tokens")
+    parser.add_argument("--needle-rate", type=float, default=1e-5,
+                        help="Message corpus: fraction of log lines carrying a needle token")
+    parser.add_argument("--cardinality", choices=["wide", "high", "extreme"],
+                        help="numpy engine: fill attributes and inflate operation_name/host/pod cardinality "
+                             "(see cardinality.py)")
+    parser.add_argument("--attribute-keys", metavar="MIN-MAX", help="Cardinality: attribute keys per row, e.g. 20-50")
+    parser.add_argument("--attribute-values", type=int, help="Cardinality: max distinct values of one attribute key")
+    parser.add_argument("--operation-count", type=int, help="Cardinality: distinct operation_name values")
+    parser.add_argument("--host-count", type=int, help="Cardinality: distinct host values")
+    parser.add_argument("--pod-count", type=int, help="Cardinality: distinct pod values")
+    parser.add_argument("--logs-per-span", type=parse_logs_per_span, metavar="N[,SERVICE=N,...]",
+                        help="Also emit logs as children of the generated spans: Poisson(N) per span sharing its "
+                             "trace_id/span_id, with per-service means, e.g. 2,payment-service=6 "
+                             "(standalone logs then carry no trace ids; see trace_logs.py)")
+    parser.add_argument("--detach-views", action="store_true",
+                        help="Detach the materialized views during the run (baseline for their insert cost); "
+                             "benchmark databases only")
+    parser.add_argument("--mv-report", metavar="PATH", help="Save the materialized view report as JSON")
+    parser.add_argument("--mv-baseline", metavar="PATH",
+                        help="--mv-report of a --detach-views run to compare insert latency against")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for span/log generation (default: 1, sequential)")
+    parser.add_argument("--unit-hours", type=int, default=1,
+                        help="Hours per (team, table) work unit when --workers > 1 or --checkpoint is used")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="Record completed (table, team, hours) units in this file so the run can be resumed")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the run recorded in --checkpoint, skipping completed units")
+    parser.add_argument("--metrics-interval", type=float, default=10,
+                        help="Seconds between throughput/stage-timing lines (0 = summary at the end only)")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="Write metrics to PATH: Prometheus textfile if it ends in .prom, else JSON lines")
+    parser.add_argument("--profile", nargs="?", const="profiles", metavar="DIR",
+                        help="Profile each stage (cProfile + tracemalloc) and dump <stage>.prof files to DIR")
 
     args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint PATH")
+    if args.resume and args.clear:
+        parser.error("--resume cannot be combined with --clear")
+    if args.end and not args.start:
+        parser.error("--end requires --start")
+    if args.start:
+        if args.rate:
+            parser.error("--start/--end backfill cannot be combined with --rate")
+        args.end = (args.end or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+        if args.start >= args.end:
+            parser.error(f"--start {args.start} must be before --end {args.end}")
+    if args.rate and args.api_concurrency:
+        # Load senders time each batch synchronously; async submits would measure queueing, not ingestion
+        parser.error("--rate cannot be combined with --api-concurrency (use --senders for concurrency)")
+    if args.rate and (args.detach_views or args.mv_report or args.mv_baseline):
+        parser.error("--detach-views/--mv-report/--mv-baseline cover batch runs only (no --rate)")
+    if args.logs_per_span:
+        if args.rate:
+            parser.error("--logs-per-span covers batch runs only (no --rate)")
+        unknown = sorted(set(args.logs_per_span["services"]) - set(SERVICES)) if not args.topology else []
+        if unknown:
+            parser.error(f"--logs-per-span: unknown services {', '.join(unknown)} "
+                         f"(expected {', '.join(SERVICES)})")
+    if args.profile and (args.workers > 1 or args.checkpoint or args.rate):
+        parser.error("--profile covers sequential runs only (no --workers, --checkpoint or --rate)")
+    sinks = {}
+    if args.sink:
+        sinks = {"spans": args.sink, "logs": args.sink}
+        if args.sink == "otlp":  # OTLP has no incident signal: spans/logs only, nothing else written
+            sinks["incidents"] = "null"
+        elif args.sink != "api":  # Incidents have no API endpoint and stay on direct inserts
+            sinks["incidents"] = args.sink
+    sinks.update(args.table_sink)
+    for table, sink in sinks.items():
+        if table not in ("spans", "logs", "incidents"):
+            parser.error(f"Unknown table in --table-sink: {table} (expected spans, logs or incidents)")
+        if sink == "api" and (table == "incidents" or not args.auth_token):
+            parser.error(f"{table}=api: the api sink needs --auth-token and covers spans/logs only")
+        if sink == "otlp" and table == "incidents":
+            parser.error("incidents=otlp: the otlp sink covers spans/logs only")
+    if "native" in sinks.values():
+        try:
+            import clickhouse_driver  # noqa: F401
+        except ImportError:
+            parser.error("the native sink needs clickhouse-driver: pip install 'clickhouse-driver[lz4,zstd]'")
+    topology = None
+    if args.topology:
+        if args.engine != "numpy":
+            parser.error("--topology requires --engine numpy")
+        # Fixed topology seed so worker processes rebuild the same graph
+        topology = dict(services=args.topology, depth=args.depth, fan_out=args.fan_out, endpoints=args.endpoints,
+                        zipf=args.zipf, seed=args.seed or 0, calls_per_span=args.calls_per_span)
+
+    message_corpus = None
+    if args.message_corpus:
+        if args.engine != "numpy":
+            parser.error("--message-corpus requires --engine numpy")
+        # Fixed corpus seed: workers and search_benchmark.py rebuild the same vocabulary
+        message_corpus = dict(vocab_size=args.corpus_vocab, zipf=args.corpus_zipf, needles=args.needles,
+                              needle_rate=args.needle_rate, seed=args.seed or 0)
+
+    cardinality = None
+    if args.cardinality:
+        if args.engine != "numpy":
+            parser.error("--cardinality requires --engine numpy")
+        keys_per_row = None
+        if args.attribute_keys:
+            try:
+                keys_per_row = [int(n) for n in args.attribute_keys.split("-", 1)]
+            except ValueError:
+                parser.error(f"Invalid --attribute-keys '{args.attribute_keys}', expected e.g. 20-50")
+            from cardinality import PROFILES
+            key_pool = PROFILES[args.cardinality]["key_pool"]
+            if not 0 <= keys_per_row[0] <= keys_per_row[-1] <= key_pool:
+                parser.error(f"Invalid --attribute-keys '{args.attribute_keys}': need 0 <= MIN <= MAX <= {key_pool} "
+                             f"(the {args.cardinality} profile's key pool)")
+        cardinality = dict(name=args.cardinality, seed=args.seed or 0, keys_per_row=keys_per_row,
+                           value_cardinality=args.attribute_values, operations=args.operation_count,
+                           hosts=args.host_count, pods=args.pod_count)
 
     generator = ClickHouseDataGenerator(
         host=args.host, port=args.port, database=args.database,
         user=args.user, password=args.password,
-        api_url=args.api_url, auth_token=args.auth_token
+        api_url=args.api_url, auth_token=args.auth_token,
+        engine=args.engine, seed=args.seed, use_arrow=not args.no_arrow,
+        api_concurrency=args.api_concurrency, api_connections=args.api_connections,
+        pipeline=args.pipeline, queue_depth=args.queue_depth,
+        compression=None if args.compression == "none" else args.compression,
+        batch_size=args.batch_size, api_batch_size=args.api_batch_size, topology=topology,
+        partition_batching=args.partition_batching, partition_block_rows=args.partition_block_rows,
+        retries=args.retries, max_memory=args.max_memory, message_corpus=message_corpus,
+        cardinality=cardinality, sinks=sinks, output_dir=args.output_dir, native_port=args.native_port,
+        api_gzip=args.api_gzip, otlp_format=args.otlp_format, otlp_endpoint=args.otlp_endpoint,
+        trace_logs=args.logs_per_span
     )
 
     # Use provided team IDs or generate sample ones
@@ -432,12 +1586,38 @@ def main():
             "22222222-2222-2222-2222-222222222222",
         ])
 
-    if args.auth_token:
-        print("  ℹ️  Using REST API ingestion endpoints")
-    else:
-        print("  ℹ️  Using direct ClickHouse insertion")
-
-    generator.run(clear=args.clear, hours_back=args.hours)
+    names = {"api": "REST API ingestion endpoints", "http": "direct ClickHouse insertion (HTTP)",
+             "native": "direct ClickHouse insertion (native protocol)", "null": "no sink (generation only)",
+             "file": f"JSONEachRow files in {args.output_dir}/",
+             "otlp": f"OTLP/{args.otlp_format} export to {args.otlp_endpoint or args.output_dir + '/'}"}
+    for sink in dict.fromkeys(generator.sink_names.values()):
+        print(f"  ℹ️  Using {names[sink]}")
+
+    profiler = None
+    if args.profile:
+        from profiling import StageProfiler
+        if args.pipeline or args.api_concurrency:
+            print("  ⚠ --profile only sees the generating thread; encode/write threads are not profiled")
+        profiler = StageProfiler(args.profile, focus=PROFILE_FOCUS)
+        profiler.instrument(generator, PROFILE_STAGES)
+
+    if args.rate:
+        generator.run_load(args.rate, args.duration, batch_rows=args.load_batch,
+                           senders=args.senders, report_interval=args.report_interval,
+                           metrics_path=args.metrics_file)
+        return
+
+    try:
+        generator.run(clear=args.clear, hours_back=args.hours, workers=args.workers, unit_hours=args.unit_hours,
+                      checkpoint_path=args.checkpoint, resume=args.resume,
+                      metrics_interval=args.metrics_interval, metrics_path=args.metrics_file,
+                      incidents_per_day=args.incidents_per_day, start=args.start, end=args.end,
+                      ttl_policy=args.ttl_policy, ttl_margin_hours=args.ttl_margin, detach_views=args.detach_views,
+                      mv_report_path=args.mv_report, mv_baseline_path=args.mv_baseline)
+    except (CheckpointError, TTLError) as e:
+        parser.error(str(e))
+    if profiler:
+        profiler.report()
 
 
 if __name__ == "__main__":
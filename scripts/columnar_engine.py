@@ -0,0 +1,465 @@
+"""
+Columnar (NumPy) generation engine for the ClickHouse data generator.
+
+Instead of building one Python list per row, whole batches are produced as
+column arrays: timestamps, level codes, service/host/pod/thread indices and
+trace/span ids are drawn with a single vectorized call each, and the string
+columns are dictionary-encoded against pre-built vocabularies.
+
+A batch is a dict of column name -> one of:
+  - np.ndarray            plain values (ints, datetime64, fixed-width bytes ids)
+  - np.ma.MaskedArray     Nullable column (masked rows are NULL)
+  - DictColumn            per-row codes into a small string vocabulary
+  - MapColumn             Map(String, String) as offsets + flat keys/values
+
+Batches convert either to Arrow tables (client.insert_arrow, no per-row Python
+objects at all) or to the list-of-columns shape for client.insert(column_oriented=True).
+
+Used by clickhouse_data_generator.py when run with --engine numpy.
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+pa = None  # pyarrow, imported by arrow_available(): the Arrow insert path is optional (and slow to import)
+
+
+class DictColumn:
+    """Dictionary-encoded string column: per-row codes into a vocabulary array."""
+
+    def __init__(self, codes: np.ndarray, vocab: np.ndarray):
+        self.codes = codes
+        self.vocab = vocab
+
+    def __len__(self):
+        return len(self.codes)
+
+    def values(self) -> np.ndarray:
+        return self.vocab[self.codes]
+
+
+class MapColumn:
+    """Map(String, String) column in Arrow layout: row i owns keys/values[offsets[i]:offsets[i+1]]."""
+
+    def __init__(self, offsets: np.ndarray, keys, values):
+        self.offsets = offsets
+        self.keys = keys
+        self.values = values
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @classmethod
+    def empty(cls, n: int) -> "MapColumn":
+        no_strings = DictColumn(np.empty(0, dtype=np.int32), vocabulary([]))
+        return cls(np.zeros(n + 1, dtype=np.int32), no_strings, no_strings)
+
+
+def weights_to_probabilities(weights: Sequence[float]) -> np.ndarray:
+    """Normalise a random.choices-style weight list into a probability vector."""
+    p = np.asarray(weights, dtype=np.float64)
+    return p / p.sum()
+
+
+def vocabulary(values: Sequence) -> np.ndarray:
+    """Build an object array so fancy indexing returns the original str objects."""
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = list(values)
+    return arr
+
+
+def constant(value: str, n: int) -> DictColumn:
+    """A column holding the same string on every row."""
+    return DictColumn(np.zeros(n, dtype=np.int32), vocabulary([value]))
+
+
+def random_hex_ids(rng: np.random.Generator, n: int, width: int) -> np.ndarray:
+    """
+    Generate n random lowercase hex ids of the given width.
+
+    Ids are returned as a fixed-width bytes array (dtype S<width>): clickhouse_connect
+    writes bytes String columns without re-encoding, and no per-row str is built.
+    """
+    raw = rng.bytes(n * width // 2).hex().encode("ascii")
+    return np.frombuffer(raw, dtype=f"S{width}")
+
+
+def exclusive_offsets(counts: np.ndarray) -> np.ndarray:
+    """Start offset of each group given per-group lengths ([2, 3, 1] -> [0, 2, 5])."""
+    offsets = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=offsets[1:])
+    return offsets
+
+
+# ==================== BATCH CONVERSION ====================
+
+def column_to_list(col) -> list:
+    """Materialise one column as the Python list clickhouse_connect's insert() expects."""
+    if isinstance(col, DictColumn):
+        return col.values().tolist()
+    if isinstance(col, MapColumn):
+        keys, values = column_to_list(col.keys), column_to_list(col.values)
+        bounds = col.offsets.tolist()
+        return [dict(zip(keys[bounds[i]:bounds[i + 1]], values[bounds[i]:bounds[i + 1]]))
+                for i in range(len(col))]
+    if isinstance(col, np.ma.MaskedArray):
+        values = column_to_list(col.data)
+        return [None if masked else v for v, masked in zip(values, np.ma.getmaskarray(col).tolist())]
+    if col.dtype.kind == "M":
+        # DateTime columns accept epoch seconds directly, skipping datetime objects
+        return col.astype("datetime64[s]").astype(np.int64).tolist()
+    return col.tolist()
+
+
+def columns_to_lists(batch: Dict[str, object], column_names: List[str]) -> List[list]:
+    """Convert a column batch into the list-of-columns shape for insert(column_oriented=True)."""
+    return [column_to_list(batch[name]) for name in column_names]
+
+
+def columns_to_native_lists(batch: Dict[str, object], column_names: List[str]) -> List[list]:
+    """List-of-columns for clickhouse_driver (execute(columnar=True)), which wants datetime objects."""
+    return [batch[name].astype("datetime64[s]").tolist()
+            if isinstance(batch[name], np.ndarray) and batch[name].dtype.kind == "M"
+            else column_to_list(batch[name]) for name in column_names]
+
+
+def columns_to_rows(batch: Dict[str, object], column_names: List[str]) -> List[list]:
+    """Pivot a column batch back into row lists of native str/datetime (REST API path)."""
+    columns = []
+    for name in column_names:
+        col = batch[name]
+        if isinstance(col, np.ndarray) and not isinstance(col, np.ma.MaskedArray):
+            if col.dtype.kind == "M":
+                columns.append(col.tolist())
+                continue
+            if col.dtype.kind == "S":
+                col = col.astype(f"U{col.dtype.itemsize}")
+        elif isinstance(col, np.ma.MaskedArray) and col.dtype.kind == "S":
+            col = np.ma.MaskedArray(col.data.astype(f"U{col.dtype.itemsize}"), mask=col.mask)
+        columns.append(column_to_list(col))
+    return [list(row) for row in zip(*columns)]
+
+
+def slice_batch(batch: Dict[str, object], start: int, stop: int) -> Dict[str, object]:
+    """Rows [start, stop) of a column batch, sharing the underlying arrays where possible."""
+    sliced = {}
+    for name, col in batch.items():
+        if isinstance(col, DictColumn):
+            sliced[name] = DictColumn(col.codes[start:stop], col.vocab)
+        elif isinstance(col, MapColumn):
+            lo, hi = int(col.offsets[start]), int(col.offsets[stop])
+            sliced[name] = MapColumn(col.offsets[start:stop + 1] - lo,
+                                     DictColumn(col.keys.codes[lo:hi], col.keys.vocab),
+                                     DictColumn(col.values.codes[lo:hi], col.values.vocab))
+        else:
+            sliced[name] = col[start:stop]
+    return sliced
+
+
+def take_batch(batch: Dict[str, object], order: np.ndarray) -> Dict[str, object]:
+    """Rows of a column batch in the given order (a permutation or selection of row indices)."""
+    taken = {}
+    for name, col in batch.items():
+        if isinstance(col, DictColumn):
+            taken[name] = DictColumn(col.codes[order], col.vocab)
+        elif isinstance(col, MapColumn):
+            # Regroup each selected row's run of keys/values
+            lengths = np.diff(col.offsets)[order]
+            offsets = np.zeros(len(order) + 1, dtype=col.offsets.dtype)
+            np.cumsum(lengths, out=offsets[1:])
+            flat = np.repeat(col.offsets[:-1][order] - offsets[:-1], lengths) + np.arange(offsets[-1])
+            taken[name] = MapColumn(offsets, DictColumn(col.keys.codes[flat], col.keys.vocab),
+                                    DictColumn(col.values.codes[flat], col.values.vocab))
+        else:
+            taken[name] = col[order]
+    return taken
+
+
+def _concat_dict_columns(cols: List[DictColumn]) -> DictColumn:
+    vocab = cols[0].vocab
+    if all(col.vocab is vocab or (len(col.vocab) == len(vocab) and np.array_equal(col.vocab, vocab))
+           for col in cols):
+        return DictColumn(np.concatenate([col.codes for col in cols]), vocab)
+    # Different vocabularies (e.g. one constant() per batch): stack them and shift the codes
+    shifts = exclusive_offsets(np.array([len(col.vocab) for col in cols]))
+    return DictColumn(np.concatenate([col.codes + shift for col, shift in zip(cols, shifts)]),
+                      np.concatenate([col.vocab for col in cols]))
+
+
+def concat_batches(batches: List[Dict[str, object]]) -> Dict[str, object]:
+    """Concatenate column batches with the same columns into one batch."""
+    merged = {}
+    for name, first in batches[0].items():
+        cols = [batch[name] for batch in batches]
+        if isinstance(first, DictColumn):
+            merged[name] = _concat_dict_columns(cols)
+        elif isinstance(first, MapColumn):
+            shifts = exclusive_offsets(np.array([col.offsets[-1] for col in cols]))
+            offsets = np.concatenate([cols[0].offsets[:1]] + [col.offsets[1:] + shift
+                                                              for col, shift in zip(cols, shifts)])
+            merged[name] = MapColumn(offsets, _concat_dict_columns([col.keys for col in cols]),
+                                     _concat_dict_columns([col.values for col in cols]))
+        elif isinstance(first, np.ma.MaskedArray):
+            merged[name] = np.ma.concatenate(cols)
+        else:
+            merged[name] = np.concatenate(cols)
+    return merged
+
+
+def _to_arrow_array(col):
+    if isinstance(col, DictColumn):
+        return pa.DictionaryArray.from_arrays(pa.array(col.codes.astype(np.int32)),
+                                              pa.array(col.vocab.tolist(), type=pa.string()))
+    if isinstance(col, MapColumn):
+        return pa.MapArray.from_arrays(pa.array(col.offsets.astype(np.int32)),
+                                       _to_arrow_array(col.keys).dictionary_decode(),
+                                       _to_arrow_array(col.values).dictionary_decode())
+    if isinstance(col, np.ma.MaskedArray):
+        return pa.array(col.data, mask=np.ma.getmaskarray(col))
+    return pa.array(col)
+
+
+def arrow_available() -> bool:
+    global pa
+    if pa is None:
+        try:
+            import pyarrow
+        except ImportError:  # Column-oriented insert is used instead
+            return False
+        pa = pyarrow
+    return True
+
+
+def to_arrow_table(batch: Dict[str, object], column_names: List[str]):
+    """
+    Convert a column batch into a pyarrow Table for client.insert_arrow().
+
+    String columns become Arrow dictionaries (LowCardinality on the ClickHouse side),
+    ids stay binary and timestamps are Arrow timestamps; ClickHouse casts them into
+    the table's String/UUID/DateTime column types on insert.
+    """
+    return pa.Table.from_arrays([_to_arrow_array(batch[name]) for name in column_names],
+                                names=column_names)
+
+
+# ==================== LOGS ====================
+
+class LogBatchGenerator:
+    """Vectorized equivalent of the row loop in ClickHouseDataGenerator.generate_logs."""
+
+    HOSTS = 5
+    PODS_PER_SERVICE = 3
+    THREADS = 20
+    TRACE_PROBABILITY = 0.7
+
+    def __init__(self, services: Dict[str, Dict], levels: List[str], level_weights: List[int],
+                 info_messages: List[str], error_messages: List[str], rng: np.random.Generator,
+                 service_weights: Sequence[float] = None, corpus=None, trace_probability: float = TRACE_PROBABILITY):
+        self.rng = rng
+        self.corpus = corpus  # message_corpus.MessageCorpus: Zipfian messages instead of the fixed lists
+        self.trace_probability = trace_probability  # Share of logs stamped with a random (unjoinable) trace id
+        service_names = list(services.keys())
+        # Uniform over services unless weighted (e.g. by ServiceTopology popularity)
+        self.service_p = None if service_weights is None else weights_to_probabilities(service_weights)
+
+        self.level_p = weights_to_probabilities(level_weights)
+        self.level_vocab = vocabulary(levels)
+        self.error_level = levels.index("ERROR")
+
+        self.service_vocab = vocabulary(service_names)
+        self.logger_vocab = vocabulary(
+            [f"com.example.{name.replace('-', '.')}.Handler" for name in service_names])
+        self.pod_vocab = vocabulary(
+            [f"pod-{name}-{i}" for name in service_names for i in range(1, self.PODS_PER_SERVICE + 1)])
+        self.host_vocab = vocabulary([f"host-{i}" for i in range(1, self.HOSTS + 1)])
+        self.thread_vocab = vocabulary([f"thread-{i}" for i in range(1, self.THREADS + 1)])
+
+        # Info messages first, error messages after: message code = len(info) + error index
+        self.n_info = len(info_messages)
+        self.n_error = len(error_messages)
+        self.message_vocab = vocabulary(list(info_messages) + list(error_messages))
+        self.exception_vocab = vocabulary([""] + [
+            f"java.lang.RuntimeException: {m}\n\tat com.example.Service.method(Service.java:42)"
+            for m in error_messages
+        ])
+
+    def generate(self, team_id: str, end_epoch: int, hour_index: np.ndarray,
+                 spread_seconds: int = 3600) -> Dict[str, object]:
+        """
+        Generate one batch of log columns.
+
+        hour_index holds, per row, how many hours before end_epoch the row's hour
+        starts; a random second within spread_seconds is subtracted on top
+        (spread_seconds=1 stamps every row at end_epoch, for live load).
+        """
+        rng = self.rng
+        n = len(hour_index)
+
+        epoch = end_epoch - hour_index.astype(np.int64) * 3600 - rng.integers(0, spread_seconds, n)
+        level_code = rng.choice(len(self.level_vocab), size=n, p=self.level_p)
+        if self.service_p is None:
+            service_idx = rng.integers(0, len(self.service_vocab), n)
+        else:
+            service_idx = rng.choice(len(self.service_vocab), size=n, p=self.service_p)
+        message, exception = self.messages(level_code == self.error_level)
+
+        has_trace = rng.random(n) < self.trace_probability
+        trace_id = np.where(has_trace, random_hex_ids(rng, n, 32), b"")
+        span_id = np.where(has_trace, random_hex_ids(rng, n, 16), b"")
+
+        pod_idx = service_idx * self.PODS_PER_SERVICE + rng.integers(0, self.PODS_PER_SERVICE, n)
+        service_name = DictColumn(service_idx, self.service_vocab)
+
+        return {
+            "team_id": constant(team_id, n),
+            "timestamp": epoch.astype("datetime64[s]"),
+            "level": DictColumn(level_code, self.level_vocab),
+            "service_name": service_name,
+            "logger": DictColumn(service_idx, self.logger_vocab),
+            "message": message,
+            "trace_id": trace_id,
+            "span_id": span_id,
+            "host": DictColumn(rng.integers(0, self.HOSTS, n), self.host_vocab),
+            "pod": DictColumn(pod_idx, self.pod_vocab),
+            "container": service_name,
+            "thread": DictColumn(rng.integers(0, self.THREADS, n), self.thread_vocab),
+            "exception": exception,
+            "attributes": MapColumn.empty(n),
+        }
+
+    def messages(self, is_error: np.ndarray) -> tuple:
+        """(message, exception) columns: an error message and stack trace where is_error, else an info message."""
+        if self.corpus is not None:
+            return self.corpus.generate(self.rng, is_error)
+        n = len(is_error)
+        error_idx = self.rng.integers(0, self.n_error, n)
+        message_code = np.where(is_error, self.n_info + error_idx, self.rng.integers(0, self.n_info, n))
+        return (DictColumn(message_code, self.message_vocab),
+                DictColumn(np.where(is_error, 1 + error_idx, 0), self.exception_vocab))
+
+
+# ==================== SPANS ====================
+
+class SpanBatchGenerator:
+    """
+    Vectorized equivalent of generate_spans/_generate_trace_spans.
+
+    Each trace is a SERVER root span on the root service plus 2-4 distinct
+    downstream services called one after another, with the same duration,
+    status and HTTP distributions as the row-based generator.
+    """
+
+    HOSTS = 5
+    PODS_PER_SERVICE = 3
+    CHILD_ERROR_RATE = 0.05
+    MIN_CHILDREN = 2
+    MAX_CHILDREN = 4
+
+    def __init__(self, services: Dict[str, Dict], root_service: str, http_methods: List[str],
+                 http_status_codes: List[int], http_status_weights: List[int],
+                 rng: np.random.Generator):
+        self.rng = rng
+        service_names = list(services.keys())
+
+        self.root_idx = service_names.index(root_service)
+        self.downstream_idx = np.array([i for i in range(len(service_names)) if i != self.root_idx])
+        self.min_children = min(self.MIN_CHILDREN, len(self.downstream_idx))
+        self.max_children = min(self.MAX_CHILDREN, len(self.downstream_idx))
+        self.spans_per_trace = self.max_children + 1  # Upper bound, used to size batches
+
+        self.service_vocab = vocabulary(service_names)
+        self.pod_vocab = vocabulary(
+            [f"pod-{name}-{i}" for name in service_names for i in range(1, self.PODS_PER_SERVICE + 1)])
+        self.host_vocab = vocabulary([f"host-{i}" for i in range(1, self.HOSTS + 1)])
+
+        # All endpoints flattened; a service's endpoints live at [offset, offset + count)
+        endpoint_lists = [services[name]["endpoints"] for name in service_names]
+        self.endpoint_vocab = vocabulary([ep for eps in endpoint_lists for ep in eps])
+        self.endpoint_count = np.array([len(eps) for eps in endpoint_lists])
+        self.endpoint_offset = exclusive_offsets(self.endpoint_count)
+
+        root_endpoints = services[root_service]["endpoints"]
+        self.url_vocab = vocabulary([""] + [f"https://api.example.com{ep}" for ep in root_endpoints])
+        self.method_vocab = vocabulary([""] + list(http_methods))
+        self.status_codes = np.asarray(http_status_codes, dtype=np.uint16)
+        self.status_p = weights_to_probabilities(http_status_weights)
+        self.status_vocab = vocabulary(["OK", "ERROR"])
+        self.kind_vocab = vocabulary(["SERVER"])
+
+    def generate(self, team_id: str, end_ms: int, hour_index: np.ndarray,
+                 spread_minutes: int = 60) -> Dict[str, object]:
+        """
+        Generate the spans of len(hour_index) traces as one column batch.
+
+        hour_index holds, per trace, how many hours before end_ms the trace starts;
+        a random whole minute within spread_minutes is subtracted on top
+        (spread_minutes=1 starts every trace at end_ms, for live load).
+        """
+        rng = self.rng
+        n_traces = len(hour_index)
+
+        trace_start = (end_ms - hour_index.astype(np.int64) * 3_600_000
+                       - rng.integers(0, spread_minutes, n_traces) * 60_000)
+        children = rng.integers(self.min_children, self.max_children + 1, n_traces)
+        spans_per_trace = children + 1
+        n = int(spans_per_trace.sum())
+
+        # Span layout: each trace is [root, child_0, ..., child_k-1]
+        trace_of_span = np.repeat(np.arange(n_traces), spans_per_trace)
+        trace_first = exclusive_offsets(spans_per_trace)
+        position = np.arange(n) - trace_first[trace_of_span]
+        is_root = position == 0
+        child_pos = np.maximum(position - 1, 0)
+
+        # Distinct downstream services per trace: first k columns of a random permutation
+        permutation = np.argsort(rng.random((n_traces, len(self.downstream_idx))), axis=1)
+        service_idx = np.where(is_root, self.root_idx,
+                               self.downstream_idx[permutation[trace_of_span, child_pos]])
+        operation = self.endpoint_offset[service_idx] + rng.integers(0, self.endpoint_count[service_idx])
+
+        # Durations: root 50-500ms, children 10..max(20, (root - 10) // 2)ms
+        root_duration = rng.integers(50, 501, n_traces)
+        child_high = np.maximum(20, (root_duration - 10) // 2)[trace_of_span] + 1
+        duration = np.where(is_root, root_duration[trace_of_span], rng.integers(10, child_high))
+
+        # Children run back to back starting 5ms into the root, with a 1-5ms gap after each
+        step = np.where(is_root, 0, duration + rng.integers(1, 6, n))
+        before = np.cumsum(step) - step
+        offset = np.where(is_root, 0, 5 + before - before[trace_first[trace_of_span]])
+        start = trace_start[trace_of_span] + offset
+
+        http_status = np.where(is_root, rng.choice(self.status_codes, size=n, p=self.status_p), 0)
+        is_error = np.where(is_root, http_status >= 500, rng.random(n) < self.CHILD_ERROR_RATE)
+
+        span_id = random_hex_ids(rng, n, 16)
+        trace_id = random_hex_ids(rng, n_traces, 32)[trace_of_span]
+        parent_span_id = np.ma.MaskedArray(span_id[trace_first[trace_of_span]], mask=is_root)
+
+        pod_idx = service_idx * self.PODS_PER_SERVICE + rng.integers(0, self.PODS_PER_SERVICE, n)
+        service_name = DictColumn(service_idx, self.service_vocab)
+
+        return {
+            "team_id": constant(team_id, n),
+            "trace_id": trace_id,
+            "span_id": span_id,
+            "parent_span_id": parent_span_id,
+            "is_root": is_root.astype(np.uint8),
+            "operation_name": DictColumn(operation, self.endpoint_vocab),
+            "service_name": service_name,
+            "span_kind": DictColumn(np.zeros(n, dtype=np.int32), self.kind_vocab),
+            "start_time": start.astype("datetime64[ms]"),
+            "end_time": (start + duration).astype("datetime64[ms]"),
+            "duration_ms": duration.astype(np.uint64),
+            "status": DictColumn(is_error.astype(np.int32), self.status_vocab),
+            "status_message": constant("", n),
+            "http_method": DictColumn(np.where(is_root, rng.integers(1, len(self.method_vocab), n), 0),
+                                      self.method_vocab),
+            "http_url": DictColumn(np.where(is_root, rng.integers(1, len(self.url_vocab), n), 0),
+                                   self.url_vocab),
+            "http_status_code": http_status.astype(np.uint16),
+            "host": DictColumn(rng.integers(0, self.HOSTS, n), self.host_vocab),
+            "pod": DictColumn(pod_idx, self.pod_vocab),
+            "container": service_name,
+            "attributes": MapColumn.empty(n),
+        }
@@ -18,18 +18,27 @@ It connects directly to the MySQL database and populates:
 Usage:
     python data_generator.py --clear  # Clear and regenerate all data
     python data_generator.py          # Only generate if tables are empty
+    python data_generator.py --metrics-file mysql-load.jsonl  # Rows/s and Python vs MySQL time
+    python data_generator.py --profile profiles/              # cProfile + tracemalloc per create_* step
 """
 
 import argparse
 import random
+import re
+import time
 import uuid
 import json
 import hashlib
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import mysql.connector
 from mysql.connector import Error
 
+from metrics import Metrics, MetricsReporter
+
+INSERT_TABLE = re.compile(r"^\s*INSERT\s+INTO\s+(\w+)", re.IGNORECASE)
+
 
 class DataGenerator:
     """Generates all mock observability data."""
@@ -40,6 +49,9 @@ class DataGenerator:
         self.org_id = None
         self.teams = []
         self.services = {}
+        # Rows per table; time in Python ("generate") vs waiting on MySQL ("write")
+        self.metrics = Metrics()
+        self._handoff = time.perf_counter()
 
     def connect(self):
         """Establish database connection."""
@@ -60,23 +72,39 @@ class DataGenerator:
 
     def execute(self, sql: str, params: tuple = None, fetch: bool = False):
         """Execute SQL and optionally fetch results."""
-        cursor = self.connection.cursor(dictionary=True)
-        cursor.execute(sql, params)
-        if fetch:
-            result = cursor.fetchall()
+        with self._timed(sql, 1):
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            if fetch:
+                result = cursor.fetchall()
+                cursor.close()
+                return result
+            self.connection.commit()
+            last_id = cursor.lastrowid
             cursor.close()
-            return result
-        self.connection.commit()
-        last_id = cursor.lastrowid
-        cursor.close()
-        return last_id
+            return last_id
 
     def execute_many(self, sql: str, data: List[tuple]):
         """Execute SQL for multiple rows."""
-        cursor = self.connection.cursor()
-        cursor.executemany(sql, data)
-        self.connection.commit()
-        cursor.close()
+        with self._timed(sql, len(data)):
+            cursor = self.connection.cursor()
+            cursor.executemany(sql, data)
+            self.connection.commit()
+            cursor.close()
+
+    @contextmanager
+    def _timed(self, sql: str, rows: int):
+        """Account Python time since the last statement as generate, the statement itself as write."""
+        started = time.perf_counter()
+        self.metrics.add_seconds("generate", started - self._handoff)
+        try:
+            yield
+        finally:
+            self._handoff = time.perf_counter()
+            self.metrics.add_seconds("write", self._handoff - started)
+        match = INSERT_TABLE.match(sql)
+        if match:
+            self.metrics.add_rows(match.group(1), rows)
 
     def clear_all_data(self):
         """Clear all existing data from MySQL tables.
@@ -340,46 +368,53 @@ class DataGenerator:
 
 
     # ==================== MAIN RUN ====================
-    def run(self, clear_existing: bool = False):
+    def run(self, clear_existing: bool = False, metrics_interval: float = 10.0, metrics_path: str = None):
         """Run the complete data generation process."""
         if not self.connect():
             return False
 
+        reporter = MetricsReporter(self.metrics.snapshot, interval=metrics_interval, path=metrics_path,
+                                   prefix="datagen_mysql")
+        self._handoff = time.perf_counter()
+        reporter.start()
         try:
             print("\n" + "="*60)
             print("🚀 ObserveX Data Generator")
             print("="*60)
 
-            # Ensure tables exist
-            self.ensure_tables()
+            try:
+                # Ensure tables exist
+                self.ensure_tables()
 
-            # Clear existing data if requested
-            if clear_existing:
-                self.clear_all_data()
+                # Clear existing data if requested
+                if clear_existing:
+                    self.clear_all_data()
 
-            # Create organization
-            org_id = self.create_organization()
+                # Create organization
+                org_id = self.create_organization()
 
-            # Create teams
-            teams = self.create_teams(org_id)
+                # Create teams
+                teams = self.create_teams(org_id)
 
-            # Create users
-            self.create_users(org_id, teams)
+                # Create users
+                self.create_users(org_id, teams)
 
-            # Create services
-            services = self.create_services(org_id, teams)
+                # Create services
+                services = self.create_services(org_id, teams)
 
-            # Skip traces, logs, metrics - those go into ClickHouse
-            # Use clickhouse_data_generator.py for time-series data
+                # Skip traces, logs, metrics - those go into ClickHouse
+                # Use clickhouse_data_generator.py for time-series data
 
-            # Create chart configurations
-            self.create_chart_configs(teams)
+                # Create chart configurations
+                self.create_chart_configs(teams)
 
-            # Create API endpoints
-            self.create_api_endpoints(teams)
+                # Create API endpoints
+                self.create_api_endpoints(teams)
 
-            # Create alerts
-            self.create_alerts(org_id, teams, services)
+                # Create alerts
+                self.create_alerts(org_id, teams, services)
+            finally:
+                reporter.stop()  # Final snapshot/textfile also when a step failed
 
             print("\n" + "="*60)
             print("✅ MySQL data generation complete!")
@@ -426,6 +461,12 @@ Examples:
     parser.add_argument("--user", default="metabase", help="Database user (default: metabase)")
     parser.add_argument("--password", default="metabasepass", help="Database password")
     parser.add_argument("--clear", action="store_true", help="Clear existing data before generating")
+    parser.add_argument("--profile", nargs="?", const="profiles", metavar="DIR",
+                        help="Profile each create_* step (cProfile + tracemalloc), dumping <step>.prof files to DIR")
+    parser.add_argument("--metrics-interval", type=float, default=10,
+                        help="Seconds between throughput lines (0 = summary at the end only)")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="Write metrics to PATH: Prometheus textfile if it ends in .prom, else JSON lines")
 
     args = parser.parse_args()
 
@@ -438,7 +479,15 @@ Examples:
     }
 
     generator = DataGenerator(db_config)
-    success = generator.run(clear_existing=args.clear)
+    profiler = None
+    if args.profile:
+        from profiling import StageProfiler
+        profiler = StageProfiler(args.profile, focus=["execute", "execute_many", "uuid4"])
+        profiler.instrument(generator, [name for name in dir(DataGenerator) if name.startswith("create_")])
+    success = generator.run(clear_existing=args.clear, metrics_interval=args.metrics_interval,
+                            metrics_path=args.metrics_file)
+    if profiler:
+        profiler.report()
     exit(0 if success else 1)
 
 
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Ingestion Path Benchmark for ObserveX
+
+Loads one identical, seeded span/log dataset through every combination of
+transport × format × compression × batch size and reports rows/s, bytes on
+the wire, client CPU seconds and server-side insert time, so production
+defaults for clickhouse_data_generator.py can be picked from data.
+
+Transports and their formats:
+  http    clickhouse_connect (the generator's direct path): rows, columns, arrow
+  native  clickhouse_driver over the native TCP protocol: rows, columns
+  api     backend /api/ingest/* (needs --auth-token): json
+
+HTTP and native inserts are tagged with a per-combination log_comment, and
+duration / NetworkReceiveBytes are read back from system.query_log. For the
+API, bytes on the wire are the request bodies and server time is not available.
+
+Usage:
+    python ingest_benchmark.py                                   # HTTP matrix, 200k rows per table
+    python ingest_benchmark.py --transports http,native --batch-sizes 5000,100000
+    python ingest_benchmark.py --transports api --auth-token <jwt> --batch-sizes 100,1000,5000
+"""
+
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from clickhouse_data_generator import (ClickHouseDataGenerator, SERVICES, LOG_LEVELS, LOG_LEVEL_WEIGHTS,
+                                       HTTP_METHODS, HTTP_STATUS_CODES, HTTP_STATUS_WEIGHTS, INFO_MESSAGES,
+                                       ERROR_MESSAGES, TABLE_COLUMNS, epoch_seconds)
+from columnar_engine import LogBatchGenerator, SpanBatchGenerator, columns_to_rows, slice_batch
+
+TRANSPORT_FORMATS = {
+    "http": ["rows", "columns", "arrow"],
+    "native": ["rows", "columns"],
+    "api": ["json"],
+}
+TRANSPORT_COMPRESSIONS = {
+    "http": ["none", "lz4", "zstd"],
+    "native": ["none", "lz4", "zstd"],
+    "api": ["none"],
+}
+
+
+def build_dataset(rows: int, team_id: str, seed: int) -> Dict[str, Dict]:
+    """Generate roughly `rows` spans and exactly `rows` logs as column batches, stamped over the last hour."""
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    spans = SpanBatchGenerator(SERVICES, "api-gateway", HTTP_METHODS, HTTP_STATUS_CODES,
+                               HTTP_STATUS_WEIGHTS, rng)
+    logs = LogBatchGenerator(SERVICES, LOG_LEVELS, LOG_LEVEL_WEIGHTS, INFO_MESSAGES, ERROR_MESSAGES, rng)
+    traces = max(1, rows * 2 // (SpanBatchGenerator.MIN_CHILDREN + SpanBatchGenerator.MAX_CHILDREN + 2))
+    return {
+        "spans": spans.generate(team_id, int(epoch_seconds(now) * 1000), np.zeros(traces, dtype=np.int64)),
+        "logs": logs.generate(team_id, int(epoch_seconds(now)), np.zeros(rows, dtype=np.int64)),
+    }
+
+
+class NativeWriter:
+    """Inserts over the native protocol with clickhouse_driver (imported only when this transport is used)."""
+
+    def __init__(self, host: str, port: int, database: str, user: str, password: str,
+                 compression: str, log_comment: str):
+        from clickhouse_driver import Client
+        self.client = Client(host=host, port=port, database=database, user=user, password=password,
+                             compression=compression or False, settings={"log_comment": log_comment})
+
+    def insert(self, table: str, data, columnar: bool):
+        self.client.execute(f"INSERT INTO {table} ({', '.join(TABLE_COLUMNS[table])}) VALUES", data,
+                            columnar=columnar)
+
+    def close(self):
+        self.client.disconnect()
+
+
+class IngestBenchmark:
+    """Runs the ingestion matrix against one ClickHouse server (and optionally the backend API)."""
+
+    def __init__(self, host: str, port: int, native_port: int, database: str, user: str, password: str,
+                 api_url: str, auth_token: str = None):
+        self.connection = dict(host=host, port=port, database=database, user=user, password=password)
+        self.native_port = native_port
+        self.api_url = api_url
+        self.auth_token = auth_token
+        self.admin = ClickHouseDataGenerator(**self.connection).client
+
+    def combinations(self, transports: List[str], formats: List[str], compressions: List[str],
+                     batch_sizes: List[int]) -> List[tuple]:
+        combos = []
+        for transport in transports:
+            if transport == "api" and not self.auth_token:
+                print("  ⚠ Skipping api transport: --auth-token not provided")
+                continue
+            if transport == "native":
+                try:
+                    import clickhouse_driver  # noqa: F401
+                except ImportError:
+                    print("  ⚠ Skipping native transport: clickhouse-driver is not installed")
+                    continue
+            for fmt in TRANSPORT_FORMATS[transport]:
+                if transport != "api" and fmt not in formats:
+                    continue
+                for compression in TRANSPORT_COMPRESSIONS[transport]:
+                    if transport != "api" and compression not in compressions:
+                        continue
+                    for batch_size in batch_sizes:
+                        combos.append((transport, fmt, compression, batch_size))
+        return combos
+
+    def run(self, dataset: Dict[str, Dict], combos: List[tuple]) -> List[Dict]:
+        # Input shapes are materialised up front so only encoding + sending is timed, as in the generator
+        rows_input = {table: columns_to_rows(batch, TABLE_COLUMNS[table]) for table, batch in dataset.items()}
+        results = []
+        for transport, fmt, compression, batch_size in combos:
+            tag = f"ingest-bench-{uuid.uuid4().hex[:12]}"
+            wire_bytes = [0]
+            if transport == "native":
+                writer = NativeWriter(port=self.native_port, compression=None if compression == "none" else compression,
+                                      log_comment=tag, **{k: v for k, v in self.connection.items() if k != "port"})
+                send = self._native_sender(writer, fmt, dataset, rows_input, batch_size)
+            else:
+                writer = self._generator(transport, fmt, compression, batch_size, tag, wire_bytes)
+                send = self._generator_sender(writer, fmt, dataset, rows_input, batch_size)
+
+            cpu_started, started = time.process_time(), time.perf_counter()
+            try:
+                rows = send()
+            except Exception as e:
+                print(f"  ⚠ {transport} {fmt} {compression} batch {batch_size:,} failed: {e}")
+                continue
+            finally:
+                if transport == "native":
+                    writer.close()
+            elapsed = time.perf_counter() - started
+            cpu = time.process_time() - cpu_started
+
+            result = {"transport": transport, "format": fmt, "compression": compression, "batch_size": batch_size,
+                      "rows": rows, "seconds": round(elapsed, 3), "rows_per_sec": round(rows / elapsed),
+                      "client_cpu_s": round(cpu, 3), "wire_bytes": wire_bytes[0] or None,
+                      "server_ms": None, "inserts": None, "tag": tag}
+            results.append(result)
+            print(f"  {transport:<6} {fmt:<7} {compression:<4} batch {batch_size:>7,}  "
+                  f"{result['rows_per_sec']:>10,} rows/s  cpu {cpu:6.2f}s")
+
+        self._attach_server_stats(results)
+        return results
+
+    def _generator(self, transport: str, fmt: str, compression: str, batch_size: int, tag: str,
+                   wire_bytes: List[int]) -> ClickHouseDataGenerator:
+        generator = ClickHouseDataGenerator(
+            **self.connection, api_url=self.api_url,
+            auth_token=self.auth_token if transport == "api" else None,
+            engine="python" if fmt == "rows" else "numpy", use_arrow=fmt == "arrow",
+            compression=None if compression == "none" else compression,
+            batch_size=batch_size, api_batch_size=batch_size)
+        generator.quiet = True
+        generator.api_fallback = False  # A failed request is a failed benchmark, not a silent direct insert
+        generator.client.set_client_setting("log_comment", tag)
+
+        def count_body(response, *args, **kwargs):
+            wire_bytes[0] += len(response.request.body or b"")
+
+        generator.http.hooks["response"].append(count_body)
+        return generator
+
+    @staticmethod
+    def _generator_sender(generator: ClickHouseDataGenerator, fmt: str, dataset: Dict[str, Dict],
+                          rows_input: Dict[str, List[list]], batch_size: int):
+        def send() -> int:
+            total = 0
+            for table, batch in dataset.items():
+                n = len(rows_input[table])
+                for start in range(0, n, batch_size):
+                    stop = min(start + batch_size, n)
+                    # rows/json: python-engine row lists; columns/arrow: numpy-engine column batches
+                    chunk = slice_batch(batch, start, stop) if fmt in ("columns", "arrow") else rows_input[table][start:stop]
+                    generator._write_batch(table, generator._encode_batch(table, chunk))
+                    total += stop - start
+            return total
+        return send
+
+    @staticmethod
+    def _native_sender(writer: NativeWriter, fmt: str, dataset: Dict[str, Dict],
+                       rows_input: Dict[str, List[list]], batch_size: int):
+        def send() -> int:
+            total = 0
+            for table in dataset:
+                rows = rows_input[table]
+                for start in range(0, len(rows), batch_size):
+                    chunk = rows[start:start + batch_size]
+                    if fmt == "columns":
+                        writer.insert(table, [list(col) for col in zip(*chunk)], columnar=True)
+                    else:
+                        writer.insert(table, chunk, columnar=False)
+                    total += len(chunk)
+            return total
+        return send
+
+    def _attach_server_stats(self, results: List[Dict]):
+        """Sum insert duration and received bytes per combination from system.query_log."""
+        tags = [r["tag"] for r in results if r["transport"] != "api"]
+        if not tags:
+            return
+        try:
+            self.admin.command("SYSTEM FLUSH LOGS")
+            stats = self.admin.query(
+                "SELECT log_comment, count(), sum(query_duration_ms), "
+                "sum(ProfileEvents['NetworkReceiveBytes']) "
+                "FROM system.query_log WHERE type = 'QueryFinish' AND query_kind = 'Insert' "
+                "AND log_comment IN %(tags)s GROUP BY log_comment",
+                parameters={"tags": tags})
+        except Exception as e:
+            print(f"  ⚠ system.query_log unavailable, server-side columns left empty: {e}")
+            return
+        by_tag = {row[0]: row[1:] for row in stats.result_rows}
+        for result in results:
+            if result["tag"] in by_tag:
+                inserts, server_ms, received = by_tag[result["tag"]]
+                result.update(inserts=inserts, server_ms=server_ms, wire_bytes=received)
+
+
+def print_table(results: List[Dict]):
+    print(f"\n  {'transport':<9} {'format':<7} {'comp':<5} {'batch':>8} {'rows/s':>11} {'MB wire':>9} "
+          f"{'B/row':>7} {'cpu s':>7} {'server ms':>10} {'inserts':>8}")
+    for r in sorted(results, key=lambda r: r["rows_per_sec"], reverse=True):
+        wire = f"{r['wire_bytes'] / 1e6:9.1f}" if r["wire_bytes"] else f"{'-':>9}"
+        per_row = f"{r['wire_bytes'] / r['rows']:7.1f}" if r["wire_bytes"] else f"{'-':>7}"
+        server = f"{r['server_ms']:>10,}" if r["server_ms"] is not None else f"{'-':>10}"
+        inserts = f"{r['inserts']:>8,}" if r["inserts"] is not None else f"{'-':>8}"
+        print(f"  {r['transport']:<9} {r['format']:<7} {r['compression']:<5} {r['batch_size']:>8,} "
+              f"{r['rows_per_sec']:>11,} {wire} {per_row} {r['client_cpu_s']:>7.2f} {server} {inserts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ObserveX ingestion paths")
+    parser.add_argument("--host", default="localhost", help="ClickHouse host")
+    parser.add_argument("--port", type=int, default=8123, help="ClickHouse HTTP port")
+    parser.add_argument("--native-port", type=int, default=9000, help="ClickHouse native protocol port")
+    parser.add_argument("--database", default="observex", help="Database name")
+    parser.add_argument("--user", default="observex", help="Username")
+    parser.add_argument("--password", default="observex123", help="Password")
+    parser.add_argument("--api-url", default="http://localhost:13000", help="Backend API URL")
+    parser.add_argument("--auth-token", help="JWT authentication token (enables the api transport)")
+    parser.add_argument("--team-id", default="11111111-1111-1111-1111-111111111111", help="Team UUID for the dataset")
+    parser.add_argument("--rows", type=int, default=200_000, help="Approximate rows per table in the dataset")
+    parser.add_argument("--seed", type=int, default=42, help="Dataset seed (identical data for every combination)")
+    parser.add_argument("--transports", default="http,native,api", help="Comma-separated: http, native, api")
+    parser.add_argument("--formats", default="rows,columns,arrow", help="Comma-separated: rows, columns, arrow")
+    parser.add_argument("--compressions", default="none,lz4,zstd", help="Comma-separated: none, lz4, zstd")
+    parser.add_argument("--batch-sizes", default="1000,5000,20000,100000", help="Comma-separated rows per insert")
+    parser.add_argument("--output", help="Write the JSON results here")
+
+    args = parser.parse_args()
+    benchmark = IngestBenchmark(host=args.host, port=args.port, native_port=args.native_port,
+                                database=args.database, user=args.user, password=args.password,
+                                api_url=args.api_url, auth_token=args.auth_token)
+    combos = benchmark.combinations(args.transports.split(","), args.formats.split(","),
+                                    args.compressions.split(","), [int(b) for b in args.batch_sizes.split(",")])
+
+    print(f"\n📦 Building dataset (~{args.rows:,} rows per table, seed {args.seed})...")
+    dataset = build_dataset(args.rows, args.team_id, args.seed)
+    print(f"  ✓ {len(dataset['spans']['team_id']):,} spans, {len(dataset['logs']['team_id']):,} logs")
+
+    print(f"\n⏱️  Running {len(combos)} combinations...")
+    results = benchmark.run(dataset, combos)
+    print_table(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "seed": args.seed, "results": results}, f, indent=2)
+        print(f"\n✓ Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Stand-in ingestion server for benchmarking the /api/ingest/* client path.
+
+Implements the TelemetryIngestionController contracts without the Spring
+backend, MySQL, ClickHouse or Redis:
+
+  POST /api/ingest/spans   JSON array of SpanRequest  -> {"ingested", "teamId", "type": "spans"}
+  POST /api/ingest/logs    JSON array of LogRequest   -> {"ingested", "teamId", "type": "logs"}
+  POST /api/ingest/batch   {"spans": [...], "logs": [...]} -> {"spansIngested", "logsIngested", "teamId"}
+  POST /api/auth/login     any credentials -> {"token": ...} (for clients that log in first)
+  POST /v1/traces, /v1/logs  OTLP/HTTP export requests (protobuf or JSON by
+                             Content-Type, no auth), like a collector's otlphttp
+                             receiver: empty Export*ServiceResponse, 400 if unparsable
+  GET  /stats              counters so far as JSON; POST /stats/reset clears them
+
+Every answer uses the ApiResponse envelope (success, data or error, timestamp).
+Request bodies (gzip with Content-Encoding: gzip) are parsed and then discarded;
+only rows, wire bytes and handling time are recorded, per route. A body that is not JSON of the right shape gets what
+the backend's GlobalExceptionHandler gives it: 500 INTERNAL_ERROR. Entries are
+then checked, answering 400 VALIDATION_ERROR with fieldErrors:
+
+  --validate types    JSON type of every DTO field (default)
+  --validate strict   also @NotBlank/@Pattern/@Positive of SpanRequest and
+                      LogRequest. The controller has no @Valid, so the backend
+                      itself accepts such entries (the generator's TRACE logs
+                      fail @Pattern, for instance)
+  --validate none     parse only
+
+Faults, chosen per request, map onto the classes in retry.py:
+
+  --latency/--jitter     added handling time (plus --per-row-us per entry)
+  --error-rate           answer --error-status (default 503: retried by clients)
+  --drop-rate            read the body, then close the connection without an answer (ambiguous)
+  --stall-rate           read the body, then hold the request for --stall-seconds (client timeout, ambiguous)
+
+Usage:
+    python ingest_server.py                                   # :18080, type validation, no faults
+    python ingest_server.py --latency 20 --jitter 10 --error-rate 0.01 --drop-rate 0.001
+    python ingest_server.py --validate none --output server.json  # Parse only; write stats on exit
+    python clickhouse_data_generator.py --auth-token test --api-url http://localhost:18080 --engine numpy
+    python clickhouse_data_generator.py --engine numpy --sink otlp --otlp-endpoint http://localhost:18080
+"""
+
+import argparse
+import gzip
+import json
+import random
+import re
+import signal
+import threading
+import time
+import zlib
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from loadgen import percentiles
+from otlp import CONTENT_TYPES as OTLP_CONTENT_TYPES
+from otlp import count_records
+
+# DTO fields: name -> (JSON type, message if required, pattern, pattern message), as annotated in
+# SpanRequest.java / LogRequest.java
+Field = Tuple[type, Optional[str], Optional[str], Optional[str]]
+
+SPAN_FIELDS: Dict[str, Field] = {
+    "spanId": (str, "Span ID is required", None, None),
+    "traceId": (str, "Trace ID is required", None, None),
+    "parentSpanId": (str, None, None, None),
+    "operationName": (str, "Operation name is required", None, None),
+    "serviceName": (str, "Service name is required", None, None),
+    "isRoot": (bool, None, None, None),
+    "spanKind": (str, None, "SERVER|CLIENT|INTERNAL|PRODUCER|CONSUMER", "Invalid span kind"),
+    "startTime": (str, None, None, None),
+    "endTime": (str, None, None, None),
+    "durationMs": (int, None, None, None),
+    "status": (str, None, "OK|ERROR", "Status must be OK or ERROR"),
+    "statusMessage": (str, None, None, None),
+    "httpMethod": (str, None, None, None),
+    "httpUrl": (str, None, None, None),
+    "httpStatusCode": (int, None, None, None),
+    "host": (str, None, None, None),
+    "pod": (str, None, None, None),
+    "container": (str, None, None, None),
+    "attributes": (dict, None, None, None),
+}
+
+LOG_FIELDS: Dict[str, Field] = {
+    "serviceName": (str, "Service name is required", None, None),
+    "level": (str, "Log level is required", "DEBUG|INFO|WARN|ERROR|FATAL", "Invalid log level"),
+    "message": (str, "Message is required", None, None),
+    "logger": (str, None, None, None),
+    "traceId": (str, None, None, None),
+    "spanId": (str, None, None, None),
+    "host": (str, None, None, None),
+    "pod": (str, None, None, None),
+    "container": (str, None, None, None),
+    "thread": (str, None, None, None),
+    "exception": (str, None, None, None),
+    "attributes": (dict, None, None, None),
+    "timestamp": (int, None, None, None),
+}
+
+MAX_FIELD_ERRORS = 20  # Per response; a systematically wrong client would otherwise get one per entry
+
+_PATTERNS: Dict[str, "re.Pattern"] = {}
+
+
+class PayloadError(Exception):
+    """The body does not bind to the endpoint's request type (Jackson would throw)."""
+
+
+def entry_errors(entry: Dict, fields: Dict[str, Field], prefix: str, errors: Dict[str, str],
+                 annotations: bool = True):
+    """Add "<prefix>.<field>" -> message for every type (and annotation) violation of one entry."""
+    for name, (kind, required, pattern, pattern_message) in fields.items():
+        value = entry.get(name)
+        key = f"{prefix}.{name}"
+        if value is None:
+            if required and annotations:
+                errors[key] = required
+            continue
+        if kind is int and (isinstance(value, bool) or not isinstance(value, int)) or \
+                kind is not int and not isinstance(value, kind):
+            errors[key] = f"Expected {kind.__name__}, got {type(value).__name__}"
+        elif kind is dict and not all(isinstance(v, str) for v in value.values()):
+            errors[key] = "Expected a map of strings"
+        elif not annotations:
+            continue
+        elif kind is str and required and not value.strip():
+            errors[key] = required
+        elif kind is str and pattern and not _PATTERNS.setdefault(pattern, re.compile(pattern)).fullmatch(value):
+            errors[key] = pattern_message
+        elif name == "timestamp" and value <= 0:
+            errors[key] = "Timestamp must be positive"
+
+
+def validate_entries(entries, fields: Dict[str, Field], prefix: str = "", mode: str = "types") -> Dict[str, str]:
+    """Field errors of a list of entries ({} if valid); raises PayloadError if it is not a list of objects."""
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise PayloadError(f"{prefix or 'body'}: expected a JSON array of objects")
+    errors = {}
+    if mode != "none":
+        for i, entry in enumerate(entries):
+            entry_errors(entry, fields, f"{prefix}[{i}]", errors, annotations=mode == "strict")
+            if len(errors) >= MAX_FIELD_ERRORS:
+                break
+    return errors
+
+
+def api_response(data: Dict = None, error: Dict = None) -> Dict:
+    """The ApiResponse envelope (null members omitted, like @JsonInclude(NON_NULL))."""
+    body = {"success": error is None}
+    if error is None:
+        body["data"] = data
+    else:
+        body["error"] = error
+    body["timestamp"] = datetime.utcnow().isoformat() + "Z"
+    return body
+
+
+def api_error(code: str, message: str, path: str, field_errors: Dict[str, str] = None) -> Dict:
+    error = {"code": code, "message": message, "timestamp": datetime.utcnow().isoformat() + "Z",
+             "path": f"uri={path}"}
+    if field_errors:
+        error["fieldErrors"] = field_errors
+    return api_response(error=error)
+
+
+class ServerStats:
+    """Thread-safe per-route request/row/byte counters and handling latencies."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.perf_counter()
+            self.routes: Dict[str, Dict] = {}
+            self.latencies_ms: Dict[str, List[float]] = {}
+            self._interval: Dict[str, List[float]] = {}
+
+    def record(self, route: str, status: int, rows: int, nbytes: int, latency_ms: float):
+        with self._lock:
+            counters = self.routes.setdefault(route, {"requests": 0, "rows": 0, "bytes": 0, "statuses": {}})
+            counters["requests"] += 1
+            counters["bytes"] += nbytes
+            label = str(status) if status else "no answer"  # Dropped or stalled by the fault plan
+            counters["statuses"][label] = counters["statuses"].get(label, 0) + 1
+            if status == 200:
+                counters["rows"] += rows
+            self.latencies_ms.setdefault(route, []).append(latency_ms)
+            self._interval.setdefault(route, []).append(latency_ms)
+
+    def interval(self) -> Dict[str, List[float]]:
+        """Latencies per route since the previous call."""
+        with self._lock:
+            interval, self._interval = self._interval, {}
+        return interval
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            elapsed = time.perf_counter() - self.started
+            routes = {}
+            for route, counters in self.routes.items():
+                latencies = self.latencies_ms[route]
+                routes[route] = dict(counters, rows_per_s=round(counters["rows"] / elapsed, 1),
+                                     mb_per_s=round(counters["bytes"] / elapsed / 2**20, 3),
+                                     latency=percentiles(latencies))
+        return {"elapsed_s": round(elapsed, 1), "routes": routes}
+
+
+class FaultPlan:
+    """Injected latency and failures, drawn independently for every request."""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, per_row_us: float = 0,
+                 error_rate: float = 0, error_status: int = 503, drop_rate: float = 0,
+                 stall_rate: float = 0, stall_seconds: float = 60, seed: int = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_row_us = per_row_us
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.drop_rate = drop_rate
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, rows: int) -> float:
+        """Seconds to hold this request: latency + exponential jitter + per-row cost."""
+        with self._lock:
+            jitter = self.rng.expovariate(1 / self.jitter_ms) if self.jitter_ms else 0
+        return (self.latency_ms + jitter) / 1000 + rows * self.per_row_us / 1e6
+
+    def fault(self) -> Optional[str]:
+        """"error", "drop", "stall" or None."""
+        with self._lock:
+            draw = self.rng.random()
+        for kind, rate in (("error", self.error_rate), ("drop", self.drop_rate), ("stall", self.stall_rate)):
+            if draw < rate:
+                return kind
+            draw -= rate
+        return None
+
+    def describe(self) -> str:
+        parts = []
+        if self.latency_ms or self.jitter_ms or self.per_row_us:
+            parts.append(f"latency {self.latency_ms:g}ms + exp({self.jitter_ms:g}ms) + {self.per_row_us:g}us/row")
+        if self.error_rate:
+            parts.append(f"{self.error_rate:.2%} HTTP {self.error_status}")
+        if self.drop_rate:
+            parts.append(f"{self.drop_rate:.2%} dropped connections")
+        if self.stall_rate:
+            parts.append(f"{self.stall_rate:.2%} stalled {self.stall_seconds:g}s")
+        return ", ".join(parts) or "no faults"
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the backend's Tomcat connector
+    server: "IngestServer"
+
+    def log_message(self, format, *args):
+        pass  # One line per request would dominate the benchmark
+
+    def _send(self, status: int, body: Dict):
+        self._send_bytes(status, json.dumps(body).encode(), "application/json")
+
+    def _send_bytes(self, status: int, payload: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send(200, api_response(self.server.stats.snapshot()))
+        else:
+            self._send(404, api_error("NOT_FOUND", f"No handler for GET {self.path}", self.path))
+
+    def do_POST(self):
+        started = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        route = self.path.split("?", 1)[0]
+        if route == "/stats/reset":
+            self.server.stats.reset()
+            self._send(200, api_response({"reset": True}))
+            return
+        if route == "/api/auth/login":
+            self._send(200, api_response({"token": "ingest-server-token", "user": {"email": "demo@observex.io"}}))
+            return
+        if route in ("/v1/traces", "/v1/logs"):
+            status, response, rows = self.export(route, body)
+        elif route not in ("/api/ingest/spans", "/api/ingest/logs", "/api/ingest/batch"):
+            self._send(404, api_error("NOT_FOUND", f"No handler for POST {route}", route))
+            return
+        elif not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._send(401, api_error("UNAUTHORIZED", "Full authentication is required", route))
+            self.server.stats.record(route, 401, 0, len(body), (time.perf_counter() - started) * 1000)
+            return
+        else:
+            status, response, rows = self.ingest(route, body)
+        faults = self.server.faults
+        fault = faults.fault()
+        time.sleep(faults.delay(rows))
+        if fault == "drop":
+            self.close_connection = True  # Body consumed, no answer: the client cannot tell if it landed
+            status = 0
+        elif fault == "stall":
+            time.sleep(faults.stall_seconds)
+            self.close_connection = True
+            status = 0
+        else:
+            if fault == "error":
+                status = faults.error_status
+                response = api_error("INJECTED_ERROR", f"Injected HTTP {status}", route)
+            if isinstance(response, tuple):  # OTLP: (body, Content-Type)
+                self._send_bytes(status, *response)
+            else:
+                self._send(status, response)
+        self.server.stats.record(route, status, rows, len(body), (time.perf_counter() - started) * 1000)
+
+    def ingest(self, route: str, body: bytes) -> Tuple[int, Dict, int]:
+        """(status, ApiResponse, rows) for one ingest request."""
+        mode = self.server.validate
+        team_id = self.server.team_id
+        try:
+            if self.headers.get("Content-Encoding", "").lower() == "gzip":  # --api-gzip; bytes stay wire bytes
+                body = gzip.decompress(body)
+            payload = json.loads(body)
+            if route == "/api/ingest/batch":
+                if not isinstance(payload, dict):
+                    raise PayloadError("body: expected a JSON object")
+                spans, logs = payload.get("spans", []), payload.get("logs", [])
+                errors = validate_entries(spans, SPAN_FIELDS, "spans", mode)
+                errors.update(validate_entries(logs, LOG_FIELDS, "logs", mode))
+                data = {"spansIngested": len(spans), "logsIngested": len(logs), "teamId": team_id}
+                rows = len(spans) + len(logs)
+            else:
+                kind = route.rsplit("/", 1)[1]
+                errors = validate_entries(payload, SPAN_FIELDS if kind == "spans" else LOG_FIELDS, mode=mode)
+                data = {"ingested": len(payload), "teamId": team_id, "type": kind}
+                rows = len(payload)
+        except (ValueError, PayloadError, OSError, EOFError, zlib.error) as e:  # Not JSON, or not gzip
+            if self.server.verbose:
+                print(f"  ❌ {route}: {e}")
+            return 500, api_error("INTERNAL_ERROR", "An unexpected error occurred", route), 0
+        if errors:
+            if self.server.verbose:
+                print(f"  ❌ {route}: {len(errors)} field errors, e.g. {next(iter(errors.items()))}")
+            return 400, api_error("VALIDATION_ERROR", "Request validation failed", route, errors), 0
+        return 200, api_response(data), rows
+
+    def export(self, route: str, body: bytes) -> Tuple[int, Tuple[bytes, str], int]:
+        """(status, (body, Content-Type), records) for one OTLP/HTTP export request."""
+        content_type = self.headers.get("Content-Type", "").split(";", 1)[0].strip()
+        fmt = "json" if content_type == OTLP_CONTENT_TYPES["json"] else "proto"
+        try:
+            if self.headers.get("Content-Encoding", "").lower() == "gzip":
+                body = gzip.decompress(body)
+            rows = count_records(body, fmt)
+        except (ValueError, AttributeError, TypeError, OSError, EOFError, zlib.error) as e:
+            if self.server.verbose:
+                print(f"  ❌ {route}: {e}")
+            # google.rpc.Status{code: 3 (INVALID_ARGUMENT)}
+            error = json.dumps({"code": 3, "message": str(e)}).encode() if fmt == "json" else b"\x08\x03"
+            return 400, (error, OTLP_CONTENT_TYPES[fmt]), 0
+        # An empty Export*ServiceResponse: everything accepted
+        return 200, (b"{}" if fmt == "json" else b"", OTLP_CONTENT_TYPES[fmt]), rows
+
+
+class IngestServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], faults: FaultPlan, validate: str = "types", team_id: int = 1,
+                 verbose: bool = False):
+        super().__init__(address, IngestHandler)
+        self.faults = faults
+        self.validate = validate
+        self.team_id = team_id
+        self.verbose = verbose
+        self.stats = ServerStats()
+
+
+def report_loop(server: IngestServer, interval: float, stop: threading.Event):
+    """Print requests/rows/bytes per second and handling latency per route every interval."""
+    last = server.stats.snapshot()
+    while not stop.wait(interval):
+        current = server.stats.snapshot()
+        interval_latencies = server.stats.interval()
+        for route, counters in sorted(current["routes"].items()):
+            before = last["routes"].get(route, {"requests": 0, "rows": 0, "bytes": 0})
+            if counters["requests"] == before["requests"]:
+                continue
+            print(f"  [{current['elapsed_s']:7.1f}s] {route:<18} "
+                  f"{(counters['requests'] - before['requests']) / interval:>8,.1f} req/s "
+                  f"{(counters['rows'] - before['rows']) / interval:>10,.0f} rows/s "
+                  f"{(counters['bytes'] - before['bytes']) / interval / 2**20:>7.1f} MB/s  "
+                  f"{percentiles(interval_latencies.get(route, []))}")
+        last = current
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt  # SIGTERM (kill, docker stop) ends the run like Ctrl-C, stats included
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the backend /api/ingest/* endpoints and an OTLP/HTTP receiver")
+    parser.add_argument("--bind", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=18080, help="Port to listen on")
+    parser.add_argument("--validate", choices=["types", "strict", "none"], default="types",
+                        help="types: JSON types of the DTO fields; strict: also the DTO annotations; "
+                             "none: parse JSON only")
+    parser.add_argument("--team-id", type=int, default=1, help="teamId reported in responses")
+    parser.add_argument("--latency", type=float, default=0, help="Added handling time per request (ms)")
+    parser.add_argument("--jitter", type=float, default=0, help="Mean of exponential extra latency (ms)")
+    parser.add_argument("--per-row-us", type=float, default=0, help="Added handling time per entry (microseconds)")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered --error-status")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected errors")
+    parser.add_argument("--drop-rate", type=float, default=0,
+                        help="Fraction of requests whose connection is closed without an answer")
+    parser.add_argument("--stall-rate", type=float, default=0, help="Fraction of requests held for --stall-seconds")
+    parser.add_argument("--stall-seconds", type=float, default=60, help="How long a stalled request is held")
+    parser.add_argument("--seed", type=int, help="Random seed for fault injection")
+    parser.add_argument("--report-interval", type=float, default=5, help="Seconds between reports (0 = none)")
+    parser.add_argument("--output", help="Write the final stats as JSON here on exit")
+    parser.add_argument("--verbose", action="store_true", help="Print every rejected request")
+
+    args = parser.parse_args()
+    if args.error_rate + args.drop_rate + args.stall_rate > 1:
+        parser.error("--error-rate + --drop-rate + --stall-rate must not exceed 1")
+    faults = FaultPlan(latency_ms=args.latency, jitter_ms=args.jitter, per_row_us=args.per_row_us,
+                       error_rate=args.error_rate, error_status=args.error_status, drop_rate=args.drop_rate,
+                       stall_rate=args.stall_rate, stall_seconds=args.stall_seconds, seed=args.seed)
+    server = IngestServer((args.bind, args.port), faults, validate=args.validate, team_id=args.team_id,
+                          verbose=args.verbose)
+    print(f"🛬 Ingest server on http://{args.bind}:{args.port} (validation: {args.validate}; {faults.describe()})")
+
+    signal.signal(signal.SIGTERM, _interrupt)
+    stop = threading.Event()
+    if args.report_interval > 0:
+        threading.Thread(target=report_loop, args=(server, args.report_interval, stop), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+    stats = server.stats.snapshot()
+    print(f"\n📊 {stats['elapsed_s']:,.1f}s:")
+    for route, counters in sorted(stats["routes"].items()):
+        statuses = ", ".join(f"{status}: {count:,}" for status, count in sorted(counters["statuses"].items()))
+        print(f"  {route:<18} {counters['requests']:,} requests ({statuses}), {counters['rows']:,} rows, "
+              f"{counters['bytes'] / 2**20:,.1f} MB, {counters['latency']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(stats, f, indent=2)
+        print(f"✓ Wrote stats to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Rate-paced continuous load for the ClickHouse data generator (--rate mode).
+
+Each table is a LoadStream: one producer thread generates live, now-timestamped
+batches and paces them with a token bucket; a pool of sender threads writes
+them to the configured sink (backend /api/ingest/* or ClickHouse directly) and
+times every request. If the senders cannot keep up, the bounded hand-off queue
+fills and the achieved rate drops below target, which is where the sink
+saturates.
+
+Every report interval each stream prints achieved rows/s against target,
+p50/p99/p999 request latency over the interval and the running error count.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+_DONE = object()
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `capacity`; acquire() blocks until tokens are available."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        if not rate > 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity  # One second of burst by default
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+
+    def acquire(self, n: float):
+        # Requests larger than the bucket are admitted once it is full and leave it in debt
+        needed = min(n, self.capacity)
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= needed:
+                self.tokens -= n
+                return
+            time.sleep((needed - self.tokens) / self.rate)
+
+
+class LatencyRecorder:
+    """Thread-safe per-request latency/row/error counters with interval snapshots."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._interval: List[float] = []
+        self._interval_rows = 0
+        self.total_requests = 0
+        self.total_rows = 0
+        self.errors = 0
+        self.latencies_ms: List[float] = []
+
+    def record(self, latency_ms: float, rows: int, ok: bool):
+        with self._lock:
+            self.total_requests += 1
+            if not ok:
+                self.errors += 1
+                return
+            self._interval.append(latency_ms)
+            self._interval_rows += rows
+            self.total_rows += rows
+            self.latencies_ms.append(latency_ms)
+
+    def snapshot(self) -> Tuple[List[float], int]:
+        """Latencies and successful rows since the previous snapshot."""
+        with self._lock:
+            latencies, rows = self._interval, self._interval_rows
+            self._interval, self._interval_rows = [], 0
+        return latencies, rows
+
+
+def percentiles(latencies_ms: List[float]) -> str:
+    if not latencies_ms:
+        return "p50 -, p99 -, p999 -"
+    p50, p99, p999 = np.percentile(latencies_ms, [50, 99, 99.9])
+    return f"p50 {p50:.1f}ms, p99 {p99:.1f}ms, p999 {p999:.1f}ms"
+
+
+class LoadStream:
+    """One paced table stream: producer -> bounded queue -> sender threads."""
+
+    def __init__(self, name: str, rate: float, produce: Callable[[], Tuple[object, int]],
+                 senders: List[Callable[[object], None]], queue_size: int = 8):
+        self.name = name
+        self.rate = rate
+        self.produce = produce
+        self.senders = senders
+        self.bucket = TokenBucket(rate)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.recorder = LatencyRecorder()
+        self.last_error = None
+        self.producer_error = None  # Why the producer stopped before the deadline, if it did
+        self._threads: List[threading.Thread] = []
+
+    def start(self, deadline: float):
+        for i, send in enumerate(self.senders):
+            self._threads.append(threading.Thread(target=self._send_loop, args=(send,),
+                                                  name=f"{self.name}-sender-{i}", daemon=True))
+        producer = threading.Thread(target=self._produce_loop, args=(deadline,),
+                                    name=f"{self.name}-producer", daemon=True)
+        for thread in self._threads:
+            thread.start()
+        producer.start()
+        self._threads.append(producer)
+
+    def _produce_loop(self, deadline: float):
+        try:
+            while time.monotonic() < deadline:
+                batch, rows = self.produce()
+                self.bucket.acquire(rows)
+                self.queue.put((batch, rows))
+        except Exception as e:
+            self.producer_error = e
+        finally:
+            # Always release the senders, or join() would wait on them forever
+            for _ in self.senders:
+                self.queue.put(_DONE)
+
+    def _send_loop(self, send: Callable[[object], None]):
+        while True:
+            item = self.queue.get()
+            if item is _DONE:
+                return
+            batch, rows = item
+            started = time.perf_counter()
+            try:
+                send(batch)
+                ok = True
+            except Exception as e:
+                self.last_error = e
+                ok = False
+            self.recorder.record((time.perf_counter() - started) * 1000, rows, ok)
+
+    def alive(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+
+def run_streams(streams: List[LoadStream], duration: float, report_interval: float = 5.0) -> Dict[str, Dict]:
+    """Run all streams for `duration` seconds, printing a status line per stream every interval."""
+    started = time.monotonic()
+    for stream in streams:
+        stream.start(started + duration)
+
+    last = started
+    while any(stream.alive() for stream in streams):
+        time.sleep(min(report_interval, max(0.1, started + duration - time.monotonic())))
+        now = time.monotonic()
+        if now - last < report_interval and any(stream.alive() for stream in streams):
+            continue
+        interval, last = now - last, now
+        for stream in streams:
+            latencies, rows = stream.recorder.snapshot()
+            print(f"  [{now - started:6.1f}s] {stream.name:<6} {rows / interval:>10,.0f}/s "
+                  f"(target {stream.rate:,.0f}/s)  {percentiles(latencies)}  "
+                  f"errors {stream.recorder.errors}  queued {stream.queue.qsize()}")
+
+    elapsed = time.monotonic() - started
+    summary = {}
+    for stream in streams:
+        stream.join()
+        recorder = stream.recorder
+        summary[stream.name] = {
+            "target_rate": stream.rate,
+            "achieved_rate": recorder.total_rows / elapsed,
+            "requests": recorder.total_requests,
+            "errors": recorder.errors,
+            "latency": percentiles(recorder.latencies_ms),
+            "producer_error": str(stream.producer_error) if stream.producer_error is not None else None,
+        }
+        print(f"  ✓ {stream.name:<6} {recorder.total_rows:,} rows, {recorder.total_rows / elapsed:,.0f}/s sustained "
+              f"(target {stream.rate:,.0f}/s), {recorder.total_requests:,} requests, {recorder.errors} errors, "
+              f"{percentiles(recorder.latencies_ms)}")
+        if stream.last_error is not None:
+            print(f"    last error: {stream.last_error}")
+        if stream.producer_error is not None:
+            print(f"    ❌ producer stopped early: {type(stream.producer_error).__name__}: {stream.producer_error}")
+    return summary
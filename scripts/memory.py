@@ -0,0 +1,101 @@
+"""
+Memory ceiling for the ClickHouse data generator (--max-memory).
+
+Every stage streams fixed-size batches, so peak memory does not grow with the
+volume generated (hours, teams, incidents per day). It is bounded by the
+batches alive at once:
+
+  peak ≈ baseline + in_flight × batch_rows × (row_bytes + encoded_bytes)
+                  + max_buffered_rows × row_bytes          (--partition-batching)
+
+  in_flight   2 without --pipeline (one batch generated, one encoded),
+              2 * queue_depth + 3 with it (see pipeline.py)
+  batch_rows  --batch-size (python engine), 100,000 (numpy engine) or
+              --partition-block-rows with --partition-batching
+
+The per-row costs below were measured with tracemalloc on generated spans and
+logs and rounded up. MemoryGuard first scales batch sizes down by powers of
+two until this estimate fits the limit. It then samples the process RSS on
+every batch and halves the batch sizes again whenever RSS is above 90% of the
+limit and still growing, instead of letting the heap grow. The limit applies
+per process (each --workers process gets its own).
+"""
+
+import gc
+import os
+import re
+import resource
+import sys
+from typing import Callable, Optional
+
+# Bytes per row of a generated batch, by engine
+ROW_BYTES = {"python": 700, "numpy": 200}
+# Extra bytes per row of an encoded batch, by encoding (see _encode_batch)
+ENCODED_ROW_BYTES = {"rows": 0, "arrow": 100, "columns": 700, "native": 700, "api": 1300, "json": 900,
+                     "otlp": 1300, "none": 0}
+# Extra bytes per log row with --message-corpus (one str per message, stack traces on errors)
+CORPUS_ROW_BYTES = 300
+# Extra bytes per attributes map entry with --cardinality (key/value codes plus decoded Arrow strings)
+ATTRIBUTE_ENTRY_BYTES = 50
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$", re.IGNORECASE)
+
+
+def parse_size(value: str) -> int:
+    """Parse "512M", "2G", "1.5GiB" or a plain byte count."""
+    match = _SIZE.match(value)
+    if not match:
+        raise ValueError(f"Invalid size '{value}', expected e.g. 512M or 2G")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** "bkmgt".index(unit.lower() or "b"))
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryGuard:
+    """Scales batch sizes down (by halves) to keep the process under a memory limit."""
+
+    def __init__(self, limit: int, high_water: float = 0.9, min_scale: float = 1 / 64):
+        self.limit = limit
+        self.high_water = high_water
+        self.min_scale = min_scale
+        self.scale = 1.0
+        self.exhausted = False  # Over the limit at the smallest batch size
+        self._shrunk_at = 0  # RSS when the scale was last halved
+
+    def fit(self, estimate: Callable[[float], int]) -> float:
+        """Shrink the scale until estimate(scale) fits under the limit; returns the scale."""
+        while estimate(self.scale) > self.limit * self.high_water and self.scale > self.min_scale:
+            self.scale /= 2
+        return self.scale
+
+    def check(self) -> Optional[int]:
+        """Halve the scale if RSS is above the high-water mark and still growing; returns the RSS when it did."""
+        if self.exhausted:
+            return None
+        # Freed batches are not always returned to the OS, so only act while RSS keeps growing
+        threshold = max(self.limit * self.high_water, self._shrunk_at + self.limit * 0.05)
+        if current_rss() <= threshold:
+            return None
+        gc.collect()  # Cycles from finished batches first; maybe that is enough
+        rss = current_rss()
+        if rss <= threshold:
+            return None
+        if self.scale <= self.min_scale:
+            self.exhausted = True
+            return None
+        self.scale /= 2
+        self._shrunk_at = rss
+        return rss
+
+
+def format_size(n: float) -> str:
+    return f"{n / 2**20:,.0f} MB" if n < 2**30 else f"{n / 2**30:,.2f} GB"
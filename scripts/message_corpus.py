@@ -0,0 +1,178 @@
+"""
+Zipfian log message corpus for the ClickHouse data generator (--message-corpus).
+
+logs.message carries INDEX idx_message TYPE tokenbf_v1(32768, 3, 0)
+GRANULARITY 4: a 32 KB bloom filter over the alphanumeric tokens of every
+4 granules (32,768 rows), probed with 3 hashes. With the twelve fixed messages
+every filter holds the same ~30 tokens, so any lookup is decided trivially.
+Real logs put thousands of distinct tokens into each block, and that is what
+fills the filters and sets their false-positive rate.
+
+A message is built from:
+  template    one of `templates` statement skeletons (fixed vocabulary words
+              plus key=value parameter slots), picked by Zipf rank: a handful
+              of log statements produce most lines
+  parameters  per-row ids, durations, request ids, IPs and user names; the
+              high-cardinality tokens
+  words       a lognormal number of extra vocabulary words, for the long tail
+              of line lengths
+  needle      with probability needle_rate, one of `needles` rare tokens
+              (needle0000, needle0001, ...) that search_benchmark.py looks up
+
+Vocabulary words are drawn with Zipf(zipf) frequencies. ERROR rows also get
+a stack trace with a geometric number of frames (mean ~trace_depth).
+
+The vocabulary, templates and frames depend only on the constructor arguments
+and seed, so worker processes and the search benchmark rebuild the same
+corpus. Per-row choices come from the caller's RNG.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+from columnar_engine import random_hex_ids, vocabulary
+
+# Most frequent words first: the head of the Zipf distribution reads like real logs
+COMMON_WORDS = [
+    "request", "user", "failed", "completed", "connection", "timeout", "cache", "query", "error", "retry",
+    "session", "order", "payment", "started", "processing", "received", "sent", "response", "database",
+    "token", "invalid", "update", "create", "delete", "event", "message", "queue", "worker", "job",
+    "handler", "service", "client", "server", "status", "config", "loaded", "missing", "expired", "lock",
+    "acquired", "released", "batch", "commit", "rollback", "transaction", "upstream", "downstream", "latency",
+]
+SYLLABLES = [
+    "ka", "to", "ri", "mo", "sa", "ne", "lu", "pi", "da", "ve", "zo", "ba", "ti", "ro", "me", "fu", "ga", "shi",
+    "nor", "tal", "ven", "dex", "quin", "lor", "mar", "pel", "sor", "tin", "vak", "wel", "xen", "yor", "zel",
+    "ark", "bel", "cor", "dun", "eth", "fal", "gor", "hul", "ist", "jor", "kel", "lim", "mun", "nox", "orb",
+]
+# key=value parameter slots: kind -> key names used in templates
+PARAMETER_KEYS = {
+    "id": ["id", "orderId", "accountId", "itemId"], "ms": ["took", "latency", "elapsed"],
+    "request": ["requestId", "traceId", "rid"], "ip": ["client", "remote", "peer"],
+    "user": ["user", "actor", "owner"], "count": ["count", "attempt", "size", "rows"],
+}
+PARAMETER_KINDS = list(PARAMETER_KEYS)
+EXCEPTIONS = [
+    "java.lang.IllegalStateException", "java.lang.NullPointerException", "java.net.SocketTimeoutException",
+    "java.sql.SQLTransientConnectionException", "java.util.concurrent.TimeoutException",
+    "org.springframework.dao.DataAccessResourceFailureException", "java.io.IOException",
+]
+NEEDLE_PREFIX = "needle"
+
+
+def needle_token(i: int) -> str:
+    return f"{NEEDLE_PREFIX}{i:04d}"
+
+
+def zipf_cdf(n: int, exponent: float) -> np.ndarray:
+    """Cumulative Zipf probabilities over ranks 1..n (sample with searchsorted)."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+class MessageCorpus:
+    """Vocabulary, statement templates and stack frames for synthetic log messages."""
+
+    def __init__(self, vocab_size: int = 50_000, zipf: float = 1.07, templates: int = 500, needles: int = 100,
+                 needle_rate: float = 1e-5, mean_words: float = 6.0, trace_depth: int = 12, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.zipf = zipf
+        self.needles = needles
+        self.needle_rate = needle_rate
+        self.mean_words = mean_words
+        self.trace_depth = trace_depth
+
+        self.words = vocabulary(self._make_words(rng, vocab_size))
+        self.word_cdf = zipf_cdf(len(self.words), zipf)
+
+        # Templates: "<words> key=value ..." with {kind} placeholders filled per row
+        self.templates: List[Tuple[str, List[str]]] = []
+        for _ in range(templates):
+            lead = " ".join(self.sample_words(rng, int(rng.integers(2, 7))))
+            kinds = [str(kind) for kind in rng.choice(PARAMETER_KINDS, size=int(rng.integers(0, 4)), replace=False)]
+            slots = "".join(f" {rng.choice(PARAMETER_KEYS[kind])}={{}}" for kind in kinds)
+            self.templates.append((lead + slots, kinds))
+        self.template_cdf = zipf_cdf(templates, zipf)
+
+        # Stack frames: com.example.<pkg>.<Class>.<method>(<Class>.java:<line>)
+        packages = [".".join(self.sample_words(rng, 2)) for _ in range(200)]
+        self.frames = vocabulary([
+            f"\tat com.example.{packages[rng.integers(len(packages))]}.{cls.capitalize()}Handler."
+            f"{method}({cls.capitalize()}Handler.java:{rng.integers(20, 900)})"
+            for cls, method in zip(self.sample_words(rng, 2000), self.sample_words(rng, 2000))
+        ])
+        self.frame_cdf = zipf_cdf(len(self.frames), zipf)
+        self.exceptions = vocabulary(EXCEPTIONS)
+
+    @staticmethod
+    def _make_words(rng: np.random.Generator, size: int) -> List[str]:
+        words = dict.fromkeys(COMMON_WORDS[:size])
+        syllables = vocabulary(SYLLABLES)
+        while len(words) < size:
+            # 2-4 syllables per candidate word, drawn in bulk; duplicates are dropped
+            lengths = rng.integers(2, 5, size)
+            parts = syllables[rng.integers(0, len(syllables), int(lengths.sum()))].tolist()
+            bounds = np.concatenate([[0], np.cumsum(lengths)]).tolist()
+            for i in range(size):
+                words.setdefault("".join(parts[bounds[i]:bounds[i + 1]]))
+        return list(words)[:size]
+
+    def sample_words(self, rng: np.random.Generator, n: int) -> List[str]:
+        return self.words[np.searchsorted(self.word_cdf, rng.random(n))].tolist()
+
+    def word_at_rank(self, rank: int) -> str:
+        """The vocabulary word with the given Zipf rank (1 = most frequent)."""
+        return self.words[rank - 1]
+
+    def _parameters(self, rng: np.random.Generator, n: int) -> dict:
+        ip = rng.integers(0, 256, (n, 3))
+        return {
+            "id": rng.integers(1, 10_000_000, n).astype(str),
+            "ms": np.char.add(rng.lognormal(3, 1.2, n).astype(np.int64).astype(str), "ms"),
+            "request": random_hex_ids(rng, n, 16).astype("U16"),
+            "ip": [f"10.{a}.{b}.{c}" for a, b, c in ip.tolist()],
+            "user": np.char.add("user", rng.integers(0, 100_000, n).astype(str)),
+            "count": rng.geometric(0.05, n).astype(str),
+        }
+
+    def generate(self, rng: np.random.Generator, is_error: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Messages and exceptions (stack traces on error rows, else "") for len(is_error) rows."""
+        n = len(is_error)
+        template_idx = np.searchsorted(self.template_cdf, rng.random(n)).tolist()
+        params = self._parameters(rng, n)
+        params = {kind: values.tolist() if isinstance(values, np.ndarray) else values
+                  for kind, values in params.items()}
+
+        word_count = np.minimum(rng.poisson(self.mean_words, n) * rng.lognormal(0, 0.6, n), 80).astype(np.int64)
+        words = self.words[np.searchsorted(self.word_cdf, rng.random(int(word_count.sum())))].tolist()
+        word_end = np.cumsum(word_count).tolist()
+
+        needle_rows = np.flatnonzero(rng.random(n) < self.needle_rate) if self.needles else np.empty(0, int)
+        needles = dict(zip(needle_rows.tolist(), rng.integers(0, self.needles, len(needle_rows)).tolist()))
+
+        messages = []
+        start = 0
+        for i in range(n):
+            template, kinds = self.templates[template_idx[i]]
+            line = template.format(*[params[kind][i] for kind in kinds])
+            end = word_end[i]
+            if end > start:
+                line = f"{line} {' '.join(words[start:end])}"
+                start = end
+            if i in needles:
+                line = f"{line} {needle_token(needles[i])}"
+            messages.append(line)
+
+        exceptions = np.full(n, "", dtype=object)
+        error_rows = np.flatnonzero(is_error)
+        if len(error_rows):
+            depth = np.minimum(rng.geometric(1.0 / self.trace_depth, len(error_rows)), 200)
+            frames = self.frames[np.searchsorted(self.frame_cdf, rng.random(int(depth.sum())))].tolist()
+            exception_class = self.exceptions[rng.integers(0, len(self.exceptions), len(error_rows))].tolist()
+            bounds = np.concatenate([[0], np.cumsum(depth)]).tolist()
+            for j, row in enumerate(error_rows.tolist()):
+                exceptions[row] = (f"{exception_class[j]}: {messages[row]}\n"
+                                   + "\n".join(frames[bounds[j]:bounds[j + 1]]))
+        return vocabulary(messages), exceptions
@@ -0,0 +1,212 @@
+"""
+Throughput and stage-timing metrics for the data generators.
+
+Metrics collects per-table rows/bytes and the seconds spent in each stage of
+the write path:
+
+  generate      building rows/batches in Python (time between hand-offs)
+  partition     splitting batches by (day, team) with --partition-batching
+  encode        turning batches into insert payloads (Arrow, columns, JSON)
+  backpressure  the generator blocked on a full pipeline queue
+  write         waiting on the sink (ClickHouse insert, API request, MySQL)
+
+MetricsReporter samples a snapshot every interval, prints rows/s, bytes/s and
+the stage split over that interval, and optionally writes the same numbers as
+a Prometheus textfile (path ending in .prom, for the node_exporter textfile
+collector) or appends them as JSON lines. A load that spends most of its time
+in generate/encode is CPU-bound in Python; one dominated by write or
+backpressure is waiting on the sink.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+STAGES = ["generate", "partition", "encode", "backpressure", "write"]
+
+
+class Metrics:
+    """Thread-safe row/byte counters per table and seconds per stage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rows: Dict[str, int] = defaultdict(int)
+        self.bytes: Dict[str, int] = defaultdict(int)
+        self.stage_seconds: Dict[str, float] = defaultdict(float)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.started = time.perf_counter()
+
+    def add_rows(self, table: str, rows: int, nbytes: int = 0):
+        with self._lock:
+            self.rows[table] += rows
+            self.bytes[table] += nbytes
+
+    def add_seconds(self, stage: str, seconds: float):
+        with self._lock:
+            self.stage_seconds[stage] += seconds
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    @contextmanager
+    def timer(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_seconds(stage, time.perf_counter() - started)
+
+    def merge(self, snapshot: Dict, baseline: Optional[Dict] = None):
+        """Add another generator's counters (e.g. a worker unit), minus its baseline snapshot if given."""
+        baseline = baseline or {}
+        with self._lock:
+            for key, totals in [("rows", self.rows), ("bytes", self.bytes), ("stage_seconds", self.stage_seconds),
+                                ("counters", self.counters)]:
+                for name, value in snapshot[key].items():
+                    totals[name] += value - baseline.get(key, {}).get(name, 0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"elapsed": time.perf_counter() - self.started, "rows": dict(self.rows),
+                    "bytes": dict(self.bytes), "stage_seconds": dict(self.stage_seconds),
+                    "counters": dict(self.counters), "gauges": {}}
+
+
+def format_bytes(n: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if n < 1024 or unit == "GB":
+            return f"{n:,.1f} {unit}"
+        n /= 1024
+
+
+class MetricsReporter:
+    """Prints interval rates from snapshot() on a background thread and exports them to a file."""
+
+    def __init__(self, snapshot: Callable[[], Dict], interval: float = 10.0, path: Optional[str] = None,
+                 prefix: str = "datagen"):
+        self.snapshot = snapshot
+        self.interval = interval
+        self.path = path
+        self.prefix = prefix
+        self._last = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._last = self.snapshot()
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._loop, name="metrics-reporter", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.report()
+
+    def stop(self):
+        """Stop the reporter, export the final counters and print the whole-run stage split."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        snapshot = self.snapshot()
+        self._export(snapshot, self._rates(snapshot, {"elapsed": 0.0, "rows": {}, "bytes": {}}))
+        self._print_summary(snapshot)
+
+    def report(self):
+        snapshot = self.snapshot()
+        rates = self._rates(snapshot, self._last)
+        self._last = snapshot
+        print(f"  📊 [{snapshot['elapsed']:,.0f}s] {self._format(snapshot, rates)}")
+        self._export(snapshot, rates)
+
+    @staticmethod
+    def _rates(snapshot: Dict, last: Dict) -> Dict:
+        seconds = max(snapshot["elapsed"] - last["elapsed"], 1e-9)
+        stage_delta = {stage: value - last.get("stage_seconds", {}).get(stage, 0.0)
+                       for stage, value in snapshot["stage_seconds"].items()}
+        return {
+            "rows_per_s": {t: (n - last["rows"].get(t, 0)) / seconds for t, n in snapshot["rows"].items()},
+            "bytes_per_s": {t: (n - last["bytes"].get(t, 0)) / seconds for t, n in snapshot["bytes"].items()},
+            "interval_stage_seconds": stage_delta,
+        }
+
+    @staticmethod
+    def _stage_split(stage_seconds: Dict[str, float]) -> str:
+        busy = sum(stage_seconds.values())
+        if busy <= 0:
+            return "idle"
+        ordered = sorted(stage_seconds, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES))
+        return " ".join(f"{stage} {stage_seconds[stage] / busy:.0%}" for stage in ordered
+                        if stage_seconds[stage] / busy >= 0.005)
+
+    def _format(self, snapshot: Dict, rates: Dict) -> str:
+        parts = []
+        for table, rate in sorted(rates["rows_per_s"].items()):
+            part = f"{table} {rate:,.0f} rows/s"
+            if rates["bytes_per_s"].get(table):
+                part += f" {format_bytes(rates['bytes_per_s'][table])}/s"
+            parts.append(part)
+        parts.append(self._stage_split(rates["interval_stage_seconds"]))
+        if snapshot["gauges"]:
+            parts.append("queues " + " ".join(f"{name}={value}" for name, value in sorted(snapshot["gauges"].items())))
+        if snapshot["counters"].get("retries"):
+            parts.append(f"retries {snapshot['counters']['retries']}")
+        return " | ".join(parts)
+
+    def _print_summary(self, snapshot: Dict):
+        elapsed = max(snapshot["elapsed"], 1e-9)
+        print(f"\n⏱️  Write path metrics ({elapsed:,.1f}s):")
+        for table in sorted(snapshot["rows"]):
+            rows, nbytes = snapshot["rows"][table], snapshot["bytes"].get(table, 0)
+            line = f"  {table:<16} {rows:>12,} rows {rows / elapsed:>12,.0f} rows/s"
+            if nbytes:
+                line += f" {format_bytes(nbytes / elapsed):>12}/s"
+            print(line)
+        stages = snapshot["stage_seconds"]
+        if stages:
+            print("  stages: " + ", ".join(f"{stage} {stages[stage]:,.1f}s" for stage in STAGES if stage in stages)
+                  + f" ({self._stage_split(stages)})")
+        for name, value in sorted(snapshot["counters"].items()):
+            print(f"  {name}: {value:,}")
+
+    # ==================== EXPORT ====================
+    def _export(self, snapshot: Dict, rates: Dict):
+        if not self.path:
+            return
+        try:
+            if self.path.endswith(".prom"):
+                self._write_textfile(snapshot, rates)
+            else:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps({"time": datetime.utcnow().isoformat() + "Z", **snapshot, **rates}) + "\n")
+        except OSError as e:
+            print(f"  ⚠ Could not write metrics to {self.path}: {e}")
+
+    def _write_textfile(self, snapshot: Dict, rates: Dict):
+        """Replace the Prometheus textfile atomically so the collector never reads a partial file."""
+        p = self.prefix
+        lines = [f"# TYPE {p}_elapsed_seconds gauge", f"{p}_elapsed_seconds {snapshot['elapsed']:.3f}"]
+        families = [
+            ("rows_total", "counter", "table", snapshot["rows"]),
+            ("bytes_total", "counter", "table", snapshot["bytes"]),
+            ("rows_per_second", "gauge", "table", rates["rows_per_s"]),
+            ("bytes_per_second", "gauge", "table", rates["bytes_per_s"]),
+            ("stage_seconds_total", "counter", "stage", snapshot["stage_seconds"]),
+        ]
+        for name, kind, label, values in families:
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            lines.extend(f'{p}_{name}{{{label}="{key}"}} {value}' for key, value in sorted(values.items()))
+        for name, value in sorted(snapshot["counters"].items()):
+            lines += [f"# TYPE {p}_{name}_total counter", f"{p}_{name}_total {value}"]
+        if snapshot["gauges"]:
+            lines.append(f"# TYPE {p}_queue_depth gauge")
+            lines.extend(f'{p}_queue_depth{{queue="{name}"}} {value}' for name, value in sorted(snapshot["gauges"].items()))
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
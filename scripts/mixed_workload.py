@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Mixed Read/Write Workload Benchmark for ObserveX
+
+Dashboards slow down while ingestion is busy; this measures by how much. For
+each write rate in --write-rates the benchmark runs, for the same time window:
+
+  writers   the generator's continuous load mode (run_load) posting live spans
+            and logs to /api/ingest/* at the target rows/s
+  readers   simulated dashboard viewers, each loading the page fan-out below
+            in parallel (as the UI does), then waiting --think-time seconds
+
+and reports read latency percentiles per endpoint, and for the whole page,
+against the achieved write rate. A write rate of 0 is the idle baseline the
+other steps are compared with.
+
+Both sides authenticate the way API-REFERENCE.md does: POST /api/auth/login,
+token from .data.token. Readers query the teams of /api/teams/my-teams unless
+--team-ids is given; ingested rows land in the token's team. The writers are
+ClickHouseDataGenerator instances, which also open a ClickHouse client
+(--host/--port/...), as in the generator's own --rate mode.
+
+Usage:
+    python mixed_workload.py                                   # 0, 5k, 20k, 50k rows/s, 60s each
+    python mixed_workload.py --write-rates 0,100000 --readers 32 --think-time 0  # Closed-loop readers
+    python mixed_workload.py --api-url http://localhost:18080 --output mixed.json
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import requests
+
+from clickhouse_data_generator import ClickHouseDataGenerator
+from loadgen import LatencyRecorder
+from metrics import Metrics
+from query_benchmark import latency_summary
+
+# One dashboard page load; {team} is the team UUID
+DASHBOARD_FANOUT: Dict[str, str] = {
+    "overview": "/api/dashboard/overview",
+    "service_metrics": "/api/v2/teams/{team}/services/metrics",
+    "logs": "/api/v2/teams/{team}/logs",
+    "traces": "/api/v2/teams/{team}/traces",
+}
+
+
+class LoginError(Exception):
+    pass
+
+
+def login(api_url: str, email: str, password: str) -> str:
+    """JWT from POST /api/auth/login (response .data.token)."""
+    try:
+        response = requests.post(f"{api_url}/api/auth/login", json={"email": email, "password": password},
+                                 timeout=30)
+        response.raise_for_status()
+        return response.json()["data"]["token"]
+    except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+        raise LoginError(f"Login as {email} at {api_url} failed: {e}")
+
+
+def team_uuid(team_id: int) -> str:
+    """The ClickHouse team UUID of a MySQL team id (DashboardController.convertTeamIdToUuid)."""
+    return f"00000000-0000-0000-0000-{team_id:012d}"
+
+
+def my_teams(api_url: str, token: str) -> List[str]:
+    """Team UUIDs of the logged-in user (GET /api/teams/my-teams)."""
+    response = requests.get(f"{api_url}/api/teams/my-teams", headers={"Authorization": f"Bearer {token}"},
+                            timeout=30)
+    response.raise_for_status()
+    return [team_uuid(team["id"]) for team in response.json()["data"]]
+
+
+class DashboardReader:
+    """One simulated viewer: loads the dashboard fan-out in parallel, then thinks."""
+
+    def __init__(self, api_url: str, token: str, team: str, range_minutes: float = 60,
+                 think_time: float = 1.0, timeout: float = 30):
+        self.api_url = api_url
+        self.team = team
+        self.range_ms = int(range_minutes * 60_000)
+        self.think_time = think_time
+        self.timeout = timeout
+        # A session (keep-alive connection) per endpoint, like a browser's parallel connections
+        self.sessions = {}
+        for name in DASHBOARD_FANOUT:
+            session = requests.Session()
+            session.headers["Authorization"] = f"Bearer {token}"
+            self.sessions[name] = session
+        self.pool = ThreadPoolExecutor(len(DASHBOARD_FANOUT), thread_name_prefix="fanout")
+        self.last_error = None
+
+    def _get(self, name: str, params: Dict) -> Tuple[float, bool]:
+        started = time.perf_counter()
+        try:
+            response = self.sessions[name].get(self.api_url + DASHBOARD_FANOUT[name].format(team=self.team),
+                                               params=params, timeout=self.timeout)
+            ok = response.ok
+            if not ok:
+                self.last_error = f"{name}: HTTP {response.status_code}"
+        except requests.RequestException as e:
+            ok = False
+            self.last_error = f"{name}: {e}"
+        return (time.perf_counter() - started) * 1000, ok
+
+    def load_page(self) -> Dict[str, Tuple[float, bool]]:
+        """Latency and success per endpoint, plus "page" (until the slowest request returned)."""
+        end = int(time.time() * 1000)
+        params = {"startTime": end - self.range_ms, "endTime": end, "limit": 100}
+        started = time.perf_counter()
+        futures = {name: self.pool.submit(self._get, name, params) for name in DASHBOARD_FANOUT}
+        results = {name: future.result() for name, future in futures.items()}
+        results["page"] = ((time.perf_counter() - started) * 1000, all(ok for _, ok in results.values()))
+        return results
+
+    def run(self, measure_from: float, deadline: float, recorders: Dict[str, LatencyRecorder]):
+        """Load pages until `deadline`, recording the ones started after `measure_from` (monotonic)."""
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            results = self.load_page()
+            if started >= measure_from:
+                for name, (latency_ms, ok) in results.items():
+                    recorders[name].record(latency_ms, 1, ok)
+            pause = min(self.think_time, deadline - time.monotonic())
+            if pause > 0:
+                time.sleep(pause)
+
+    def close(self):
+        self.pool.shutdown()
+        for session in self.sessions.values():
+            session.close()
+
+
+class MixedWorkload:
+    """Runs dashboard readers against the backend at a series of ingest write rates."""
+
+    def __init__(self, api_url: str, token: str, teams: List[str], clickhouse: Dict, readers: int = 8,
+                 think_time: float = 1.0, range_minutes: float = 60, log_share: float = 0.8, senders: int = 4,
+                 batch_rows: int = 1000, seed: int = None):
+        self.api_url = api_url
+        self.token = token
+        self.teams = teams
+        self.readers = readers
+        self.think_time = think_time
+        self.range_minutes = range_minutes
+        self.log_share = log_share
+        self.senders = senders
+        self.batch_rows = batch_rows
+        self.generator = ClickHouseDataGenerator(**clickhouse, api_url=api_url, auth_token=token, engine="numpy",
+                                                 seed=seed)
+        self.generator.set_team_ids(teams)
+
+    def table_rates(self, write_rate: float) -> Dict[str, float]:
+        rates = {"spans": write_rate * (1 - self.log_share), "logs": write_rate * self.log_share}
+        return {table: rate for table, rate in rates.items() if rate > 0}
+
+    def run_step(self, write_rate: float, duration: float, settle: float) -> Dict:
+        """Readers (and writers at `write_rate` rows/s) for settle + duration seconds; the settle is not measured."""
+        print(f"\n🔀 Write rate {write_rate:,.0f} rows/s, {self.readers} readers "
+              f"(think time {self.think_time:g}s), {settle:g}s settle + {duration:g}s measured")
+        recorders = {name: LatencyRecorder() for name in [*DASHBOARD_FANOUT, "page"]}
+        started = time.monotonic()
+        measure_from, deadline = started + settle, started + settle + duration
+
+        writes = {}
+        writer = None
+        rates = self.table_rates(write_rate)
+        if rates:
+            self.generator.metrics = Metrics()  # Write path metrics per step, not cumulative
+            writer = threading.Thread(target=lambda: writes.update(self.generator.run_load(
+                rates, settle + duration, batch_rows=self.batch_rows, senders=self.senders,
+                report_interval=settle + duration)), name="writers", daemon=True)
+            writer.start()
+
+        readers = [DashboardReader(self.api_url, self.token, self.teams[i % len(self.teams)],
+                                   range_minutes=self.range_minutes, think_time=self.think_time)
+                   for i in range(self.readers)]
+        threads = [threading.Thread(target=reader.run, args=(measure_from, deadline, recorders),
+                                    name=f"reader-{i}", daemon=True) for i, reader in enumerate(readers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if writer:
+            writer.join()
+        for reader in readers:
+            reader.close()
+        errors = [reader.last_error for reader in readers if reader.last_error]
+
+        step = {
+            "write_rate_target": write_rate,
+            "write_rate_achieved": round(sum(table["achieved_rate"] for table in writes.values()), 1),
+            "write_errors": sum(table["errors"] for table in writes.values()),
+            "reads": {name: {"requests": recorder.total_requests, "errors": recorder.errors,
+                             "latency_ms": latency_summary(recorder.latencies_ms)}
+                      for name, recorder in recorders.items()},
+        }
+        for name, read in step["reads"].items():
+            latency = read["latency_ms"]
+            timing = (f"p50 {latency['p50']:>8.1f}ms  p90 {latency['p90']:>8.1f}ms  p99 {latency['p99']:>8.1f}ms"
+                      if latency else "no successful requests")
+            print(f"  {name:<16} {timing}  {read['requests']:>6,} requests  {read['errors']} errors")
+        if errors:
+            print(f"  last read error: {errors[-1]}")
+        return step
+
+    def run(self, write_rates: List[float], duration: float, settle: float = 5) -> Dict:
+        steps = [self.run_step(rate, duration, settle) for rate in write_rates]
+        return {
+            "meta": {"api_url": self.api_url, "teams": self.teams, "readers": self.readers,
+                     "think_time": self.think_time, "range_minutes": self.range_minutes,
+                     "log_share": self.log_share, "duration": duration, "settle": settle},
+            "steps": steps,
+        }
+
+
+def print_summary(report: Dict):
+    """Read p50/p99 per endpoint against the achieved write rate, relative to the idle step if there is one."""
+    steps = report["steps"]
+    names = [*DASHBOARD_FANOUT, "page"]
+    idle = next((step for step in steps if not step["write_rate_target"]), None)
+    print("\n📊 Read latency (p50 / p99 ms) by write rate:")
+    print(f"  {'rows/s':>10} " + " ".join(f"{name:>20}" for name in names))
+    for step in steps:
+        cells = []
+        for name in names:
+            latency = step["reads"][name]["latency_ms"]
+            cell = f"{latency['p50']:.0f} / {latency['p99']:.0f}" if latency else "-"
+            base = idle["reads"][name]["latency_ms"] if idle and step is not idle else None
+            if latency and base and base["p99"]:
+                cell += f" ({latency['p99'] / base['p99']:.1f}x)"
+            cells.append(f"{cell:>20}")
+        print(f"  {step['write_rate_achieved']:>10,.0f} " + " ".join(cells))
+    if idle:
+        print("  (x: p99 relative to the write rate 0 step)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard read latency under concurrent ingestion")
+    parser.add_argument("--api-url", default="http://localhost:13000", help="Backend API URL")
+    parser.add_argument("--host", default="localhost", help="ClickHouse host (writers)")
+    parser.add_argument("--port", type=int, default=8123, help="ClickHouse HTTP port")
+    parser.add_argument("--database", default="observex", help="Database name")
+    parser.add_argument("--user", default="observex", help="Username")
+    parser.add_argument("--ch-password", default="observex123", help="ClickHouse password")
+    parser.add_argument("--email", default="demo@observex.io", help="Login email")
+    parser.add_argument("--password", default="demo123", help="Login password")
+    parser.add_argument("--auth-token", help="JWT to use instead of logging in")
+    parser.add_argument("--team-ids", nargs="+", help="Team UUIDs to read (default: the user's teams)")
+    parser.add_argument("--write-rates", default="0,5000,20000,50000",
+                        help="Comma-separated total ingest rows/s, one step each (0 = readers only)")
+    parser.add_argument("--log-share", type=float, default=0.8, help="Fraction of the write rate that is logs")
+    parser.add_argument("--duration", type=float, default=60, help="Measured seconds per step")
+    parser.add_argument("--settle", type=float, default=5, help="Unmeasured seconds at the start of each step")
+    parser.add_argument("--readers", type=int, default=8, help="Concurrent dashboard viewers")
+    parser.add_argument("--think-time", type=float, default=1.0,
+                        help="Seconds a viewer waits between page loads (0 = closed loop)")
+    parser.add_argument("--range-minutes", type=float, default=60, help="Time range the dashboard queries")
+    parser.add_argument("--senders", type=int, default=4, help="Concurrent writer threads per table")
+    parser.add_argument("--load-batch", type=int, default=1000, help="Rows per ingest request")
+    parser.add_argument("--seed", type=int, help="Random seed for the written data")
+    parser.add_argument("--output", help="Write the JSON report here")
+
+    args = parser.parse_args()
+    try:
+        write_rates = [float(rate) for rate in args.write_rates.split(",")]
+    except ValueError:
+        parser.error(f"Invalid --write-rates '{args.write_rates}', expected e.g. 0,5000,20000")
+    if not 0 <= args.log_share <= 1:
+        parser.error("--log-share must be between 0 and 1")
+
+    try:
+        token = args.auth_token or login(args.api_url, args.email, args.password)
+        teams = args.team_ids or my_teams(args.api_url, token)
+    except (LoginError, requests.RequestException) as e:
+        parser.error(str(e))
+    if not teams:
+        parser.error(f"{args.email} has no teams; pass --team-ids")
+    print(f"🔐 Authenticated, reading teams: {', '.join(teams)}")
+
+    clickhouse = dict(host=args.host, port=args.port, database=args.database, user=args.user,
+                      password=args.ch_password)
+    workload = MixedWorkload(args.api_url, token, teams, clickhouse, readers=args.readers, think_time=args.think_time,
+                             range_minutes=args.range_minutes, log_share=args.log_share, senders=args.senders,
+                             batch_rows=args.load_batch, seed=args.seed)
+    report = workload.run(write_rates, args.duration, settle=args.settle)
+    print_summary(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Wrote {len(report['steps'])} steps to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
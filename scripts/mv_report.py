@@ -0,0 +1,186 @@
+"""
+Materialized view write amplification for the ClickHouse data generator.
+
+Every insert into spans also runs service_metrics_1m and endpoint_metrics_1m,
+and every insert into logs runs log_counts_1m, synchronously, inside the
+insert. After each run the generator reports, for the inserts it made
+(tagged with a log_comment):
+
+  parts, rows, bytes   written to each source table and each view's target
+                       table (system.part_log, on-disk bytes)
+  view time            time spent executing each view and rows/bytes it
+                       wrote (system.query_views_log)
+  insert latency       p50/p99 server duration of the inserts per source
+                       table (system.query_log)
+
+Run once with --detach-views for the baseline: the views are detached for the
+duration of the load and re-attached afterwards, even if the load fails.
+Save both reports with --mv-report and pass the detached one as
+--mv-baseline to print the extra insert latency the views cost. While views
+are detached they miss every row inserted, including rows from other
+clients, so only do this on a benchmark database.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+View = Tuple[str, str, str]  # (view, source table, target table)
+
+_AS_SELECT = re.compile(r"\bAS\s+SELECT\b", re.IGNORECASE)
+_FROM = re.compile(r"\bFROM\s+(?:`?\w+`?\.)?`?(\w+)`?", re.IGNORECASE)
+_TO = re.compile(r"\bTO\s+(?:`?\w+`?\.)?`?([\w.]+)`?", re.IGNORECASE)
+
+
+def split_view_query(create_query: str) -> Tuple[str, Optional[str]]:
+    """A CREATE MATERIALIZED VIEW split into its storage part (before AS SELECT) and source table."""
+    parts = _AS_SELECT.split(create_query, maxsplit=1)
+    match = _FROM.search(parts[1]) if len(parts) > 1 else None
+    return parts[0], match.group(1) if match else None
+
+
+def materialized_views(client) -> List[View]:
+    """The current database's materialized views with their source and target tables."""
+    views = []
+    for name, uuid, query in client.query(
+            "SELECT name, toString(uuid), create_table_query FROM system.tables "
+            "WHERE database = currentDatabase() AND engine = 'MaterializedView' ORDER BY name").result_rows:
+        storage, source = split_view_query(query)
+        to = _TO.search(storage)
+        if to:
+            target = to.group(1)
+        elif uuid.strip("0-"):
+            target = f".inner_id.{uuid}"  # Atomic database: inner table named after the view's UUID
+        else:
+            target = f".inner.{name}"
+        views.append((name, source, target))
+    return views
+
+
+def detach_views(client, views: List[View]) -> List[View]:
+    """Detach the views (their target tables stay); re-attaches them all if one cannot be detached."""
+    detached = []
+    try:
+        for view in views:
+            client.command(f"DETACH TABLE `{view[0]}`")
+            detached.append(view)
+    except Exception:
+        attach_views(client, detached)
+        raise
+    return detached
+
+
+def attach_views(client, views: List[View]):
+    for view in views:
+        try:
+            client.command(f"ATTACH TABLE `{view[0]}`")
+        except Exception as e:
+            print(f"  ❌ Could not re-attach {view[0]}: {e} -- run ATTACH TABLE {view[0]} by hand")
+
+
+def _tagged(log_comment: Optional[str], column: str = "query_id") -> str:
+    """Filter on the run's insert queries, or on the time window only when inserts are not tagged."""
+    if not log_comment:
+        return "1"
+    return (f"{column} IN (SELECT query_id FROM system.query_log WHERE event_time >= %(since)s "
+            "AND log_comment = %(log_comment)s)")
+
+
+def collect(client, database: str, views: List[View], since, log_comment: Optional[str],
+            views_attached: bool = True) -> Dict:
+    """Parts/rows/bytes per table, time per view and insert latency per source table since `since`."""
+    client.command("SYSTEM FLUSH LOGS")
+    params = {"since": since, "log_comment": log_comment or ""}
+    sources = sorted({source for _, source, _ in views if source})
+    tables = sources + [target for _, _, target in views]
+    report = {"views_attached": views_attached, "log_comment": log_comment,
+              "views": {name: {"source": source, "target": target} for name, source, target in views},
+              "tables": {}, "view_time": {}, "inserts": {}}
+
+    for table, parts, rows, nbytes in client.query(
+            "SELECT table, count(), sum(rows), sum(size_in_bytes) FROM system.part_log "
+            "WHERE database = currentDatabase() AND event_type = 'NewPart' AND event_time >= %(since)s "
+            f"AND table IN %(tables)s AND {_tagged(log_comment)} GROUP BY table",
+            parameters={**params, "tables": tables}).result_rows:
+        report["tables"][table] = {"parts": parts, "rows": rows, "bytes": nbytes}
+
+    if views_attached and views:
+        try:
+            initial = _tagged(log_comment, "initial_query_id")
+            for view, count, ms, rows, nbytes in client.query(
+                    "SELECT view_name, count(), sum(view_duration_ms), sum(written_rows), sum(written_bytes) "
+                    "FROM system.query_views_log WHERE event_time >= %(since)s "
+                    f"AND view_name IN %(views)s AND {initial} GROUP BY view_name",
+                    parameters={**params, "views": [f"{database}.{name}" for name, _, _ in views]}).result_rows:
+                report["view_time"][view.split(".", 1)[1]] = {"runs": count, "ms": ms, "rows": rows, "bytes": nbytes}
+        except Exception as e:
+            print(f"  ⚠ system.query_views_log unavailable ({e}); no per-view timing")
+
+    comment = "log_comment = %(log_comment)s" if log_comment else "1"
+    for source, count, total_ms, p50, p99 in client.query(
+            "SELECT arrayFirst(t -> has(%(sources)s, t), tables) AS source, count(), sum(query_duration_ms), "
+            "quantile(0.5)(query_duration_ms), quantile(0.99)(query_duration_ms) FROM system.query_log "
+            "WHERE type = 'QueryFinish' AND query_kind = 'Insert' AND event_time >= %(since)s "
+            f"AND {comment} AND source != '' GROUP BY source",
+            parameters={**params, "sources": [f"{database}.{s}" for s in sources]}).result_rows:
+        report["inserts"][source.split(".", 1)[1]] = {"count": count, "total_ms": total_ms,
+                                                      "p50_ms": round(p50, 1), "p99_ms": round(p99, 1)}
+    return report
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    state = "attached" if report["views_attached"] else "DETACHED (baseline)"
+    print(f"\n🪞 Materialized view write amplification (views {state}):")
+    tables = report["tables"]
+    sources = sorted({view["source"] for view in report["views"].values() if view["source"]})
+    for source in sources:
+        base = tables.get(source)
+        if not base:
+            continue
+        print(f"  {source:<22} {base['parts']:>7,} parts {base['rows']:>13,} rows "
+              f"{base['bytes'] / 2**20:>10,.1f} MB")
+        total_bytes, total_parts = base["bytes"], base["parts"]
+        for name, view in sorted(report["views"].items()):
+            if view["source"] != source:
+                continue
+            target = tables.get(view["target"], {"parts": 0, "rows": 0, "bytes": 0})
+            total_bytes += target["bytes"]
+            total_parts += target["parts"]
+            line = (f"    → {name:<18} {target['parts']:>7,} parts {target['rows']:>13,} rows "
+                    f"{target['bytes'] / 2**20:>10,.1f} MB")
+            timing = report["view_time"].get(name)
+            if timing:
+                line += f"  {timing['ms'] / 1000:,.1f}s in view"
+            print(line)
+        print(f"    amplification: {total_parts / max(base['parts'], 1):.1f}x parts, "
+              f"{total_bytes / max(base['bytes'], 1):.2f}x bytes")
+
+    for source, inserts in sorted(report["inserts"].items()):
+        line = (f"  {source} inserts: {inserts['count']:,}, p50 {inserts['p50_ms']:,.0f}ms "
+                f"p99 {inserts['p99_ms']:,.0f}ms")
+        view_ms = sum(t["ms"] for name, t in report["view_time"].items()
+                      if report["views"].get(name, {}).get("source") == source)
+        if view_ms and inserts["total_ms"]:
+            line += f", {view_ms / inserts['total_ms']:.0%} of insert time in views"
+        before = (baseline or {}).get("inserts", {}).get(source)
+        if before and not baseline.get("views_attached", True):
+            # Server insert time per row, so baseline and run need not have the same volume
+            per_row = inserts["total_ms"] / max(tables.get(source, {}).get("rows", 0), 1)
+            before_per_row = before["total_ms"] / max(baseline["tables"].get(source, {}).get("rows", 0), 1)
+            line += (f" | vs detached: p50 {inserts['p50_ms'] - before['p50_ms']:+,.0f}ms "
+                     f"p99 {inserts['p99_ms'] - before['p99_ms']:+,.0f}ms, "
+                     f"{per_row / before_per_row - 1 if before_per_row else 0:+.0%} insert time per row")
+        print(line)
+    if baseline and baseline.get("views_attached", True):
+        print("  ⚠ --mv-baseline is not a --detach-views run; no latency comparison")
+
+
+def save_report(report: Dict, path: str):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"  ✓ Wrote view report to {path}")
+
+
+def load_report(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
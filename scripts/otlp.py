@@ -0,0 +1,335 @@
+"""
+OTLP encoding of generated spans and logs (--sink otlp).
+
+TelemetryIngestionController calls itself OpenTelemetry-compatible, but takes
+its own SpanRequest/LogRequest JSON. The otlp sink encodes the same batches as
+OTLP/HTTP ExportTraceServiceRequest / ExportLogsServiceRequest bodies, the shape
+instrumented services actually emit, so the cost of that shape can be measured
+next to the custom JSON (see ClickHouseDataGenerator.report_otlp):
+
+  proto   protobuf wire format (Content-Type: application/x-protobuf)
+  json    OTLP/JSON: camelCase fields, hex ids, enums as numbers, 64-bit
+          integers as strings (Content-Type: application/json)
+
+Rows are grouped per request by resource (team, service, host, pod, container)
+and instrumentation scope: the generator for spans, the logger for logs (as
+Java log appenders do). Span http_* columns become http.request.method /
+url.full / http.response.status_code attributes, a log's thread and exception
+become thread.name / exception.stacktrace.
+
+The protobuf messages are written by hand (field numbers from
+opentelemetry-proto v1), so no protobuf runtime is needed. Every distinct
+string field, attribute and status is encoded once per batch.
+"""
+
+import binascii
+import json
+import struct
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from api_encoder import dumps
+from columnar_engine import column_to_list
+
+FORMATS = ["proto", "json"]
+SIGNALS = {"spans": "traces", "logs": "logs"}  # table -> OTLP signal (/v1/<signal>)
+CONTENT_TYPES = {"proto": "application/x-protobuf", "json": "application/json"}
+
+SCOPE_NAME = "observex-datagen"
+SCOPE_VERSION = "1.0.0"
+
+SPAN_KINDS = {"INTERNAL": 1, "SERVER": 2, "CLIENT": 3, "PRODUCER": 4, "CONSUMER": 5}
+STATUS_CODES = {"OK": 1, "ERROR": 2}  # Anything else: STATUS_CODE_UNSET (0)
+SEVERITY_NUMBERS = {"TRACE": 1, "DEBUG": 5, "INFO": 9, "WARN": 13, "ERROR": 17, "FATAL": 21}
+
+RESOURCE_COLUMNS = ["team_id", "service_name", "host", "pod", "container"]
+RESOURCE_KEYS = ["observex.team.id", "service.name", "host.name", "k8s.pod.name", "k8s.container.name"]
+
+# ==================== PROTOBUF WIRE FORMAT ====================
+_SPAN_TIMES = struct.Struct("<BQBQ")  # start_time_unix_nano (7), end_time_unix_nano (8): fixed64
+_LOG_TIME = struct.Struct("<BQ")  # time_unix_nano (1): fixed64
+
+
+def _varint(n: int) -> bytes:
+    if n < 0x80:
+        return bytes((n,))
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _field(number: int, payload: bytes) -> bytes:
+    """Length-delimited field (string, bytes or message)."""
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _string(number: int, value: str) -> bytes:
+    return _field(number, value.encode())
+
+
+def _key_value(key: str, value) -> bytes:
+    """KeyValue{key, AnyValue{string_value | int_value}}."""
+    any_value = _varint(3 << 3) + _varint(value) if isinstance(value, int) else _string(1, value)
+    return _string(1, key) + _field(2, any_value)
+
+
+def _attribute_fields(number: int, attributes: List[Tuple[str, object]]) -> bytes:
+    return b"".join(_field(number, _key_value(key, value)) for key, value in attributes)
+
+
+def _export_request(groups: Dict[tuple, Dict[str, List[bytes]]], resources: Dict[tuple, bytes]) -> bytes:
+    """Export{Trace,Logs}ServiceRequest: resource_X (1) > scope_X (2) > spans / log_records (2)."""
+    body = []
+    for resource, scopes in groups.items():
+        scope_messages = [
+            _field(2, _field(1, _string(1, scope) + (_string(2, SCOPE_VERSION) if scope == SCOPE_NAME else b""))
+                   + b"".join(_field(2, record) for record in records))
+            for scope, records in scopes.items()]
+        body.append(_field(1, _field(1, resources[resource]) + b"".join(scope_messages)))
+    return b"".join(body)
+
+
+def _iter_fields(buf: bytes, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+    """(field number, start, end) of the length-delimited fields in buf[start:end]; other fields are skipped."""
+    i = start
+    while i < end:
+        key, i = _read_varint(buf, i)
+        wire_type = key & 7
+        if wire_type == 2:
+            length, i = _read_varint(buf, i)
+            yield key >> 3, i, i + length
+            i += length
+        elif wire_type == 0:
+            _, i = _read_varint(buf, i)
+        elif wire_type in (1, 5):
+            i += 8 if wire_type == 1 else 4
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+    if i != end:
+        raise ValueError("Truncated protobuf message")
+
+
+def _read_varint(buf: bytes, i: int) -> Tuple[int, int]:
+    n = shift = 0
+    while True:
+        if i >= len(buf):
+            raise ValueError("Truncated protobuf varint")
+        b = buf[i]
+        n |= (b & 0x7F) << shift
+        i += 1
+        if b < 0x80:
+            return n, i
+        shift += 7
+
+
+def count_records(body: bytes, fmt: str) -> int:
+    """Spans or log records in an OTLP/HTTP export request (for the stand-in collector)."""
+    if fmt == "json":
+        request = json.loads(body)
+        outer, inner, records = (("resourceSpans", "scopeSpans", "spans") if "resourceSpans" in request
+                                 else ("resourceLogs", "scopeLogs", "logRecords"))
+        return sum(len(scope.get(records, [])) for resource in request.get(outer, [])
+                   for scope in resource.get(inner, []))
+    count = 0
+    for number, start, end in _iter_fields(body, 0, len(body)):
+        if number != 1:
+            continue
+        for scope_number, scope_start, scope_end in _iter_fields(body, start, end):
+            if scope_number == 2:
+                count += sum(1 for n, _, _ in _iter_fields(body, scope_start, scope_end) if n == 2)
+    return count
+
+
+# ==================== BATCH -> COLUMNS ====================
+def _columns(batch, column_names: List[str]) -> Dict[str, list]:
+    """Python lists per column; ids stay hex (str or bytes), times become Unix nanoseconds."""
+    if isinstance(batch, dict):
+        columns = {}
+        for name in column_names:
+            col = batch[name]
+            if isinstance(col, np.ndarray) and col.dtype.kind == "M":
+                columns[name] = col.astype("datetime64[ns]").astype(np.int64).tolist()
+            else:
+                columns[name] = column_to_list(col)
+        return columns
+    columns = dict(zip(column_names, map(list, zip(*batch)))) if batch else {name: [] for name in column_names}
+    for name, values in columns.items():
+        if values and hasattr(values[0], "isoformat"):  # datetime objects of the python engine
+            columns[name] = np.array(values, dtype="datetime64[us]").astype("datetime64[ns]").astype(np.int64).tolist()
+    return columns
+
+
+def _hex(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _resource_attributes(key: tuple) -> List[Tuple[str, object]]:
+    return [(name, value) for name, value in zip(RESOURCE_KEYS, key) if value]
+
+
+def _span_attributes(method, url, status_code, attributes) -> List[Tuple[str, object]]:
+    pairs = [("http.request.method", method), ("url.full", url)] if method else []
+    if status_code:
+        pairs.append(("http.response.status_code", status_code))
+    return pairs + sorted(attributes.items()) if attributes else pairs
+
+
+def _log_attributes(thread, exception, attributes) -> List[Tuple[str, object]]:
+    pairs = [("thread.name", thread)] if thread else []
+    if exception:
+        pairs.append(("exception.stacktrace", exception))
+    return pairs + sorted(attributes.items()) if attributes else pairs
+
+
+# ==================== ENCODERS ====================
+def encode_otlp(table: str, batch, column_names: List[str], fmt: str, chunk_rows: int) -> List[Tuple[bytes, int]]:
+    """(request body, records) per chunk of at most chunk_rows rows, grouped by resource and scope."""
+    columns = _columns(batch, column_names)
+    rows = len(columns[column_names[0]])
+    resource_keys = list(zip(*(columns[name] for name in RESOURCE_COLUMNS)))
+    scope_keys = columns["logger"] if table == "logs" else [SCOPE_NAME] * rows
+    if fmt == "json":
+        records = _json_spans(columns) if table == "spans" else _json_logs(columns)
+    else:
+        records = _proto_spans(columns) if table == "spans" else _proto_logs(columns)
+
+    requests = []
+    resources = {}
+    for start in range(0, rows, chunk_rows):
+        groups: Dict[tuple, Dict[str, list]] = {}
+        for i in range(start, min(start + chunk_rows, rows)):
+            groups.setdefault(resource_keys[i], {}).setdefault(scope_keys[i], []).append(records[i])
+        for key in groups:
+            if key not in resources:
+                attributes = _resource_attributes(key)
+                resources[key] = (_attribute_fields(1, attributes) if fmt == "proto" else
+                                  {"attributes": [_json_key_value(k, v) for k, v in attributes]})
+        if fmt == "proto":
+            body = _export_request(groups, resources)
+        else:
+            body = dumps(_json_request(table, groups, resources))
+        requests.append((body, min(chunk_rows, rows - start)))
+    return requests
+
+
+def _proto_spans(columns: Dict[str, list]) -> List[bytes]:
+    unhex = binascii.unhexlify
+    strings, kinds, statuses, attributes = {}, {}, {}, {}
+
+    def cached(cache: Dict, key, build):
+        value = cache.get(key)
+        if value is None:
+            value = cache[key] = build()
+        return value
+
+    spans = []
+    for (trace_id, span_id, parent, name, kind, start, end, status, message, method, url, status_code,
+         attrs) in zip(columns["trace_id"], columns["span_id"], columns["parent_span_id"],
+                       columns["operation_name"], columns["span_kind"], columns["start_time"],
+                       columns["end_time"], columns["status"], columns["status_message"],
+                       columns["http_method"], columns["http_url"], columns["http_status_code"],
+                       columns["attributes"]):
+        parts = [b"\x0a\x10", unhex(trace_id), b"\x12\x08", unhex(span_id)]
+        if parent:
+            parts += [b"\x22\x08", unhex(parent)]
+        parts.append(cached(strings, name, lambda: _string(5, name)))
+        parts.append(cached(kinds, kind, lambda: _varint(6 << 3) + _varint(SPAN_KINDS.get(kind, 0))))
+        parts.append(_SPAN_TIMES.pack(0x39, start, 0x41, end))
+        http = cached(attributes, (method, url, status_code),
+                      lambda: _attribute_fields(9, _span_attributes(method, url, status_code, None)))
+        parts.append(http)
+        if attrs:
+            parts.append(b"".join(cached(attributes, item, lambda: _field(9, _key_value(*item)))
+                                  for item in sorted(attrs.items())))
+        parts.append(cached(statuses, (status, message),
+                            lambda: _field(15, (_string(2, message) if message else b"")
+                                           + _varint(3 << 3) + _varint(STATUS_CODES.get(status, 0)))))
+        spans.append(b"".join(parts))
+    return spans
+
+
+def _proto_logs(columns: Dict[str, list]) -> List[bytes]:
+    unhex = binascii.unhexlify
+    levels, bodies, attributes = {}, {}, {}
+    records = []
+    for timestamp, level, message, trace_id, span_id, thread, exception, attrs in zip(
+            columns["timestamp"], columns["level"], columns["message"], columns["trace_id"],
+            columns["span_id"], columns["thread"], columns["exception"], columns["attributes"]):
+        parts = [_LOG_TIME.pack(0x09, timestamp)]
+        severity = levels.get(level)
+        if severity is None:
+            severity = levels[level] = _varint(2 << 3) + _varint(SEVERITY_NUMBERS.get(level, 0)) + _string(3, level)
+        parts.append(severity)
+        body = bodies.get(message)
+        if body is None:
+            body = bodies[message] = _field(5, _string(1, message))
+        parts.append(body)
+        key = (thread, exception)
+        common = attributes.get(key)
+        if common is None:
+            common = attributes[key] = _attribute_fields(6, _log_attributes(thread, exception, None))
+        parts.append(common)
+        if attrs:
+            for item in sorted(attrs.items()):
+                kv = attributes.get(item)
+                if kv is None:
+                    kv = attributes[item] = _field(6, _key_value(*item))
+                parts.append(kv)
+        if trace_id:
+            parts += [b"\x4a\x10", unhex(trace_id)]
+        if span_id:
+            parts += [b"\x52\x08", unhex(span_id)]
+        records.append(b"".join(parts))
+    return records
+
+
+def _json_key_value(key: str, value) -> Dict:
+    return {"key": key, "value": {"intValue": str(value)} if isinstance(value, int) else {"stringValue": value}}
+
+
+def _json_spans(columns: Dict[str, list]) -> List[Dict]:
+    spans = []
+    for (trace_id, span_id, parent, name, kind, start, end, status, message, method, url, status_code,
+         attrs) in zip(columns["trace_id"], columns["span_id"], columns["parent_span_id"],
+                       columns["operation_name"], columns["span_kind"], columns["start_time"],
+                       columns["end_time"], columns["status"], columns["status_message"],
+                       columns["http_method"], columns["http_url"], columns["http_status_code"],
+                       columns["attributes"]):
+        span = {"traceId": _hex(trace_id), "spanId": _hex(span_id), "name": name,
+                "kind": SPAN_KINDS.get(kind, 0), "startTimeUnixNano": str(start), "endTimeUnixNano": str(end),
+                "attributes": [_json_key_value(k, v) for k, v in _span_attributes(method, url, status_code, attrs)],
+                "status": {"code": STATUS_CODES.get(status, 0), **({"message": message} if message else {})}}
+        if parent:
+            span["parentSpanId"] = _hex(parent)
+        spans.append(span)
+    return spans
+
+
+def _json_logs(columns: Dict[str, list]) -> List[Dict]:
+    records = []
+    for timestamp, level, message, trace_id, span_id, thread, exception, attrs in zip(
+            columns["timestamp"], columns["level"], columns["message"], columns["trace_id"],
+            columns["span_id"], columns["thread"], columns["exception"], columns["attributes"]):
+        record = {"timeUnixNano": str(timestamp), "severityNumber": SEVERITY_NUMBERS.get(level, 0),
+                  "severityText": level, "body": {"stringValue": message},
+                  "attributes": [_json_key_value(k, v) for k, v in _log_attributes(thread, exception, attrs)]}
+        if trace_id:
+            record["traceId"] = _hex(trace_id)
+        if span_id:
+            record["spanId"] = _hex(span_id)
+        records.append(record)
+    return records
+
+
+def _json_request(table: str, groups: Dict[tuple, Dict[str, list]], resources: Dict[tuple, Dict]) -> Dict:
+    outer, inner, records = (("resourceSpans", "scopeSpans", "spans") if table == "spans"
+                             else ("resourceLogs", "scopeLogs", "logRecords"))
+    return {outer: [
+        {"resource": resources[resource],
+         inner: [{"scope": {"name": scope, **({"version": SCOPE_VERSION} if scope == SCOPE_NAME else {})},
+                  records: entries} for scope, entries in scopes.items()]}
+        for resource, scopes in groups.items()]}
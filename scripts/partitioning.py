@@ -0,0 +1,99 @@
+"""
+Partition-aware batching for the ClickHouse data generator (--partition-batching).
+
+spans and logs are PARTITION BY (toYYYYMMDD(time), team_id), and ClickHouse
+writes one new part per partition touched by an insert. Generated batches mix
+days (hour offsets crossing midnight, random minutes within the hour), so a
+plain 5000-row insert can create several tiny parts that background merges
+then have to clean up.
+
+PartitionBuffer splits every generated batch (row lists or column dicts) by
+partition key, buffers the pieces per key and hands back one large block per
+partition once it reaches block_rows, or when drained at the end of a stage.
+If the total buffered rows exceed max_buffered_rows, the largest partition is
+flushed early to bound memory.
+
+Days are computed in UTC, matching a ClickHouse server running in UTC.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from columnar_engine import DictColumn, concat_batches, slice_batch, take_batch
+
+
+class PartitionBuffer:
+    """Per-(day, team) buffers for one table; add() and drain() return blocks ready to insert."""
+
+    def __init__(self, column_names: List[str], time_column: str, block_rows: int = 500_000,
+                 max_buffered_rows: int = 2_000_000):
+        self.time_column = time_column
+        self.time_index = column_names.index(time_column)
+        self.team_index = column_names.index("team_id")
+        self.block_rows = block_rows
+        self.max_buffered_rows = max_buffered_rows
+        self.pending: Dict[Tuple, List] = {}  # key -> pieces (row lists or column dicts)
+        self.pending_rows: Dict[Tuple, int] = {}
+        self.buffered_rows = 0
+        self.partitions_seen = set()
+        self.blocks = 0
+
+    def add(self, batch) -> List:
+        """Buffer a generated batch; return the blocks that became full."""
+        pieces = self._split_columns(batch) if isinstance(batch, dict) else self._split_rows(batch)
+        ready = []
+        for key, piece, rows in pieces:
+            self.partitions_seen.add(key)
+            self.pending.setdefault(key, []).append(piece)
+            self.pending_rows[key] = self.pending_rows.get(key, 0) + rows
+            self.buffered_rows += rows
+            if self.pending_rows[key] >= self.block_rows:
+                ready.append(self._take(key))
+        while self.buffered_rows > self.max_buffered_rows:
+            ready.append(self._take(max(self.pending_rows, key=self.pending_rows.get)))
+        return ready
+
+    def drain(self) -> List:
+        """Return every buffered partition as a block."""
+        return [self._take(key) for key in list(self.pending)]
+
+    def _take(self, key: Tuple):
+        pieces = self.pending.pop(key)
+        self.buffered_rows -= self.pending_rows.pop(key)
+        self.blocks += 1
+        if isinstance(pieces[0], dict):
+            return pieces[0] if len(pieces) == 1 else concat_batches(pieces)
+        return [row for piece in pieces for row in piece]
+
+    def _split_rows(self, rows: List[list]) -> List[tuple]:
+        groups: Dict[Tuple, List[list]] = {}
+        t, team = self.time_index, self.team_index
+        for row in rows:
+            groups.setdefault((row[t].date().toordinal(), row[team]), []).append(row)
+        return [(key, group, len(group)) for key, group in groups.items()]
+
+    def _split_columns(self, batch: Dict[str, object]) -> List[tuple]:
+        day = batch[self.time_column].astype("datetime64[D]").astype(np.int64)
+        team = batch["team_id"]
+        team_code = team.codes if isinstance(team, DictColumn) else np.unique(team, return_inverse=True)[1]
+        key = day * (int(team_code.max()) + 1) + team_code
+        if (key == key[0]).all():  # Common case: the whole batch is one partition
+            return [(self._key(batch, 0, day), batch, len(key))]
+
+        order = np.argsort(key, kind="stable")
+        sorted_batch = take_batch(batch, order)
+        bounds = np.flatnonzero(np.diff(key[order])) + 1
+        starts = np.concatenate([[0], bounds])
+        stops = np.concatenate([bounds, [len(key)]])
+        day = day[order]
+        return [(self._key(sorted_batch, start, day), slice_batch(sorted_batch, start, stop), stop - start)
+                for start, stop in zip(starts.tolist(), stops.tolist())]
+
+    @staticmethod
+    def _key(batch: Dict[str, object], row: int, day: np.ndarray) -> Tuple:
+        team = batch["team_id"]
+        team_value = team.vocab[team.codes[row]] if isinstance(team, DictColumn) else team[row]
+        # Same key shape as _split_rows: (proleptic ordinal of the UTC day, team)
+        return int(day[row]) + 719163, team_value
+
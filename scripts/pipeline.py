@@ -0,0 +1,78 @@
+"""
+Bounded producer/consumer pipeline for the ClickHouse data generator.
+
+Generation runs on the caller's thread and hands batches to put(); an encode
+thread turns them into insert payloads (Arrow tables, column lists, API JSON)
+and a write thread sends them to ClickHouse or the backend. The stages are
+connected by bounded queues, so while one batch is on the network the next is
+being generated and encoded, and a slow sink blocks put() instead of letting
+batches pile up in memory.
+
+Peak memory is bounded by (2 * queue_size + 3) batches: queue_size per queue
+plus the one batch each stage is working on.
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Dict
+
+_DONE = object()
+
+
+class Pipeline:
+    """Two consumer stages (encode, write) behind the producer, joined by bounded queues."""
+
+    def __init__(self, encode: Callable[[Any], Any], write: Callable[[Any], None], queue_size: int = 4):
+        self.encode_queue = queue.Queue(maxsize=queue_size)
+        self.write_queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.aborted = False
+        self._threads = [
+            threading.Thread(target=self._run, args=(self.encode_queue, encode, self.write_queue),
+                             name="pipeline-encode", daemon=True),
+            threading.Thread(target=self._run, args=(self.write_queue, write, None),
+                             name="pipeline-write", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self, inbox: queue.Queue, work: Callable, outbox):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                if outbox is not None:
+                    outbox.put(_DONE)
+                return
+            if self.error is not None or self.aborted:
+                continue  # Keep draining after a failure so producers never block forever
+            try:
+                result = work(item)
+            except BaseException as e:
+                self.error = e
+                continue
+            if outbox is not None:
+                outbox.put(result)
+
+    def put(self, item: Any):
+        """Hand a generated batch to the encode stage; blocks while the pipeline is full."""
+        if self.error is not None:
+            raise self.error
+        self.encode_queue.put(item)
+
+    def depths(self) -> Dict[str, int]:
+        return {"encode": self.encode_queue.qsize(), "write": self.write_queue.qsize()}
+
+    def close(self):
+        """Flush every queued batch through both stages, then re-raise the first stage error."""
+        self.encode_queue.put(_DONE)
+        for thread in self._threads:
+            thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def abort(self):
+        """Stop both stages after the batch each is working on, dropping the queued ones; raises nothing."""
+        self.aborted = True
+        self.encode_queue.put(_DONE)
+        for thread in self._threads:
+            thread.join()
@@ -0,0 +1,108 @@
+"""
+Per-stage profiling for the data generators (--profile).
+
+StageProfiler.instrument() wraps a generator's stage methods (generate_spans,
+create_teams, ...) so every call runs under that stage's own cProfile.Profile
+and is measured with tracemalloc. Hot paths called from inside a stage
+(_generate_trace_spans, _insert_spans, uuid4, client.insert, ...) are not
+profiled separately -- only one cProfile can be active per thread -- but their
+call counts and cumulative time are read back from the stage profile.
+
+report() writes <dir>/<stage>.prof (load with pstats, snakeviz or
+gprof2dot) and <dir>/<stage>.txt (top functions by own time), and prints per
+stage: wall time, tracemalloc peak above the stage's starting footprint, the
+focus functions and the functions with the most own time.
+
+Only the calling thread is profiled: pipeline encode/write threads, the async
+ingest loop and worker processes are not covered, so profile sequential runs.
+"""
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterable
+
+
+class StageProfiler:
+    """cProfile + tracemalloc per named stage, with a summary of the given focus functions."""
+
+    def __init__(self, output_dir: str, focus: Iterable[str] = (), top: int = 10):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.focus = list(focus)
+        self.top = top
+        self.stages: Dict[str, Dict] = {}
+        self._active = None
+        self.peak = 0  # Highest traced memory seen in any stage
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def instrument(self, obj, names: Iterable[str]):
+        """Replace obj.<name> for each name with a wrapper that runs it as a profiled stage."""
+        for name in names:
+            setattr(obj, name, self._wrap(name, getattr(obj, name)))
+
+    def _wrap(self, name: str, method):
+        @functools.wraps(method)
+        def profiled(*args, **kwargs):
+            if self._active is not None:  # Nested stage: already covered by the outer profile
+                return method(*args, **kwargs)
+            with self.stage(name):
+                return method(*args, **kwargs)
+        return profiled
+
+    @contextmanager
+    def stage(self, name: str):
+        entry = self.stages.setdefault(name, {"profile": cProfile.Profile(), "seconds": 0.0, "calls": 0, "peak": 0})
+        self._active = name
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        entry["profile"].enable()
+        try:
+            yield
+        finally:
+            entry["profile"].disable()
+            entry["seconds"] += time.perf_counter() - started
+            entry["calls"] += 1
+            peak = tracemalloc.get_traced_memory()[1]
+            entry["peak"] = max(entry["peak"], peak - baseline)
+            self.peak = max(self.peak, peak)
+            self._active = None
+
+    def report(self):
+        """Dump every stage profile and print the per-stage summary."""
+        if not self.stages:
+            return
+        print(f"\n🔬 Profile ({self.output_dir}/<stage>.prof):")
+        for name, entry in self.stages.items():
+            profile = entry["profile"]
+            profile.dump_stats(os.path.join(self.output_dir, f"{name}.prof"))
+            text = io.StringIO()
+            stats = pstats.Stats(profile, stream=text)
+            stats.sort_stats("tottime").print_stats(50)
+            with open(os.path.join(self.output_dir, f"{name}.txt"), "w") as f:
+                f.write(text.getvalue())
+
+            seconds = entry["seconds"]
+            print(f"\n  {name}: {seconds:,.2f}s wall, peak +{entry['peak'] / 2**20:,.1f} MB (tracemalloc)")
+            functions = stats.stats  # (file, line, function) -> (primitive calls, calls, own, cumulative, callers)
+            for function in self.focus:
+                matches = [value for key, value in functions.items() if key[2] == function]
+                if matches:
+                    calls = sum(value[1] for value in matches)
+                    cumulative = max(value[3] for value in matches)
+                    print(f"    {function:<24} {calls:>10,} calls {cumulative:>9,.2f}s cumulative "
+                          f"({cumulative / seconds if seconds else 0:.0%})")
+            hottest = sorted(functions.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+            print(f"    top {len(hottest)} by own time:")
+            for (filename, line, function), value in hottest:
+                location = f"{os.path.basename(filename)}:{line}" if line else filename
+                print(f"      {value[2]:>8,.2f}s {value[1]:>10,} calls  {function} ({location})")
+        print(f"\n  tracemalloc: {self.peak / 2**20:,.1f} MB peak across stages, "
+              f"{tracemalloc.get_traced_memory()[0] / 2**20:,.1f} MB still allocated")
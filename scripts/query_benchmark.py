@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+ClickHouse Query Benchmark for ObserveX
+
+Replays the exact query shapes issued by ClickHouseSpansRepository and
+ClickHouseLogsRepository against a loaded database, across several teams and
+time ranges, and reports latency percentiles plus server-side read_rows /
+read_bytes as JSON. Progress goes to stderr, so the report on stdout can be
+redirected (> run.json) as well as written with --output.
+
+Cold runs drop the mark and uncompressed caches before every iteration (the OS
+page cache is not touched); warm runs execute warm-up iterations first.
+
+Usage:
+    python query_benchmark.py                                   # Warm runs, default ranges
+    python query_benchmark.py --modes cold,warm --iterations 10
+    python query_benchmark.py --output run.json --baseline last.json  # Fail on regressions
+"""
+
+import argparse
+import json
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import clickhouse_connect
+import numpy as np
+
+# Query shapes copied from the repositories. Parameters are bound client side
+# (literal substitution), which is what the JDBC driver does with `?`.
+SPANS_RANGE = ("start_time >= fromUnixTimestamp64Milli(%(start_ms)s) "
+               "AND start_time <= fromUnixTimestamp64Milli(%(end_ms)s)")
+LOGS_RANGE = "timestamp >= %(start_dt)s AND timestamp <= %(end_dt)s"
+
+QUERIES: Dict[str, List[str]] = {
+    "getTraces": [
+        "SELECT trace_id, service_name, operation_name, start_time, end_time, "
+        "duration_ms, status, http_method, http_status_code "
+        "FROM spans WHERE team_id = %(team_id)s AND is_root = 1 "
+        f"AND {SPANS_RANGE} "
+        "ORDER BY start_time DESC LIMIT %(limit)s OFFSET %(offset)s"
+    ],
+    "getTraceSummary": [
+        "SELECT count() as total_traces, "
+        "countIf(status = 'ERROR') as error_traces, "
+        "avg(duration_ms) as avg_duration, "
+        "quantile(0.50)(duration_ms) as p50_duration, "
+        "quantile(0.95)(duration_ms) as p95_duration, "
+        "quantile(0.99)(duration_ms) as p99_duration "
+        "FROM spans WHERE team_id = %(team_id)s AND is_root = 1 "
+        f"AND {SPANS_RANGE}"
+    ],
+    "getServiceMetrics": [
+        "SELECT service_name, "
+        "count() as request_count, "
+        "countIf(status = 'ERROR') as error_count, "
+        "avg(duration_ms) as avg_latency, "
+        "quantile(0.50)(duration_ms) as p50_latency, "
+        "quantile(0.95)(duration_ms) as p95_latency, "
+        "quantile(0.99)(duration_ms) as p99_latency "
+        "FROM spans WHERE team_id = %(team_id)s AND is_root = 1 "
+        f"AND {SPANS_RANGE} "
+        "GROUP BY service_name ORDER BY request_count DESC"
+    ],
+    "getEndpointMetrics": [
+        "SELECT service_name, operation_name, http_method, "
+        "count() as request_count, "
+        "countIf(status = 'ERROR') as error_count, "
+        "avg(duration_ms) as avg_latency, "
+        "quantile(0.50)(duration_ms) as p50_latency, "
+        "quantile(0.95)(duration_ms) as p95_latency, "
+        "quantile(0.99)(duration_ms) as p99_latency "
+        "FROM spans WHERE team_id = %(team_id)s AND span_kind = 'SERVER' "
+        f"AND {SPANS_RANGE} "
+        "GROUP BY service_name, operation_name, http_method "
+        "ORDER BY request_count DESC LIMIT 100"
+    ],
+    "getMetricsTimeSeries": [
+        "SELECT toStartOfMinute(start_time) as timestamp, "
+        "count() as request_count, "
+        "countIf(status = 'ERROR') as error_count, "
+        "avg(duration_ms) as avg_latency "
+        "FROM spans WHERE team_id = %(team_id)s AND is_root = 1 "
+        f"AND {SPANS_RANGE} "
+        "GROUP BY timestamp ORDER BY timestamp ASC"
+    ],
+    "getServiceDependencies": [
+        "SELECT parent.service_name as source, child.service_name as target, "
+        "count() as call_count "
+        "FROM spans child "
+        "INNER JOIN spans parent ON child.parent_span_id = parent.span_id "
+        "AND child.team_id = parent.team_id AND child.trace_id = parent.trace_id "
+        "WHERE child.team_id = %(team_id)s AND child.start_time >= fromUnixTimestamp64Milli(%(start_ms)s) "
+        "AND child.start_time <= fromUnixTimestamp64Milli(%(end_ms)s) "
+        "AND parent.service_name != child.service_name "
+        "GROUP BY source, target ORDER BY call_count DESC LIMIT 100"
+    ],
+    "getLogs": [
+        "SELECT timestamp, level, service_name, logger, message, trace_id, span_id, "
+        "host, pod, container, thread, exception "
+        "FROM observex.logs "
+        f"WHERE team_id = %(team_id)s AND {LOGS_RANGE} "
+        "ORDER BY timestamp DESC LIMIT %(limit)s OFFSET %(offset)s"
+    ],
+    "getLogs[search]": [
+        "SELECT timestamp, level, service_name, logger, message, trace_id, span_id, "
+        "host, pod, container, thread, exception "
+        "FROM observex.logs "
+        f"WHERE team_id = %(team_id)s AND {LOGS_RANGE} "
+        "AND message ILIKE %(search)s "
+        "ORDER BY timestamp DESC LIMIT %(limit)s OFFSET %(offset)s"
+    ],
+    "getLogFacets": [
+        "SELECT level, count() as count FROM observex.logs "
+        f"WHERE team_id = %(team_id)s AND {LOGS_RANGE} "
+        "GROUP BY level ORDER BY count DESC",
+        "SELECT service_name, count() as count FROM observex.logs "
+        f"WHERE team_id = %(team_id)s AND {LOGS_RANGE} "
+        "GROUP BY service_name ORDER BY count DESC LIMIT 20",
+    ],
+    "getLogHistogram": [
+        "SELECT toStartOfMinute(timestamp) as time_bucket, level, count() as count "
+        "FROM observex.logs "
+        f"WHERE team_id = %(team_id)s AND {LOGS_RANGE} "
+        "GROUP BY time_bucket, level ORDER BY time_bucket ASC"
+    ],
+}
+
+RANGE_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+CACHE_DROP_COMMANDS = ["SYSTEM DROP MARK CACHE", "SYSTEM DROP UNCOMPRESSED CACHE"]
+
+
+def parse_range(value: str) -> int:
+    """Parse a range like 15m, 6h or 7d into seconds."""
+    try:
+        return int(value[:-1]) * RANGE_UNITS[value[-1]]
+    except (KeyError, ValueError):
+        raise argparse.ArgumentTypeError(f"Invalid time range '{value}', expected e.g. 15m, 6h, 7d")
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    p50, p90, p99 = (float(p) for p in np.percentile(values, [50, 90, 99]))
+    return {"p50": round(p50, 2), "p90": round(p90, 2), "p99": round(p99, 2),
+            "min": round(min(values), 2), "max": round(max(values), 2),
+            "mean": round(sum(values) / len(values), 2)}
+
+
+class QueryBenchmark:
+    """Runs the repository query catalogue and collects client and server-side statistics."""
+
+    def __init__(self, host: str, port: int, database: str, user: str, password: str):
+        self.client = clickhouse_connect.get_client(
+            host=host, port=port, database=database,
+            username=user, password=password
+        )
+
+    def drop_caches(self) -> bool:
+        try:
+            for command in CACHE_DROP_COMMANDS:
+                self.client.command(command)
+            return True
+        except Exception as e:
+            print(f"  ⚠ Could not drop caches (needs SYSTEM privileges): {e}", file=sys.stderr)
+            return False
+
+    def run_query(self, statements: List[str], params: Dict) -> Dict:
+        """Execute one benchmark iteration (all statements of a repository method)."""
+        query_ids = []
+        summary_rows = summary_bytes = result_rows = 0
+        started = time.perf_counter()
+        for sql in statements:
+            query_id = f"bench-{uuid.uuid4()}"
+            result = self.client.query(sql, parameters=params, settings={"query_id": query_id})
+            query_ids.append(query_id)
+            result_rows += len(result.result_rows)
+            summary = result.summary or {}
+            summary_rows += int(summary.get("read_rows", 0))
+            summary_bytes += int(summary.get("read_bytes", 0))
+        return {
+            "latency_ms": (time.perf_counter() - started) * 1000,
+            "query_ids": query_ids,
+            "read_rows": summary_rows,
+            "read_bytes": summary_bytes,
+            "result_rows": result_rows,
+        }
+
+    def server_stats(self, query_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch read_rows/read_bytes/duration/memory per query_id from system.query_log."""
+        if not query_ids:
+            return {}
+        try:
+            self.client.command("SYSTEM FLUSH LOGS")
+            result = self.client.query(
+                "SELECT query_id, read_rows, read_bytes, query_duration_ms, memory_usage "
+                "FROM system.query_log WHERE type = 'QueryFinish' AND query_id IN %(ids)s",
+                parameters={"ids": query_ids})
+        except Exception as e:
+            print(f"  ⚠ system.query_log unavailable, using HTTP summary headers: {e}", file=sys.stderr)
+            return {}
+        return {row[0]: {"read_rows": row[1], "read_bytes": row[2], "server_ms": row[3], "memory": row[4]}
+                for row in result.result_rows}
+
+    def run(self, team_ids: List[str], ranges: List[str], modes: List[str], queries: List[str],
+            iterations: int = 5, warmup: int = 1, limit: int = 100, search: str = "timeout",
+            end: datetime = None) -> Dict:
+        """Benchmark every (query, team, range, mode) combination."""
+        end = end or datetime.utcnow()
+        end_ms = int((end - datetime(1970, 1, 1)).total_seconds() * 1000)
+        cold_ok = "cold" not in modes or self.drop_caches()
+
+        raw = []
+        for mode in modes:
+            if mode == "cold" and not cold_ok:
+                continue
+            print(f"\n⏱️  {mode} runs ({iterations} iterations)...", file=sys.stderr)
+            for range_name in ranges:
+                seconds = parse_range(range_name)
+                params = {
+                    "start_ms": end_ms - seconds * 1000, "end_ms": end_ms,
+                    "start_dt": end - timedelta(seconds=seconds), "end_dt": end,
+                    "limit": limit, "offset": 0, "search": f"%{search}%",
+                }
+                for team_id in team_ids:
+                    params["team_id"] = team_id
+                    for name in queries:
+                        if mode == "warm":
+                            for _ in range(warmup):
+                                self.run_query(QUERIES[name], params)
+                        runs = []
+                        for _ in range(iterations):
+                            if mode == "cold":
+                                self.drop_caches()
+                            runs.append(self.run_query(QUERIES[name], params))
+                        raw.append({"query": name, "team_id": team_id, "range": range_name,
+                                    "mode": mode, "runs": runs})
+                        p50 = latency_summary([r["latency_ms"] for r in runs])["p50"]
+                        print(f"  {name:<24} {range_name:>4} {team_id[:8]}  p50 {p50:>9.1f}ms", file=sys.stderr)
+
+        server = self.server_stats([qid for entry in raw for run in entry["runs"] for qid in run["query_ids"]])
+        return {
+            "meta": {"end": end.isoformat() + "Z", "iterations": iterations, "warmup": warmup,
+                     "modes": modes, "ranges": ranges, "teams": team_ids},
+            "results": [self._summarise(entry, server) for entry in raw],
+        }
+
+    def _summarise(self, entry: Dict, server: Dict[str, Dict]) -> Dict:
+        read_rows, read_bytes, server_ms, memory = [], [], [], []
+        for run in entry["runs"]:
+            stats = [server[qid] for qid in run["query_ids"] if qid in server]
+            if len(stats) == len(run["query_ids"]):
+                read_rows.append(sum(s["read_rows"] for s in stats))
+                read_bytes.append(sum(s["read_bytes"] for s in stats))
+                server_ms.append(sum(s["server_ms"] for s in stats))
+                memory.append(max(s["memory"] for s in stats))
+            else:
+                read_rows.append(run["read_rows"])
+                read_bytes.append(run["read_bytes"])
+        return {
+            "query": entry["query"], "team_id": entry["team_id"], "range": entry["range"], "mode": entry["mode"],
+            "latency_ms": latency_summary([run["latency_ms"] for run in entry["runs"]]),
+            "server_ms": latency_summary(server_ms),
+            "read_rows": int(np.median(read_rows)),
+            "read_bytes": int(np.median(read_bytes)),
+            "peak_memory": int(max(memory)) if memory else None,
+            "result_rows": entry["runs"][-1]["result_rows"],
+        }
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """List results whose p50 latency or read_rows grew by more than `tolerance` over the baseline."""
+    def key(r):
+        return r["query"], r["team_id"], r["range"], r["mode"]
+
+    previous = {key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get(key(result))
+        if not before:
+            continue
+        for metric, now, then in [("p50 latency", result["latency_ms"].get("p50", 0), before["latency_ms"].get("p50", 0)),
+                                  ("read_rows", result["read_rows"], before["read_rows"])]:
+            if then and now > then * (1 + tolerance):
+                regressions.append(f"{result['query']} {result['range']} {result['mode']} {result['team_id'][:8]}: "
+                                   f"{metric} {then:,.1f} -> {now:,.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ObserveX ClickHouse repository queries")
+    parser.add_argument("--host", default="localhost", help="ClickHouse host")
+    parser.add_argument("--port", type=int, default=8123, help="ClickHouse HTTP port")
+    parser.add_argument("--database", default="observex", help="Database name")
+    parser.add_argument("--user", default="observex", help="Username")
+    parser.add_argument("--password", default="observex123", help="Password")
+    parser.add_argument("--team-ids", nargs="+", default=[
+        "11111111-1111-1111-1111-111111111111",
+        "22222222-2222-2222-2222-222222222222",
+    ], help="Team UUIDs to query")
+    parser.add_argument("--ranges", default="15m,1h,6h,24h,7d", help="Comma-separated time ranges")
+    parser.add_argument("--modes", default="warm", help="Comma-separated cache modes: cold, warm")
+    parser.add_argument("--queries", default=",".join(QUERIES), help="Comma-separated repository methods")
+    parser.add_argument("--iterations", type=int, default=5, help="Measured iterations per combination")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured iterations before warm runs")
+    parser.add_argument("--limit", type=int, default=100, help="LIMIT for getTraces/getLogs (controller default)")
+    parser.add_argument("--search", default="timeout", help="Search term for getLogs[search]")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative growth in p50 latency/read_rows vs --baseline (default: 0.25)")
+
+    args = parser.parse_args()
+    queries = args.queries.split(",")
+    unknown = [q for q in queries if q not in QUERIES]
+    if unknown:
+        parser.error(f"Unknown queries: {', '.join(unknown)} (available: {', '.join(QUERIES)})")
+    ranges = args.ranges.split(",")
+    for r in ranges:
+        parse_range(r)
+
+    benchmark = QueryBenchmark(host=args.host, port=args.port, database=args.database,
+                               user=args.user, password=args.password)
+    report = benchmark.run(args.team_ids, ranges, args.modes.split(","), queries,
+                           iterations=args.iterations, warmup=args.warmup,
+                           limit=args.limit, search=args.search)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Wrote {len(report['results'])} results to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions vs {args.baseline}:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\n✅ No regressions vs {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Retry policy and error classification for the ClickHouse data generator sinks.
+
+Direct ClickHouse inserts carry a deterministic insert_deduplication_token, so
+retrying them is always safe: if a timed-out insert did land, the retry is
+dropped by the server (spans/logs set non_replicated_deduplication_window).
+
+The backend /api/ingest/* endpoints have no deduplication, so their failures
+are classified before anything is resent:
+
+  retry      the request was not processed (connect failure, 429, 500, 502, 503)
+  rejected   the backend refused the batch (other 4xx); not written, not retried
+  ambiguous  the request may have been processed (read timeout, dropped
+             connection, 504); never retried and never re-inserted directly
+
+The client libraries are imported only when an error has to be classified, so
+a file or null sink run never loads them.
+"""
+
+import random
+import re
+import time
+from typing import Callable, Iterator, Optional
+
+# ClickHouse error codes worth retrying: timeouts, overload, network and Keeper hiccups
+RETRYABLE_CLICKHOUSE_CODES = {
+    159,  # TIMEOUT_EXCEEDED
+    202,  # TOO_MANY_SIMULTANEOUS_QUERIES
+    203,  # NO_FREE_CONNECTION
+    209,  # SOCKET_TIMEOUT
+    210,  # NETWORK_ERROR
+    241,  # MEMORY_LIMIT_EXCEEDED
+    242,  # TABLE_IS_READ_ONLY
+    252,  # TOO_MANY_PARTS
+    319,  # UNKNOWN_STATUS_OF_INSERT
+    425,  # SYSTEM_ERROR
+    999,  # KEEPER_EXCEPTION
+}
+RETRYABLE_HTTP_STATUS = {429, 500, 502, 503}
+AMBIGUOUS_HTTP_STATUS = {504}
+
+_CODE_PATTERN = re.compile(r"Code: (\d+)")
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt n sleeps uniform(0, min(max_delay, base * 2^n))."""
+
+    def __init__(self, attempts: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0  # Resends so far (all run() calls), for the generator metrics
+
+    def delays(self) -> Iterator[float]:
+        for attempt in range(self.attempts - 1):
+            yield random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def run(self, fn: Callable, retryable: Callable[[Exception], bool], label: str = "request"):
+        """Call fn() until it succeeds, a non-retryable error is raised or attempts run out."""
+        delays = self.delays()
+        attempt = 1
+        while True:
+            try:
+                return fn()
+            except Exception as e:
+                delay = next(delays, None) if retryable(e) else None
+                if delay is None:
+                    raise
+                print(f"  ⚠ {label} failed (attempt {attempt}/{self.attempts}), retrying in {delay:.1f}s: {e}")
+                self.retries += 1
+                time.sleep(delay)
+                attempt += 1
+
+
+def clickhouse_error_code(error: Exception) -> Optional[int]:
+    match = _CODE_PATTERN.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+def is_retryable_clickhouse_error(error: Exception) -> bool:
+    """Connection-level failures and transient server errors (safe to resend with a dedup token)."""
+    if getattr(error, "code", None) in RETRYABLE_CLICKHOUSE_CODES:  # clickhouse_driver (native sink)
+        return True
+    try:
+        from clickhouse_connect.driver.exceptions import DatabaseError, OperationalError
+    except ImportError:
+        return False
+    if isinstance(error, OperationalError):
+        return True
+    return isinstance(error, DatabaseError) and clickhouse_error_code(error) in RETRYABLE_CLICKHOUSE_CODES
+
+
+def classify_api_error(error: Exception) -> str:
+    """Classify a failed /api/ingest request (requests or aiohttp) as retry, rejected or ambiguous."""
+    status = getattr(error, "status", None)  # aiohttp.ClientResponseError
+    response = getattr(error, "response", None)  # requests.HTTPError
+    if status is None and response is not None:
+        status = response.status_code
+    if status is not None:
+        if status in RETRYABLE_HTTP_STATUS:
+            return "retry"
+        return "ambiguous" if status in AMBIGUOUS_HTTP_STATUS else "rejected"
+    try:
+        import requests
+        from urllib3.exceptions import MaxRetryError, NewConnectionError
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return "retry"
+        # Refused connection / unresolvable host: ConnectionError(MaxRetryError(reason=NewConnectionError))
+        if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+            reason = error.args[0]
+            if isinstance(reason, MaxRetryError):
+                reason = reason.reason
+            if isinstance(reason, NewConnectionError):
+                return "retry"
+    except ImportError:
+        pass
+    try:
+        import aiohttp
+        if isinstance(error, aiohttp.ClientConnectorError):
+            return "retry"
+    except ImportError:
+        pass
+    return "ambiguous"  # Read timeouts, resets and disconnects after the body was sent
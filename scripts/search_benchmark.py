@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+ClickHouse Log Search Benchmark for ObserveX
+
+Measures how well idx_message (tokenbf_v1(32768, 3, 0) GRANULARITY 4) skips
+granules for token searches over logs generated with
+`clickhouse_data_generator.py --engine numpy --message-corpus`. The corpus is
+rebuilt from the same parameters and seed, so the benchmark knows which words
+are common and which needle tokens are rare:
+
+  rank N    the vocabulary word with Zipf rank N (1 = in most lines)
+  needle    needle0000, ...: in ~needle_rate / needles of the lines
+  absent    a token that never occurs; every granule should be skipped
+
+Each token is searched with every predicate form below. Only whole tokens can
+be looked up in a token bloom filter: hasToken() and a LIKE pattern with the
+token between separators ('% token %') can use the index; '%token%' (the
+token may be part of a longer word) and ILIKE (what getLogs[search] issues)
+cannot, so they read every granule in the time range.
+
+Granules selected by idx_message come from EXPLAIN indexes = 1; read_rows and
+server time from system.query_log.
+
+Usage:
+    python search_benchmark.py                                  # Default corpus, 1h and 24h ranges
+    python search_benchmark.py --ranks 1,100,10000 --forms hasToken,like_bounded
+    python search_benchmark.py --corpus-vocab 200000 --seed 7 --output search.json  # Match the load's flags
+"""
+
+import argparse
+import json
+import re
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from message_corpus import MessageCorpus, needle_token
+from query_benchmark import LOGS_RANGE, QueryBenchmark, latency_summary, parse_range
+
+SEARCH_FORMS: Dict[str, str] = {
+    "hasToken": "hasToken(message, %(token)s)",
+    "like": "message LIKE %(like)s",
+    "like_bounded": "message LIKE %(like_bounded)s",
+    "ilike": "message ILIKE %(like)s",
+}
+
+SEARCH_QUERY = ("SELECT count() FROM observex.logs "
+                f"WHERE team_id = %(team_id)s AND {LOGS_RANGE} AND {{predicate}}")
+
+_GRANULES = re.compile(r"Granules:\s*(\d+)/(\d+)")
+
+
+def index_granules(explain_lines: List[str], index: str = "idx_message") -> Optional[Tuple[int, int]]:
+    """(selected, total) granules for `index` from EXPLAIN indexes = 1 output, None if it was not used."""
+    in_index = False
+    for line in explain_lines:
+        text = line.strip()
+        if text.startswith("Name:"):
+            in_index = text == f"Name: {index}"
+        elif text in ("MinMax", "Partition", "PrimaryKey", "Skip"):
+            in_index = False
+        elif in_index:
+            match = _GRANULES.search(text)
+            if match:
+                return int(match.group(1)), int(match.group(2))
+    return None
+
+
+class SearchBenchmark(QueryBenchmark):
+    """Token searches against the logs table, with idx_message granule counts per query."""
+
+    def explain_granules(self, sql: str, params: Dict) -> Optional[Tuple[int, int]]:
+        try:
+            result = self.client.query(f"EXPLAIN indexes = 1 {sql}", parameters=params)
+        except Exception as e:
+            print(f"  ⚠ EXPLAIN failed: {e}", file=sys.stderr)
+            return None
+        return index_granules([row[0] for row in result.result_rows])
+
+    def run(self, team_ids: List[str], ranges: List[str], probes: List[Tuple[str, str]], forms: List[str],
+            iterations: int = 5, warmup: int = 1, end: datetime = None) -> Dict:
+        """Benchmark every (probe, form, team, range) combination."""
+        end = end or datetime.utcnow()
+        raw = []
+        print(f"\n⏱️  Search runs ({iterations} iterations)...", file=sys.stderr)
+        for range_name in ranges:
+            seconds = parse_range(range_name)
+            for team_id in team_ids:
+                for probe, token in probes:
+                    params = {"team_id": team_id, "start_dt": end - timedelta(seconds=seconds), "end_dt": end,
+                              "token": token, "like": f"%{token}%", "like_bounded": f"% {token} %"}
+                    for form in forms:
+                        sql = SEARCH_QUERY.format(predicate=SEARCH_FORMS[form])
+                        for _ in range(warmup):
+                            self.run_query([sql], params)
+                        runs = [self.run_query([sql], params) for _ in range(iterations)]
+                        matches = self.client.query(sql, parameters=params).result_rows[0][0]
+                        granules = self.explain_granules(sql, params)
+                        raw.append({"probe": probe, "token": token, "form": form, "team_id": team_id,
+                                    "range": range_name, "runs": runs, "matches": matches, "granules": granules})
+                        p50 = latency_summary([r["latency_ms"] for r in runs])["p50"]
+                        skipped = "  no index"
+                        if granules and granules[1]:
+                            skipped = f"{1 - granules[0] / granules[1]:>6.1%} skipped"
+                        print(f"  {probe:<12} {form:<13} {range_name:>4} {team_id[:8]}  p50 {p50:>8.1f}ms "
+                              f"{skipped}  {matches:>10,} matches", file=sys.stderr)
+
+        server = self.server_stats([qid for entry in raw for run in entry["runs"] for qid in run["query_ids"]])
+        return {
+            "meta": {"end": end.isoformat() + "Z", "iterations": iterations, "warmup": warmup,
+                     "ranges": ranges, "teams": team_ids, "forms": forms},
+            "results": [self._summarise_search(entry, server) for entry in raw],
+        }
+
+    def _summarise_search(self, entry: Dict, server: Dict[str, Dict]) -> Dict:
+        read_rows, server_ms = [], []
+        for run in entry["runs"]:
+            stats = server.get(run["query_ids"][0])
+            read_rows.append(stats["read_rows"] if stats else run["read_rows"])
+            if stats:
+                server_ms.append(stats["server_ms"])
+        granules = entry["granules"]
+        return {
+            "probe": entry["probe"], "token": entry["token"], "form": entry["form"],
+            "team_id": entry["team_id"], "range": entry["range"], "matches": entry["matches"],
+            "latency_ms": latency_summary([run["latency_ms"] for run in entry["runs"]]),
+            "server_ms": latency_summary(server_ms),
+            "read_rows": int(sorted(read_rows)[len(read_rows) // 2]),
+            "granules_selected": granules[0] if granules else None,
+            "granules_total": granules[1] if granules else None,
+            "skip_ratio": round(1 - granules[0] / granules[1], 4) if granules and granules[1] else None,
+        }
+
+
+def corpus_probes(corpus: MessageCorpus, ranks: List[int], needles: int) -> List[Tuple[str, str]]:
+    """(probe name, token) pairs: words by Zipf rank, the first needle tokens and one absent token."""
+    probes = [(f"rank {rank}", corpus.word_at_rank(rank)) for rank in ranks if rank <= len(corpus.words)]
+    probes += [("needle", needle_token(i)) for i in range(min(needles, corpus.needles))]
+    probes.append(("absent", f"absent{uuid.uuid4().hex[:12]}"))
+    return probes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark token search and tokenbf granule skipping on logs")
+    parser.add_argument("--host", default="localhost", help="ClickHouse host")
+    parser.add_argument("--port", type=int, default=8123, help="ClickHouse HTTP port")
+    parser.add_argument("--database", default="observex", help="Database name")
+    parser.add_argument("--user", default="observex", help="Username")
+    parser.add_argument("--password", default="observex123", help="Password")
+    parser.add_argument("--team-ids", nargs="+", default=[
+        "11111111-1111-1111-1111-111111111111",
+    ], help="Team UUIDs to query")
+    parser.add_argument("--ranges", default="1h,24h", help="Comma-separated time ranges")
+    parser.add_argument("--forms", default=",".join(SEARCH_FORMS), help="Comma-separated predicate forms")
+    parser.add_argument("--ranks", default="1,10,100,1000,10000", help="Zipf ranks of the words to search for")
+    parser.add_argument("--needle-probes", type=int, default=3, help="Number of needle tokens to search for")
+    parser.add_argument("--iterations", type=int, default=5, help="Measured iterations per combination")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured iterations before each combination")
+    # Must match the generator run (clickhouse_data_generator.py --message-corpus)
+    parser.add_argument("--corpus-vocab", type=int, default=50_000, help="Message corpus: vocabulary size")
+    parser.add_argument("--corpus-zipf", type=float, default=1.07, help="Message corpus: Zipf exponent")
+    parser.add_argument("--needles", type=int, default=100, help="Message corpus: distinct needle tokens")
+    parser.add_argument("--seed", type=int, default=0, help="Generator --seed (corpus vocabulary seed)")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+
+    args = parser.parse_args()
+    forms = args.forms.split(",")
+    unknown = [f for f in forms if f not in SEARCH_FORMS]
+    if unknown:
+        parser.error(f"Unknown forms: {', '.join(unknown)} (available: {', '.join(SEARCH_FORMS)})")
+    ranges = args.ranges.split(",")
+    for r in ranges:
+        parse_range(r)
+
+    corpus = MessageCorpus(vocab_size=args.corpus_vocab, zipf=args.corpus_zipf, needles=args.needles,
+                           seed=args.seed)
+    probes = corpus_probes(corpus, [int(r) for r in args.ranks.split(",")], args.needle_probes)
+    print("🔎 Probes: " + ", ".join(f"{probe}={token}" for probe, token in probes), file=sys.stderr)
+
+    benchmark = SearchBenchmark(host=args.host, port=args.port, database=args.database,
+                                user=args.user, password=args.password)
+    report = benchmark.run(args.team_ids, ranges, probes, forms, iterations=args.iterations, warmup=args.warmup)
+    report["meta"]["corpus"] = {"vocab": args.corpus_vocab, "zipf": args.corpus_zipf,
+                                "needles": args.needles, "seed": args.seed}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Wrote {len(report['results'])} results to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
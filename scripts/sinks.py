@@ -0,0 +1,257 @@
+"""
+Write sinks for the ClickHouse data generator (--sink, --table-sink).
+
+The write stage hands every encoded batch to its table's sink. A sink names
+the encoding it takes (see ClickHouseDataGenerator._encode_batch) and opens
+its connection or file on first use, importing its client library only then,
+so a run that only writes files never loads clickhouse_connect or requests:
+
+  null     discards batches before encoding: generation speed alone
+  file     appends JSONEachRow lines to <dir>/<table>.jsonl, one write() per
+           batch (O_APPEND, so worker processes can share the file); load with
+           clickhouse-client --query "INSERT INTO <table> FORMAT JSONEachRow"
+  http     ClickHouse HTTP interface (clickhouse_connect): Arrow, columns or rows
+  native   ClickHouse native TCP protocol (clickhouse_driver): columns or rows
+  api      backend /api/ingest/* (requests; aiohttp with --api-concurrency)
+  otlp     OTLP/HTTP export requests (otlp.py) POSTed to <endpoint>/v1/traces
+           and /v1/logs, or without an endpoint appended to <dir>/<signal>.otlp.pb
+           (length-prefixed, like the collector's file exporter) / .otlp.jsonl
+
+Retries, dedup tokens, metrics and the API -> direct insert fallback stay in
+the generator; sinks only move batches.
+"""
+
+import gzip
+import json
+import os
+import struct
+from datetime import datetime
+from typing import Dict, List
+
+from otlp import CONTENT_TYPES, SIGNALS
+
+SINKS = ["null", "file", "http", "native", "api", "otlp"]
+# Sinks that write to ClickHouse (directly or through the backend): run() reads TTLs, parts and views for these
+CLICKHOUSE_SINKS = {"http", "native", "api"}
+
+
+def parse_table_sinks(value: str) -> Dict[str, str]:
+    """Parse "spans=native,logs=file" into {"spans": "native", "logs": "file"}."""
+    sinks = {}
+    for part in value.split(","):
+        table, _, sink = part.partition("=")
+        if sink not in SINKS:
+            raise ValueError(f"Invalid sink '{part}', expected table=<{'|'.join(SINKS)}>")
+        sinks[table.strip()] = sink
+    return sinks
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")  # DateTime text ClickHouse parses without best_effort
+    if isinstance(value, bytes):
+        return value.decode()
+    raise TypeError(f"Cannot encode {type(value).__name__} as JSON")
+
+
+_JSON = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_json_value)
+
+
+def json_each_row(rows: List[list], column_names: List[str]) -> bytes:
+    """Row lists as JSONEachRow lines."""
+    encode = _JSON.encode
+    return "".join([encode(dict(zip(column_names, row))) + "\n" for row in rows]).encode()
+
+
+class NullSink:
+    """Discards every batch (nothing is encoded either)."""
+
+    name = "null"
+    encoding = "none"
+
+    def insert(self, table: str, encoded: tuple, column_names: List[str], settings: Dict) -> int:
+        return 0
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """Appends JSONEachRow batches to one file per table."""
+
+    name = "file"
+    encoding = "json"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._files = {}
+
+    def path(self, table: str) -> str:
+        return os.path.join(self.directory, f"{table}.jsonl")
+
+    def insert(self, table: str, encoded: tuple, column_names: List[str], settings: Dict) -> int:
+        f = self._files.get(table)
+        if f is None:
+            os.makedirs(self.directory, exist_ok=True)
+            f = self._files[table] = open(self.path(table), "ab", buffering=0)
+        return f.write(encoded[1])
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+
+class ClickHouseHTTPSink:
+    """clickhouse_connect over HTTP; its client also serves the generator's metadata queries."""
+
+    name = "http"
+
+    def __init__(self, host: str, port: int, database: str, user: str, password: str, compression: str = None,
+                 use_arrow: bool = True):
+        self.connection = dict(host=host, port=port, database=database, username=user, password=password,
+                               compress=compression or False)  # None: plain HTTP bodies; lz4/zstd: compressed
+        self.encoding = "arrow" if use_arrow else "columns"
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import clickhouse_connect
+            self._client = clickhouse_connect.get_client(**self.connection)
+        return self._client
+
+    def insert(self, table: str, encoded: tuple, column_names: List[str], settings: Dict) -> int:
+        kind, data = encoded[0], encoded[1]
+        if kind == "arrow":
+            summary = self.client.insert_arrow(table, data, settings=settings)
+        else:
+            summary = self.client.insert(table, data, column_names=column_names, column_oriented=kind == "columns",
+                                         settings=settings)
+        # written_bytes comes from the X-ClickHouse-Summary header (uncompressed block bytes)
+        return summary.written_bytes() if summary else 0
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+
+class ClickHouseNativeSink:
+    """clickhouse_driver over the native TCP protocol (columnar inserts of numpy batches)."""
+
+    name = "native"
+    encoding = "native"
+
+    def __init__(self, host: str, port: int, database: str, user: str, password: str, compression: str = None):
+        self.connection = dict(host=host, port=port, database=database, user=user, password=password,
+                               compression=compression or False)
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from clickhouse_driver import Client
+            self._client = Client(**self.connection)
+        return self._client
+
+    def insert(self, table: str, encoded: tuple, column_names: List[str], settings: Dict) -> int:
+        kind, data = encoded[0], encoded[1]
+        self.client.execute(f"INSERT INTO {table} ({', '.join(column_names)}) VALUES", data,
+                            columnar=kind == "native", settings=settings)
+        return 0  # The native protocol reports no written bytes
+
+    def close(self):
+        if self._client is not None:
+            self._client.disconnect()
+
+
+class ApiSink:
+    """Backend /api/ingest/<table> over one keep-alive requests session, or the asyncio client."""
+
+    name = "api"
+    encoding = "api"
+
+    def __init__(self, api_url: str, auth_token: str):
+        self.api_url = api_url
+        self.auth_token = auth_token
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def post(self, table: str, body: bytes, headers: Dict[str, str]) -> int:
+        """POST one encoded chunk (api_encoder.encode_bodies); returns its size in bytes."""
+        response = self.session.post(
+            f"{self.api_url}/api/ingest/{table}",
+            data=body,
+            headers={"Authorization": f"Bearer {self.auth_token}", **headers},
+            timeout=30
+        )
+        response.raise_for_status()
+        return len(body)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+class OtlpSink:
+    """OTLP/HTTP export requests to a collector endpoint, or to one file per signal."""
+
+    name = "otlp"
+    encoding = "otlp"
+
+    _LENGTH = struct.Struct(">I")  # File exporter framing of protobuf messages
+
+    def __init__(self, fmt: str, directory: str, endpoint: str = None, compress: bool = False):
+        self.fmt = fmt
+        self.directory = directory
+        self.endpoint = endpoint.rstrip("/") if endpoint else None
+        self.compress = compress
+        self._session = None
+        self._files = {}
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def path(self, table: str) -> str:
+        return os.path.join(self.directory, f"{SIGNALS[table]}.otlp.{'pb' if self.fmt == 'proto' else 'jsonl'}")
+
+    def insert(self, table: str, encoded: tuple, column_names: List[str], settings: Dict) -> int:
+        """Send or append the (body, records) requests of encoded ("otlp", requests, rows); returns bytes written."""
+        if self.endpoint:
+            return sum(self.post(table, body) for body, _ in encoded[1])
+        if self.fmt == "proto":
+            data = b"".join(self._LENGTH.pack(len(body)) + body for body, _ in encoded[1])
+        else:
+            data = b"".join(body + b"\n" for body, _ in encoded[1])
+        f = self._files.get(table)
+        if f is None:
+            os.makedirs(self.directory, exist_ok=True)
+            f = self._files[table] = open(self.path(table), "ab", buffering=0)
+        return f.write(data)
+
+    def post(self, table: str, body: bytes) -> int:
+        """POST one export request; returns its size on the wire."""
+        headers = {"Content-Type": CONTENT_TYPES[self.fmt]}
+        if self.compress:
+            body = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        response = self.session.post(f"{self.endpoint}/v1/{SIGNALS[table]}", data=body, headers=headers, timeout=30)
+        response.raise_for_status()
+        return len(body)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+        for f in self._files.values():
+            f.close()
+        self._files = {}
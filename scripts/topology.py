@@ -0,0 +1,274 @@
+"""
+Synthetic service topology for the ClickHouse data generator (--topology mode).
+
+Builds a random layered call graph at realistic size (e.g. 1,500 services) from
+a handful of parameters, so LowCardinality(service_name), the idx_service bloom
+filters and getServiceDependencies can be benchmarked at production cardinality
+instead of against the six built-in SERVICES.
+
+  - Services are spread over `depth` layers. Layer 0 holds a few edge services
+    (trace entry points); each service calls 1..fan_out services in deeper
+    layers, mostly the next one, and every service has at least one caller.
+  - Popularity is power-law (Zipf): a few shared services (think auth, cache)
+    receive most calls and log lines, and the long tail is rarely hit.
+  - Each service gets a variable number of endpoints around `endpoints`.
+
+The graph is deterministic for a given seed, so worker processes rebuild the
+same topology from the parameters alone.
+
+TopologySpanBatchGenerator walks the graph level by level with NumPy and emits
+the same column batches as columnar_engine.SpanBatchGenerator.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+from columnar_engine import (DictColumn, MapColumn, constant, exclusive_offsets, random_hex_ids,
+                             vocabulary, weights_to_probabilities)
+
+DOMAINS = [
+    "user", "order", "payment", "inventory", "notification", "search", "catalog", "cart",
+    "shipping", "billing", "auth", "session", "pricing", "review", "recommendation", "media",
+    "account", "ledger", "fraud", "report", "config", "audit", "profile", "checkout",
+]
+ROLES = ["gateway", "api", "service", "worker", "store", "cache"]
+RESOURCES = [
+    "items", "status", "history", "search", "batch", "events", "settings", "summary",
+    "export", "validate", "sync", "lookup", "metrics", "preferences", "quotes", "limits",
+]
+
+
+class ServiceTopology:
+    """A layered service call graph: names, endpoints, layers, CSR callee lists and popularity."""
+
+    def __init__(self, names: List[str], endpoints: List[List[str]], layer: np.ndarray,
+                 callee_offsets: np.ndarray, callees: np.ndarray, popularity: np.ndarray):
+        self.names = names
+        self.endpoints = endpoints
+        self.layer = layer
+        self.callee_offsets = callee_offsets  # Service i calls callees[callee_offsets[i]:callee_offsets[i + 1]]
+        self.callees = callees
+        self.popularity = popularity  # Normalised Zipf weights, summing to 1
+
+    @classmethod
+    def generate(cls, services: int = 1500, depth: int = 5, fan_out: int = 4, endpoints: int = 8,
+                 zipf: float = 1.1, seed: int = 0) -> "ServiceTopology":
+        if services < depth:
+            raise ValueError(f"Need at least one service per layer ({services} services, depth {depth})")
+        rng = np.random.default_rng(seed)
+
+        # A few edge services, the rest split evenly over the deeper layers
+        n_edge = max(1, services // 50)
+        deeper = np.array_split(np.arange(n_edge, services), depth - 1) if depth > 1 else []
+        layers = [np.arange(n_edge)] + list(deeper)
+        layer = np.zeros(services, dtype=np.int32)
+        for i, members in enumerate(layers):
+            layer[members] = i
+
+        # Zipf popularity over a random ranking, so popular services are spread across layers
+        rank = rng.permutation(services)
+        weight = 1.0 / (rank + 1.0) ** zipf
+        popularity = weight / weight.sum()
+
+        names = []
+        for i in range(services):
+            role = ROLES[0] if layer[i] == 0 else ROLES[1 + (i % (len(ROLES) - 1))]
+            names.append(f"{DOMAINS[i % len(DOMAINS)]}-{role}-{i:04d}")
+
+        endpoint_lists = []
+        for i, count in enumerate(rng.integers(max(1, endpoints // 2), endpoints * 3 // 2 + 1, services)):
+            domain = DOMAINS[i % len(DOMAINS)]
+            picks = rng.choice(len(RESOURCES), size=min(int(count), len(RESOURCES)), replace=False)
+            endpoint_lists.append([f"/{domain}/v1/{RESOURCES[j]}" for j in sorted(picks)])
+
+        # Callees: mostly the next layer, sometimes any deeper one; weighted by popularity
+        callee_lists = []
+        for i in range(services):
+            if layer[i] == depth - 1:
+                callee_lists.append(np.empty(0, dtype=np.int64))
+                continue
+            target_layer = layer[i] + 1 if rng.random() < 0.8 else rng.integers(layer[i] + 1, depth)
+            candidates = layers[target_layer]
+            k = min(int(rng.integers(1, fan_out + 1)), len(candidates))
+            p = popularity[candidates] / popularity[candidates].sum()
+            callee_lists.append(rng.choice(candidates, size=k, replace=False, p=p))
+
+        # Every non-entry service gets at least one caller in the layer above, so all are reachable
+        called = np.zeros(services, dtype=bool)
+        called[np.concatenate(callee_lists).astype(np.int64)] = True
+        for orphan in np.flatnonzero(~called & (layer > 0)):
+            caller = rng.choice(layers[layer[orphan] - 1])
+            callee_lists[caller] = np.append(callee_lists[caller], orphan)
+        callee_lists = [np.sort(c) for c in callee_lists]
+
+        counts = np.array([len(c) for c in callee_lists])
+        callee_offsets = np.zeros(services + 1, dtype=np.int64)
+        np.cumsum(counts, out=callee_offsets[1:])
+        callees = np.concatenate(callee_lists).astype(np.int64) if counts.sum() else np.empty(0, dtype=np.int64)
+        return cls(names, endpoint_lists, layer, callee_offsets, callees, popularity)
+
+    @property
+    def services(self) -> Dict[str, Dict]:
+        """The topology in the shape of clickhouse_data_generator.SERVICES."""
+        return {name: {"endpoints": eps} for name, eps in zip(self.names, self.endpoints)}
+
+    @property
+    def entry_services(self) -> np.ndarray:
+        return np.flatnonzero(self.layer == 0)
+
+    def describe(self) -> str:
+        edges = len(self.callees)
+        n_endpoints = sum(len(eps) for eps in self.endpoints)
+        top = np.argsort(self.popularity)[::-1][:3]
+        return (f"{len(self.names):,} services in {self.layer.max() + 1} layers "
+                f"({len(self.entry_services)} entry), {edges:,} call edges, {n_endpoints:,} endpoints; "
+                f"top services {', '.join(self.names[i] for i in top)} "
+                f"take {self.popularity[top].sum():.0%} of traffic")
+
+
+class TopologySpanBatchGenerator:
+    """
+    Trace generator over a ServiceTopology.
+
+    A trace starts as a SERVER span on an entry service (chosen by popularity) and
+    fans out level by level: every span makes Poisson(calls_per_span) calls,
+    capped at its service's callee count, to callees picked by popularity.
+    Child spans run inside their parent's time window. Batches have the same
+    columns and value distributions (HTTP on roots, 5% child errors) as
+    SpanBatchGenerator.
+    """
+
+    HOSTS = 5
+    PODS_PER_SERVICE = 3
+    CHILD_ERROR_RATE = 0.05
+
+    def __init__(self, topology: ServiceTopology, http_methods: List[str], http_status_codes: List[int],
+                 http_status_weights: List[int], rng: np.random.Generator, calls_per_span: float = 1.5):
+        self.rng = rng
+        self.topology = topology
+        self.calls_per_span = calls_per_span
+
+        entry = topology.entry_services
+        self.entry_idx = entry
+        self.entry_p = topology.popularity[entry] / topology.popularity[entry].sum()
+
+        # Cumulative callee weights per CSR segment, for vectorized weighted picks. Popularity is
+        # smoothed by the uniform share so long-tail callees still see some traffic.
+        self.callee_count = np.diff(topology.callee_offsets)
+        smoothed = topology.popularity + 1.0 / len(topology.names)
+        self.callee_cum = np.cumsum(smoothed[topology.callees])
+        self.callee_cum_before = np.concatenate([[0.0], self.callee_cum])
+
+        self.service_vocab = vocabulary(topology.names)
+        self.pod_vocab = vocabulary(
+            [f"pod-{name}-{i}" for name in topology.names for i in range(1, self.PODS_PER_SERVICE + 1)])
+        self.host_vocab = vocabulary([f"host-{i}" for i in range(1, self.HOSTS + 1)])
+
+        self.endpoint_vocab = vocabulary([ep for eps in topology.endpoints for ep in eps])
+        self.endpoint_count = np.array([len(eps) for eps in topology.endpoints])
+        self.endpoint_offset = exclusive_offsets(self.endpoint_count)
+        # Root URL code = 1 + the root's endpoint code
+        self.url_vocab = vocabulary([""] + [f"https://api.example.com{ep}" for ep in self.endpoint_vocab])
+        self.method_vocab = vocabulary([""] + list(http_methods))
+        self.status_codes = np.asarray(http_status_codes, dtype=np.uint16)
+        self.status_p = weights_to_probabilities(http_status_weights)
+        self.status_vocab = vocabulary(["OK", "ERROR"])
+        self.kind_vocab = vocabulary(["SERVER"])
+
+        # Expected spans per trace (geometric in calls_per_span, ignoring callee caps); sizes batches
+        levels = int(topology.layer.max()) + 1
+        self.spans_per_trace = max(1, int(np.ceil(sum(calls_per_span ** d for d in range(levels)))))
+
+    def _pick_callees(self, parent_service: np.ndarray) -> np.ndarray:
+        """One popularity-weighted callee of each parent service."""
+        lo = self.callee_cum_before[self.topology.callee_offsets[parent_service]]
+        hi = self.callee_cum_before[self.topology.callee_offsets[parent_service + 1]]
+        target = lo + self.rng.random(len(parent_service)) * (hi - lo)
+        pick = np.searchsorted(self.callee_cum, target, side="right")
+        pick = np.minimum(pick, self.topology.callee_offsets[parent_service + 1] - 1)
+        return self.topology.callees[pick]
+
+    def generate(self, team_id: str, end_ms: int, hour_index: np.ndarray,
+                 spread_minutes: int = 60) -> Dict[str, object]:
+        """Generate the spans of len(hour_index) traces as one column batch (see SpanBatchGenerator)."""
+        rng = self.rng
+        n_traces = len(hour_index)
+
+        trace_start = (end_ms - hour_index.astype(np.int64) * 3_600_000
+                       - rng.integers(0, spread_minutes, n_traces) * 60_000)
+
+        # Level 0: roots
+        trace = np.arange(n_traces)
+        service = rng.choice(self.entry_idx, size=n_traces, p=self.entry_p)
+        start = trace_start
+        duration = rng.integers(50, 501, n_traces)
+        parent = np.full(n_traces, -1)
+        levels = [(trace, service, start, duration, parent)]
+        emitted = n_traces
+
+        # Deeper levels: each span calls Poisson(calls_per_span) popular callees
+        while True:
+            trace, service, start, duration, _ = levels[-1]
+            calls = np.minimum(rng.poisson(self.calls_per_span, len(service)), self.callee_count[service])
+            calls = np.where(self.callee_count[service] > 0, calls, 0)
+            if not calls.any():
+                break
+            caller = np.repeat(np.arange(len(service)), calls)
+            child_service = self._pick_callees(service[caller])
+            child_duration = np.maximum(1, (duration[caller] * rng.uniform(0.1, 0.6, len(caller))).astype(np.int64))
+            child_start = start[caller] + (rng.random(len(caller))
+                                           * (duration[caller] - child_duration + 1)).astype(np.int64)
+            # Parent references are global span positions: offset of the previous level + caller index
+            levels.append((trace[caller], child_service, child_start, child_duration,
+                           emitted - len(service) + caller))
+            emitted += len(caller)
+
+        # Keep each trace's spans together, as the other generators do, remapping parent positions
+        trace_of_span = np.concatenate([lvl[0] for lvl in levels])
+        order = np.argsort(trace_of_span, kind="stable")
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        trace_of_span = trace_of_span[order]
+        service_idx = np.concatenate([lvl[1] for lvl in levels])[order]
+        start = np.concatenate([lvl[2] for lvl in levels])[order]
+        duration = np.concatenate([lvl[3] for lvl in levels])[order]
+        parent = np.concatenate([lvl[4] for lvl in levels])[order]
+        n = len(service_idx)
+        is_root = parent < 0
+        parent = np.where(is_root, 0, position[np.maximum(parent, 0)])
+
+        span_id = random_hex_ids(rng, n, 16)
+        trace_id = random_hex_ids(rng, n_traces, 32)[trace_of_span]
+        parent_span_id = np.ma.MaskedArray(span_id[parent], mask=is_root)
+
+        operation = self.endpoint_offset[service_idx] + rng.integers(0, self.endpoint_count[service_idx])
+        http_status = np.where(is_root, rng.choice(self.status_codes, size=n, p=self.status_p), 0)
+        is_error = np.where(is_root, http_status >= 500, rng.random(n) < self.CHILD_ERROR_RATE)
+
+        pod_idx = service_idx * self.PODS_PER_SERVICE + rng.integers(0, self.PODS_PER_SERVICE, n)
+        service_name = DictColumn(service_idx, self.service_vocab)
+
+        return {
+            "team_id": constant(team_id, n),
+            "trace_id": trace_id,
+            "span_id": span_id,
+            "parent_span_id": parent_span_id,
+            "is_root": is_root.astype(np.uint8),
+            "operation_name": DictColumn(operation, self.endpoint_vocab),
+            "service_name": service_name,
+            "span_kind": DictColumn(np.zeros(n, dtype=np.int32), self.kind_vocab),
+            "start_time": start.astype("datetime64[ms]"),
+            "end_time": (start + duration).astype("datetime64[ms]"),
+            "duration_ms": duration.astype(np.uint64),
+            "status": DictColumn(is_error.astype(np.int32), self.status_vocab),
+            "status_message": constant("", n),
+            "http_method": DictColumn(np.where(is_root, rng.integers(1, len(self.method_vocab), n), 0),
+                                      self.method_vocab),
+            "http_url": DictColumn(np.where(is_root, 1 + operation, 0), self.url_vocab),
+            "http_status_code": http_status.astype(np.uint16),
+            "host": DictColumn(rng.integers(0, self.HOSTS, n), self.host_vocab),
+            "pod": DictColumn(pod_idx, self.pod_vocab),
+            "container": service_name,
+            "attributes": MapColumn.empty(n),
+        }
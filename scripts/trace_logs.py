@@ -0,0 +1,128 @@
+"""
+Trace-correlated logs for the ClickHouse data generator (--logs-per-span).
+
+By default 70% of generated logs carry a random trace_id/span_id that no span
+has, so a trace -> logs lookup never finds anything and the idx_trace bloom
+filter on logs only ever answers "not here". With --logs-per-span, logs are
+also emitted as children of the generated spans:
+
+  - every span gets Poisson(N) logs, N per service: a default plus
+    service=N overrides (e.g. "2,payment-service=6,api-gateway=0.5")
+  - a log carries its span's trace_id, span_id, service, host, pod and
+    container, and a timestamp inside [start_time, end_time] of the span
+    (logs.timestamp is a DateTime: whole seconds, rounded down)
+  - with --cardinality they get the profile's attributes, but keep the host
+    and pod of their span
+  - logs of ERROR spans are ERROR with probability ERROR_SPAN_ERROR_RATE;
+    other levels, messages and exceptions follow the usual distributions
+  - they are written right after the span batch they belong to (same work
+    unit, worker and partition), so a trace's logs land in nearby parts
+
+The standalone logs stage keeps its volume but stops inventing trace ids:
+those logs play the untraced ones (startup, scheduled jobs, ...), so
+logs -> trace lookups see a mix of hits and misses.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+from columnar_engine import DictColumn, LogBatchGenerator, MapColumn, take_batch, vocabulary
+
+ERROR_SPAN_ERROR_RATE = 0.5
+
+# Span columns a child log inherits
+SPAN_COLUMNS = ["team_id", "trace_id", "span_id", "service_name", "host", "pod", "container"]
+
+
+def parse_logs_per_span(value: str) -> Dict:
+    """Parse "2,payment-service=6" into {"default": 2.0, "services": {"payment-service": 6.0}}."""
+    default, services = 0.0, {}
+    for part in value.split(","):
+        service, _, mean = part.rpartition("=")
+        try:
+            mean = float(mean)
+        except ValueError:
+            raise ValueError(f"Invalid logs per span '{part}', expected N or service=N")
+        if mean < 0:
+            raise ValueError(f"Invalid logs per span '{part}': must not be negative")
+        if service:
+            services[service.strip()] = mean
+        else:
+            default = mean
+    return {"default": default, "services": services}
+
+
+def logger_name(service: str) -> str:
+    return f"com.example.{service.replace('-', '.')}.Handler"
+
+
+class LogsPerSpan:
+    """Mean number of logs per span, by service."""
+
+    def __init__(self, default: float = 1.0, services: Dict[str, float] = None):
+        self.default = default
+        self.services = dict(services or {})
+
+    def mean(self, service: str) -> float:
+        return self.services.get(service, self.default)
+
+    def peak(self) -> float:
+        """Largest mean: the child logs of a span batch have about this many times its rows."""
+        return max([self.default, *self.services.values()])
+
+    def describe(self) -> str:
+        overrides = ", ".join(f"{name} {mean:g}" for name, mean in sorted(self.services.items()))
+        return f"{self.default:g} logs per span" + (f" ({overrides})" if overrides else "")
+
+
+class TraceLogBatchGenerator:
+    """Builds the child logs of a span column batch; levels and messages come from a LogBatchGenerator."""
+
+    def __init__(self, logs: LogBatchGenerator, logs_per_span: LogsPerSpan, cardinality=None):
+        self.logs = logs
+        self.rng = logs.rng
+        self.logs_per_span = logs_per_span
+        # cardinality.CardinalityProfile: only its attributes apply, host and pod stay the span's
+        self.cardinality = cardinality
+        self._by_vocab = {}  # Span service vocabulary -> (mean logs per span, logger vocabulary)
+
+    def _service_tables(self, vocab: np.ndarray) -> tuple:
+        tables = self._by_vocab.get(id(vocab))
+        if tables is None or tables[0] is not vocab:
+            tables = self._by_vocab[id(vocab)] = (
+                vocab, np.array([self.logs_per_span.mean(name) for name in vocab]),
+                vocabulary([logger_name(name) for name in vocab]))
+        return tables[1:]
+
+    def generate(self, spans: Dict[str, object]) -> Dict[str, object]:
+        """Log column batch with Poisson(mean of the span's service) rows per span, grouped by span."""
+        rng = self.rng
+        logs = self.logs
+        service = spans["service_name"]
+        means, logger_vocab = self._service_tables(service.vocab)
+        span_of_log = np.repeat(np.arange(len(service)), rng.poisson(means[service.codes]))
+        n = len(span_of_log)
+        batch = take_batch({name: spans[name] for name in SPAN_COLUMNS}, span_of_log)
+
+        # A uniformly drawn millisecond of the span, truncated to the second
+        start = spans["start_time"].astype("datetime64[ms]").astype(np.int64)[span_of_log]
+        end = spans["end_time"].astype("datetime64[ms]").astype(np.int64)[span_of_log]
+        timestamp = (start + (rng.random(n) * (end - start + 1)).astype(np.int64)) // 1000
+
+        level_code = rng.choice(len(logs.level_vocab), size=n, p=logs.level_p)
+        status = spans["status"]
+        span_error = (status.vocab == "ERROR")[status.codes[span_of_log]]
+        level_code[span_error & (rng.random(n) < ERROR_SPAN_ERROR_RATE)] = logs.error_level
+        message, exception = logs.messages(level_code == logs.error_level)
+
+        batch.update({
+            "timestamp": timestamp.astype("datetime64[s]"),
+            "level": DictColumn(level_code, logs.level_vocab),
+            "logger": DictColumn(service.codes[span_of_log], logger_vocab),
+            "message": message,
+            "thread": DictColumn(rng.integers(0, logs.THREADS, n), logs.thread_vocab),
+            "exception": exception,
+            "attributes": self.cardinality.attributes(rng, n) if self.cardinality else MapColumn.empty(n),
+        })
+        return batch